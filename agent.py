@@ -1,84 +1,462 @@
 import json
-import yaml
-from openai import OpenAI
-from tools import discover_tools
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, FIRST_COMPLETED
+import cassette
+import client_pool
+import hedging
+import llm_cache
+import metrics
+import scheduler
+from openai.types.chat import ChatCompletion
+
+
+def _response_message(response):
+    """Return the first choice's message, or None if the response is malformed or empty."""
+    choices = getattr(response, "choices", None)
+    if not choices:
+        return None
+    first = choices[0]
+    msg = getattr(first, "message", None)
+    if msg is None and isinstance(first, dict):
+        msg = first.get("message")
+    if msg is None:
+        return None
+    content = getattr(msg, "content", None)
+    if content is None and isinstance(msg, dict):
+        content = msg.get("content")
+    if content is None:
+        return None
+    return msg
+
+
+_tool_executor = None
+_tool_executor_lock = threading.Lock()
+
+
+def _shared_tool_executor(max_workers):
+    """Bounded executor shared by every agent in the process for tool calls"""
+    global _tool_executor
+    with _tool_executor_lock:
+        if _tool_executor is None:
+            _tool_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        return _tool_executor
+
+
+_hedge_executor = None
+
+
+def _shared_hedge_executor():
+    """Executor for hedged completions; a losing request keeps its thread until it returns"""
+    global _hedge_executor
+    with _tool_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="hedge")
+        return _hedge_executor
+
+
+def _tool_error_message(tool_call_id, tool_name, error):
+    return {
+        "role": "tool",
+        "tool_call_id": tool_call_id,
+        "name": tool_name,
+        "content": json.dumps({"error": error})
+    }
+
+
+def _tool_call_fields(tool_call):
+    """Return (id, name, arguments) for an SDK tool call object or an assembled dict."""
+    if isinstance(tool_call, dict):
+        function = tool_call.get("function") or {}
+        return tool_call.get("id"), function.get("name"), function.get("arguments") or "{}"
+    function = getattr(tool_call, "function", None)
+    return getattr(tool_call, "id", None), getattr(function, "name", None), getattr(function, "arguments", None) or "{}"
+
+
+class _StreamAssembler:
+    """Accumulates streamed chat completion chunks into a complete assistant message.
+
+    Tool call arguments arrive as JSON fragments keyed by tool call index; each
+    fragment is reported as it arrives and the full call is assembled at the end.
+    """
+
+    def __init__(self):
+        self.content_parts = []
+        self.tool_calls = {}
+        self.usage = None
+
+    def feed(self, chunk):
+        """Consume one chunk and return the stream events it produces."""
+        events = []
+        # With stream_options.include_usage the final chunk carries usage and no choices
+        if getattr(chunk, "usage", None) is not None:
+            self.usage = chunk.usage
+        choices = getattr(chunk, "choices", None) or []
+        if not choices:
+            return events
+        delta = getattr(choices[0], "delta", None)
+        if delta is None:
+            return events
+        content = getattr(delta, "content", None)
+        if content:
+            self.content_parts.append(content)
+            events.append({"type": "content", "delta": content})
+        for tc in getattr(delta, "tool_calls", None) or []:
+            index = getattr(tc, "index", None) or 0
+            slot = self.tool_calls.setdefault(index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+            if getattr(tc, "id", None):
+                slot["id"] = tc.id
+            function = getattr(tc, "function", None)
+            name = getattr(function, "name", None)
+            if name:
+                slot["function"]["name"] += name
+            arguments = getattr(function, "arguments", None)
+            if arguments:
+                slot["function"]["arguments"] += arguments
+                events.append({"type": "tool_call_delta", "index": index, "name": slot["function"]["name"], "arguments_delta": arguments})
+        return events
+
+    def message(self):
+        """The assembled assistant message as a plain dict."""
+        return {
+            "role": "assistant",
+            "content": "".join(self.content_parts),
+            "tool_calls": [self.tool_calls[i] for i in sorted(self.tool_calls)],
+        }
+
+
+def _cached_completion(cache, key):
+    """Rehydrate a cached response into a ChatCompletion, or None on a miss"""
+    data = cache.get(key)
+    if data is None:
+        return None
+    try:
+        return ChatCompletion.model_validate(data)
+    except Exception:
+        return None
+
+
+def _replayed_completion(tape, key):
+    """
+    (ChatCompletion, delay) for the cassette's next recorded answer to key, (None, 0.0)
+    when the cassette has none and misses must fail, or None to go live
+    """
+    replayed = tape.replay(key)
+    if replayed is not None:
+        data, delay = replayed
+        try:
+            return ChatCompletion.model_validate(data), delay
+        except Exception:
+            pass
+    if tape.mode == "replay" and tape.on_miss == "fail":
+        return None, 0.0
+    return None
+
+
+def _completion_dict(model, message, usage=None):
+    """ChatCompletion-shaped dict for a message assembled from a stream, so streamed and
+    non-streamed calls share cache entries"""
+    completion = {
+        "id": "stream",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop", "message": message}],
+    }
+    if usage is not None:
+        completion["usage"] = usage.model_dump() if hasattr(usage, "model_dump") else usage
+    return completion
+
+
+def _cached_stream_events(completion):
+    """Replay a cached completion as the events call_llm_stream would have produced"""
+    message = completion.choices[0].message.model_dump(exclude_none=True)
+    message.setdefault("tool_calls", [])
+    if message.get("content"):
+        yield {"type": "content", "delta": message["content"]}
+    for index, tool_call in enumerate(message["tool_calls"]):
+        yield {"type": "tool_call_delta", "index": index, "name": tool_call["function"]["name"], "arguments_delta": tool_call["function"]["arguments"]}
+    yield {"type": "message", "message": message}
+
+
+def _message_parts(assistant_message):
+    """Extract (content_text, tool_calls) from an SDK message object or a plain dict."""
+    if isinstance(assistant_message, dict):
+        content_text = assistant_message.get("content", "") or ""
+        tool_calls = assistant_message.get("tool_calls", []) or []
+    else:
+        content_text = getattr(assistant_message, "content", "") or ""
+        tool_calls = getattr(assistant_message, "tool_calls", []) or []
+    return content_text, tool_calls
+
 
 class OpenRouterAgent:
-    def __init__(self, config_path="config.yaml", silent=False):
-        # Load configuration
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+    def __init__(self, config_path="config.yaml", silent=False, config_overrides=None):
+        # Load configuration (parsed once per process and shared); overrides (dotted keys) are
+        # applied before the client and tools are built from it
+        self.config = client_pool.apply_overrides(client_pool.load_config(config_path), config_overrides)
         
         # Silent mode for orchestrator (suppresses debug output)
         self.silent = silent
         
-        # Initialize OpenAI client with OpenRouter
-        self.client = OpenAI(
-            base_url=self.config['openrouter']['base_url'],
-            api_key=self.config['openrouter']['api_key']
-        )
+        # Token/latency accounting; callers label calls with their phase and query
+        self.metrics = metrics.get_recorder()
+        self.phase = "agent"
+        self.query_id = None
+        
+        # Shared OpenAI client with OpenRouter (pooled keep-alive connections)
+        self.client = self._create_client()
         
-        # Discover tools dynamically
-        self.discovered_tools = discover_tools(self.config, silent=self.silent)
+        # Discover tools dynamically (once per process, instances are shared)
+        self.discovered_tools = client_pool.get_tools(self.config, silent=self.silent)
         
-        # Build OpenRouter tools array
-        self.tools = [tool.to_openrouter_schema() for tool in self.discovered_tools.values()]
+        # Build OpenRouter tools array, sorted so the schema is byte-identical across agents and
+        # processes and stays inside the provider's cached prompt prefix
+        self.tools = sorted((tool.to_openrouter_schema() for tool in self.discovered_tools.values()),
+                            key=lambda schema: schema.get('function', {}).get('name', ''))
         
         # Build tool mapping
-        self.tool_mapping = {name: tool.execute for name, tool in self.discovered_tools.items()}
+        self.tool_mapping = {name: tool.call for name, tool in self.discovered_tools.items()}
+    
+    def _create_client(self):
+        """Get the shared OpenAI-compatible client pointed at OpenRouter"""
+        return client_pool.get_client(self.config)
+    
+    def _completion_kwargs(self, messages, target_model):
+        """Request parameters shared by every chat completion call"""
+        return {
+            "model": target_model,
+            "messages": messages,
+            "tools": self.tools,
+            "extra_body": {"provider": {"sort": "throughput"}},
+        }
+    
+    def _record_call(self, model, latency, retries, cache_status, usage, success):
+        """Report one LLM call (including its retries) to the metrics recorder"""
+        prompt_tokens, completion_tokens, cached_prompt_tokens = metrics.usage_counts(usage)
+        self.metrics.record(metrics.CallRecord(
+            model=model,
+            phase=self.phase,
+            query_id=self.query_id,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_prompt_tokens=cached_prompt_tokens,
+            latency=latency,
+            retries=retries,
+            cache_status=cache_status,
+            success=success,
+        ))
     
+    def _acquire_slot(self, model):
+        """Wait for the shared scheduler to admit a request to `model`; None when it is disabled"""
+        llm_scheduler = scheduler.get_scheduler(self.config)
+        return llm_scheduler.acquire(model, self.phase) if llm_scheduler is not None else None
+    
+    def _retry_delay(self, error, backoff):
+        """Seconds to sleep before retrying after `error`"""
+        if not scheduler.is_rate_limit(error):
+            return backoff
+        if scheduler.get_scheduler(self.config) is not None:
+            # The scheduler pauses the model for its Retry-After; the retry just queues behind it
+            return 0.0
+        settings = scheduler.scheduler_settings(self.config)
+        return min(scheduler.retry_after(error, backoff), settings["max_retry_after"])
+    
+    def _timed_create(self, request):
+        """One scheduled chat completion, with its latency fed to the per-model histograms"""
+        lease = self._acquire_slot(request["model"])
+        started = time.monotonic()
+        try:
+            response = self.client.chat.completions.create(**request)
+        except Exception as e:
+            if lease is not None:
+                lease.release(error=e)
+            raise
+        latency = time.monotonic() - started
+        if lease is not None:
+            lease.release(latency=latency)
+        hedging.get_tracker().observe(request["model"], latency)
+        return response
+    
+    def _create_completion(self, request):
+        """
+        chat.completions.create, hedged when openrouter.hedging is enabled: if the model has
+        not answered within its observed p90, the same request goes to a secondary model and
+        the first answer wins. The losing request cannot be cancelled from a thread, so it
+        finishes in the background and its result is dropped. Returns (response, model).
+        """
+        plan = hedging.hedge_plan(self.config, request["model"])
+        if plan is None:
+            return self._timed_create(request), request["model"]
+        delay, secondary = plan
+        
+        executor = _shared_hedge_executor()
+        future_to_model = {executor.submit(self._timed_create, request): request["model"]}
+        done, pending = wait(future_to_model, timeout=delay)
+        if not done:
+            hedging.get_tracker().count("hedges")
+            future_to_model[executor.submit(self._timed_create, {**request, "model": secondary})] = secondary
+            pending = set(future_to_model)
+        
+        error = None
+        while done or pending:
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    # The other request may still succeed
+                    error = e
+                    continue
+                if future_to_model[future] == secondary:
+                    hedging.get_tracker().count("hedge_wins")
+                return response, future_to_model[future]
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        raise error
     
     def call_llm(self, messages, model=None):
         """Make OpenRouter API call with tools (no cost guardrails). Return None on failure or slow responses."""
-        import time as _time
         target_model = model or self.config['openrouter']['model']
         max_retries = 2
         backoffs = [0.5, 1.0]
-        start = _time.monotonic()
+        start = time.monotonic()
         max_wait_seconds = 12.0
+        request = self._completion_kwargs(messages, target_model)
 
+        # Replayed cassette answers come first, then identical requests from the optional response cache
+        tape = cassette.get_cassette(self.config)
+        cache = llm_cache.get_cache(self.config)
+        cache_key = llm_cache.make_key(request) if cache is not None or tape is not None else None
+        replayed = _replayed_completion(tape, cache_key) if tape is not None else None
+        if replayed is not None:
+            completion, delay = replayed
+            time.sleep(delay)
+            self._record_call(target_model, time.monotonic() - start, 0, "replay",
+                              getattr(completion, "usage", None), completion is not None)
+            return completion
+        if cache is not None:
+            cached = _cached_completion(cache, cache_key)
+            if cached is not None:
+                self._record_call(target_model, time.monotonic() - start, 0, "hit", None, True)
+                if tape is not None:
+                    tape.record(cache_key, request, cached.model_dump(), time.monotonic() - start)
+                return cached
+
+        response = None
+        served_model = target_model
+        attempt = 0
         for attempt in range(max_retries + 1):
             try:
-                response = self.client.chat.completions.create(
-                    model=target_model,
-                    messages=messages,
-                    tools=self.tools,
-                    extra_body={"provider": {"sort": "throughput"}},
-                )
+                candidate, served_model = self._create_completion(request)
                 # Validate response structure
-                choices = getattr(response, "choices", None)
-                if not choices:
-                    return None
-                first = choices[0]
-                msg = getattr(first, "message", None)
-                if msg is None and isinstance(first, dict):
-                    msg = first.get("message")
-                if msg is None:
-                    return None
-                content = getattr(msg, "content", None)
-                if content is None and isinstance(msg, dict):
-                    content = msg.get("content")
-                if content is None:
-                    return None
-                return response
+                if _response_message(candidate) is not None:
+                    response = candidate
+                    if cache is not None:
+                        cache.set(cache_key, response.model_dump())
+                    if tape is not None:
+                        tape.record(cache_key, request, response.model_dump(), time.monotonic() - start)
+                break
             except Exception as e:
                 if not self.silent:
                     print(f"[LLM ERROR] attempt {attempt+1} failed for model {target_model}: {e}")
-                if attempt < max_retries:
-                    # Check time budget
-                    elapsed = _time.monotonic() - start
-                    if elapsed > max_wait_seconds:
-                        return None
-                    _time.sleep(backoffs[attempt])
+                # Retry while within the time budget
+                if attempt < max_retries and time.monotonic() - start <= max_wait_seconds:
+                    time.sleep(self._retry_delay(e, backoffs[attempt]))
                     continue
-                return None
+                break
+
+        self._record_call(served_model, time.monotonic() - start, attempt,
+                          "disabled" if cache is None else "miss",
+                          getattr(response, "usage", None), response is not None)
+        return response
+    
+    def call_llm_stream(self, messages, model=None):
+        """
+        Streaming OpenRouter API call. Yields content and tool-call argument deltas as they
+        arrive, then one final {"type": "message"} event with the assembled assistant message.
+        Retries only if the stream fails before producing any output; yields nothing on failure.
+        """
+        target_model = model or self.config['openrouter']['model']
+        max_retries = 2
+        backoffs = [0.5, 1.0]
+        start = time.monotonic()
+        max_wait_seconds = 12.0
+        request = self._completion_kwargs(messages, target_model)
+
+        tape = cassette.get_cassette(self.config)
+        cache = llm_cache.get_cache(self.config)
+        cache_key = llm_cache.make_key(request) if cache is not None or tape is not None else None
+        replayed = _replayed_completion(tape, cache_key) if tape is not None else None
+        if replayed is not None:
+            completion, delay = replayed
+            time.sleep(delay)
+            self._record_call(target_model, time.monotonic() - start, 0, "replay",
+                              getattr(completion, "usage", None), completion is not None)
+            if completion is not None:
+                yield from _cached_stream_events(completion)
+            return
+        if cache is not None:
+            cached = _cached_completion(cache, cache_key)
+            if cached is not None:
+                self._record_call(target_model, time.monotonic() - start, 0, "hit", None, True)
+                if tape is not None:
+                    tape.record(cache_key, request, cached.model_dump(), time.monotonic() - start)
+                yield from _cached_stream_events(cached)
+                return
+        cache_status = "disabled" if cache is None else "miss"
+
+        for attempt in range(max_retries + 1):
+            assembler = _StreamAssembler()
+            produced = False
+            lease = self._acquire_slot(target_model)
+            started = time.monotonic()
+            error = None
+            # Kept if the consumer stops iterating mid-stream: no feedback on an abandoned call
+            outcome = {"feedback": False}
+            try:
+                stream = self.client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **request)
+                for chunk in stream:
+                    for event in assembler.feed(chunk):
+                        produced = True
+                        yield event
+                outcome = {"latency": time.monotonic() - started}
+            except Exception as e:
+                error = e
+                outcome = {"error": e}
+            finally:
+                if lease is not None:
+                    lease.release(**outcome)
+
+            if error is None:
+                message = assembler.message()
+                if cache is not None and (message["content"] or message["tool_calls"]):
+                    cache.set(cache_key, _completion_dict(target_model, message))
+                if tape is not None:
+                    tape.record(cache_key, request, _completion_dict(target_model, message, assembler.usage), time.monotonic() - start)
+                self._record_call(target_model, time.monotonic() - start, attempt, cache_status, assembler.usage, True)
+                yield {"type": "message", "message": message}
+                return
+            if not self.silent:
+                print(f"[LLM ERROR] stream attempt {attempt+1} failed for model {target_model}: {error}")
+            if produced:
+                # Partial output already forwarded; keep what we have rather than duplicating it
+                self._record_call(target_model, time.monotonic() - start, attempt, cache_status, assembler.usage, True)
+                yield {"type": "message", "message": assembler.message()}
+                return
+            if attempt < max_retries and time.monotonic() - start <= max_wait_seconds:
+                time.sleep(self._retry_delay(error, backoffs[attempt]))
+                continue
+            self._record_call(target_model, time.monotonic() - start, attempt, cache_status, None, False)
+            return
     
     def handle_tool_call(self, tool_call):
         """Handle a tool call and return the result message"""
+        tool_call_id, tool_name, tool_arguments = _tool_call_fields(tool_call)
         try:
-            # Extract tool name and arguments
-            tool_name = tool_call.function.name
-            tool_args = json.loads(tool_call.function.arguments)
+            # Extract tool arguments
+            tool_args = json.loads(tool_arguments)
             
             # Call appropriate tool from tool_mapping
             if tool_name in self.tool_mapping:
@@ -89,25 +467,100 @@ class OpenRouterAgent:
             # Return tool result message
             return {
                 "role": "tool",
-                "tool_call_id": tool_call.id,
+                "tool_call_id": tool_call_id,
                 "name": tool_name,
                 "content": json.dumps(tool_result)
             }
         
         except Exception as e:
-            return {
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "name": tool_name,
-                "content": json.dumps({"error": f"Tool execution failed: {str(e)}"})
-            }
+            return _tool_error_message(tool_call_id, tool_name, f"Tool execution failed: {str(e)}")
+    
+    def _uses_cache_control(self, model):
+        """Whether `model` needs explicit cache_control breakpoints (others cache prompt prefixes automatically)"""
+        caching = self.config['openrouter'].get('prompt_caching') or {}
+        if not caching.get('enabled', True):
+            return False
+        prefixes = caching.get('cache_control_models', ["anthropic/", "google/gemini"])
+        return any(model.startswith(prefix) for prefix in prefixes)
     
-    def run(self, user_input: str, model: str = None):
-        """Run the agent with user input and return FULL conversation content (no guardrails, resilient to provider errors)."""
-        messages = [
-            {"role": "system", "content": self.config.get('system_prompt', '')},
-            {"role": "user", "content": user_input}
+    def _initial_messages(self, user_input: str, model=None, cacheable_prefix=None):
+        """
+        System prompt, then the user input. The system prompt and tools schema are identical on
+        every call, so they form a stable prefix that providers can serve from their prompt cache.
+        For models that need explicit breakpoints, the system prompt and cacheable_prefix (a leading
+        part of user_input that repeats across calls) are marked with cache_control.
+        """
+        system_prompt = self.config.get('system_prompt', '')
+        if not self._uses_cache_control(model or self.config['openrouter']['model']):
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_input}
+            ]
+        breakpoint = {"type": "ephemeral"}
+        system_content = [{"type": "text", "text": system_prompt, "cache_control": breakpoint}] if system_prompt else ""
+        if cacheable_prefix and user_input.startswith(cacheable_prefix):
+            user_content = [{"type": "text", "text": cacheable_prefix, "cache_control": breakpoint}]
+            if len(user_input) > len(cacheable_prefix):
+                user_content.append({"type": "text", "text": user_input[len(cacheable_prefix):]})
+        else:
+            user_content = user_input
+        return [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user_content}
         ]
+    
+    def _tool_timeout(self, tool_name):
+        """Per-tool timeout in seconds from agent.tool_timeouts (falls back to its 'default' entry)"""
+        timeouts = self.config.get('agent', {}).get('tool_timeouts', {}) or {}
+        return timeouts.get(tool_name, timeouts.get('default', 60))
+    
+    def _stops_without_tool_calls(self):
+        """A text-only reply ends the loop when the agent cannot call mark_task_complete"""
+        return "mark_task_complete" not in self.tool_mapping
+    
+    @staticmethod
+    def _calls_until_completion(tool_calls):
+        """Tool calls up to and including mark_task_complete; later calls are never executed"""
+        for i, tool_call in enumerate(tool_calls):
+            if _tool_call_fields(tool_call)[1] == "mark_task_complete":
+                return tool_calls[:i + 1], True
+        return tool_calls, False
+    
+    def execute_tool_calls(self, tool_calls):
+        """
+        Run all tool calls from one assistant message concurrently on the shared bounded
+        tool executor. Results are returned in call order; a call exceeding its timeout
+        yields an error result instead of blocking the agent.
+        """
+        executor = _shared_tool_executor(self.config.get('agent', {}).get('max_tool_workers', 8))
+        submitted = time.monotonic()
+        futures = [executor.submit(self.handle_tool_call, tool_call) for tool_call in tool_calls]
+        results = []
+        for tool_call, future in zip(tool_calls, futures):
+            tool_call_id, tool_name, _ = _tool_call_fields(tool_call)
+            timeout = self._tool_timeout(tool_name)
+            try:
+                results.append(future.result(timeout=max(0.0, submitted + timeout - time.monotonic())))
+            except FutureTimeoutError:
+                future.cancel()
+                results.append(_tool_error_message(tool_call_id, tool_name, f"Tool timed out after {timeout}s"))
+        return results
+    
+    def _assistant_history_message(self, content_text, tool_calls):
+        message = {"role": "assistant", "content": content_text}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return message
+    
+    def run(self, user_input: str, model: str = None, cacheable_prefix: str = None):
+        """
+        Run the agent loop with user input and return FULL conversation content (no guardrails,
+        resilient to provider errors). Tool results are fed back to the model until it calls
+        mark_task_complete or agent.max_iterations is reached.
+        cacheable_prefix: leading part of user_input that is the same on every call (e.g. a game's
+        brief), marked as a prompt-cache breakpoint for providers that need one.
+        """
+        messages = self._initial_messages(user_input, model, cacheable_prefix)
         full_response_content = []
         max_iterations = self.config.get('agent', {}).get('max_iterations', 10)
         iteration = 0
@@ -125,56 +578,384 @@ class OpenRouterAgent:
                 full_response_content.append(fallback)
                 break
 
-            # Extract assistant message robustly
-            first = response.choices[0]
-            assistant_message = getattr(first, "message", None)
-            if assistant_message is None and isinstance(first, dict):
-                assistant_message = first.get("message", {})
-
             # Content and tool calls with defensive access
-            if isinstance(assistant_message, dict):
-                content_text = assistant_message.get("content", "") or ""
-                tool_calls = assistant_message.get("tool_calls", []) or []
-            else:
-                content_text = getattr(assistant_message, "content", "") or ""
-                tool_calls = getattr(assistant_message, "tool_calls", []) or []
-
-            messages.append({
-                "role": "assistant",
-                "content": content_text,
-                "tool_calls": tool_calls
-            })
+            content_text, tool_calls = _message_parts(_response_message(response))
+
+            messages.append(self._assistant_history_message(content_text, tool_calls))
             if content_text:
                 full_response_content.append(content_text)
 
             if tool_calls:
+                tool_calls, task_completed = self._calls_until_completion(tool_calls)
                 if not self.silent:
-                    try:
-                        print(f"🔧 Agent making {len(tool_calls)} tool call(s)")
-                    except Exception:
-                        print("🔧 Agent making tool call(s)")
-                task_completed = False
+                    print(f"🔧 Agent making {len(tool_calls)} tool call(s)")
+                    for tool_call in tool_calls:
+                        print(f"   📞 Calling tool: {_tool_call_fields(tool_call)[1]}")
+                messages.extend(self.execute_tool_calls(tool_calls))
+                if task_completed:
+                    if not self.silent:
+                        print("✅ Task completion tool called - exiting loop")
+                    return "\n\n".join(full_response_content) if full_response_content else ""
+            elif self._stops_without_tool_calls():
+                break
+            else:
+                if not self.silent:
+                    print("💭 Agent responded without tool calls - continuing loop")
+
+        return "\n\n".join(full_response_content) if full_response_content else fallback
+    
+    def stream(self, user_input: str, model: str = None, cacheable_prefix: str = None):
+        """
+        Streaming counterpart of run(). Yields events as they happen:
+        {"type": "content", "delta"}, {"type": "tool_call_delta", ...}, {"type": "tool_call", "name", "arguments"},
+        {"type": "tool_result", "name", "content"} and finally {"type": "done", "content"} with the
+        same text run() would have returned.
+        """
+        messages = self._initial_messages(user_input, model, cacheable_prefix)
+        full_response_content = []
+        max_iterations = self.config.get('agent', {}).get('max_iterations', 10)
+        iteration = 0
+        fallback = "ACK"
+
+        while iteration < max_iterations:
+            iteration += 1
+            assistant_message = None
+            for event in self.call_llm_stream(messages, model):
+                if event["type"] == "message":
+                    assistant_message = event["message"]
+                else:
+                    yield event
+            if assistant_message is None:
+                full_response_content.append(fallback)
+                yield {"type": "content", "delta": fallback}
+                break
+
+            content_text, tool_calls = _message_parts(assistant_message)
+            messages.append(self._assistant_history_message(content_text, tool_calls))
+            if content_text:
+                full_response_content.append(content_text)
+
+            if tool_calls:
+                tool_calls, task_completed = self._calls_until_completion(tool_calls)
                 for tool_call in tool_calls:
-                    try:
-                        tool_name = getattr(tool_call.function, "name", None)
-                    except Exception:
-                        tool_name = None
-                    if not self.silent and tool_name:
-                        print(f"   📞 Calling tool: {tool_name}")
-                    tool_result = self.handle_tool_call(tool_call)
+                    _, tool_name, tool_arguments = _tool_call_fields(tool_call)
+                    yield {"type": "tool_call", "name": tool_name, "arguments": tool_arguments}
+                for tool_result in self.execute_tool_calls(tool_calls):
                     messages.append(tool_result)
-                    if tool_name == "mark_task_complete":
-                        task_completed = True
-                        if not self.silent:
-                            print("✅ Task completion tool called - exiting loop")
-                        return "\n\n".join(full_response_content) if full_response_content else ""
+                    yield {"type": "tool_result", "name": tool_result["name"], "content": tool_result["content"]}
                 if task_completed:
+                    yield {"type": "done", "content": "\n\n".join(full_response_content)}
+                    return
+            elif self._stops_without_tool_calls():
+                break
+
+        yield {"type": "done", "content": "\n\n".join(full_response_content) if full_response_content else fallback}
+
+
+class AsyncOpenRouterAgent(OpenRouterAgent):
+    """asyncio variant of OpenRouterAgent built on the async OpenAI client.
+
+    LLM calls are awaited on the event loop, so one loop can drive hundreds of agent
+    sessions. Tools are still synchronous and run in the loop's default executor.
+    """
+
+    def _create_client(self):
+        """Get the shared async client for the running event loop"""
+        return client_pool.get_async_client(self.config)
+
+    async def _acquire_slot(self, model):
+        """Async counterpart of OpenRouterAgent._acquire_slot"""
+        llm_scheduler = scheduler.get_scheduler(self.config)
+        return await llm_scheduler.acquire_async(model, self.phase) if llm_scheduler is not None else None
+    
+    async def _timed_create(self, request):
+        """Async counterpart of OpenRouterAgent._timed_create"""
+        loop = asyncio.get_running_loop()
+        lease = await self._acquire_slot(request["model"])
+        started = loop.time()
+        try:
+            response = await self.client.chat.completions.create(**request)
+        except asyncio.CancelledError:
+            # e.g. a losing hedge: free the slot without feedback
+            if lease is not None:
+                lease.release(feedback=False)
+            raise
+        except Exception as e:
+            if lease is not None:
+                lease.release(error=e)
+            raise
+        latency = loop.time() - started
+        if lease is not None:
+            lease.release(latency=latency)
+        hedging.get_tracker().observe(request["model"], latency)
+        return response
+    
+    async def _create_completion(self, request):
+        """Async counterpart of OpenRouterAgent._create_completion; the losing request is cancelled"""
+        plan = hedging.hedge_plan(self.config, request["model"])
+        if plan is None:
+            return await self._timed_create(request), request["model"]
+        delay, secondary = plan
+        
+        task_to_model = {asyncio.ensure_future(self._timed_create(request)): request["model"]}
+        try:
+            done, pending = await asyncio.wait(task_to_model, timeout=delay)
+            if not done:
+                hedging.get_tracker().count("hedges")
+                task_to_model[asyncio.ensure_future(self._timed_create({**request, "model": secondary}))] = secondary
+                pending = set(task_to_model)
+            
+            error = None
+            while done or pending:
+                for task in done:
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if task_to_model[task] == secondary:
+                        hedging.get_tracker().count("hedge_wins")
+                    return response, task_to_model[task]
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            raise error
+        finally:
+            for task in task_to_model:
+                task.cancel()
+    
+    async def call_llm(self, messages, model=None):
+        """Async OpenRouter API call with the same retry budget as OpenRouterAgent.call_llm."""
+        loop = asyncio.get_running_loop()
+        target_model = model or self.config['openrouter']['model']
+        max_retries = 2
+        backoffs = [0.5, 1.0]
+        start = loop.time()
+        max_wait_seconds = 12.0
+        request = self._completion_kwargs(messages, target_model)
+
+        tape = cassette.get_cassette(self.config)
+        cache = llm_cache.get_cache(self.config)
+        cache_key = llm_cache.make_key(request) if cache is not None or tape is not None else None
+        replayed = _replayed_completion(tape, cache_key) if tape is not None else None
+        if replayed is not None:
+            completion, delay = replayed
+            await asyncio.sleep(delay)
+            self._record_call(target_model, loop.time() - start, 0, "replay",
+                              getattr(completion, "usage", None), completion is not None)
+            return completion
+        if cache is not None:
+            cached = _cached_completion(cache, cache_key)
+            if cached is not None:
+                self._record_call(target_model, loop.time() - start, 0, "hit", None, True)
+                if tape is not None:
+                    tape.record(cache_key, request, cached.model_dump(), loop.time() - start)
+                return cached
+
+        response = None
+        served_model = target_model
+        attempt = 0
+        for attempt in range(max_retries + 1):
+            try:
+                candidate, served_model = await self._create_completion(request)
+                if _response_message(candidate) is not None:
+                    response = candidate
+                    if cache is not None:
+                        cache.set(cache_key, response.model_dump())
+                    if tape is not None:
+                        tape.record(cache_key, request, response.model_dump(), loop.time() - start)
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self.silent:
+                    print(f"[LLM ERROR] attempt {attempt+1} failed for model {target_model}: {e}")
+                if attempt < max_retries and loop.time() - start <= max_wait_seconds:
+                    await asyncio.sleep(self._retry_delay(e, backoffs[attempt]))
+                    continue
+                break
+
+        self._record_call(served_model, loop.time() - start, attempt,
+                          "disabled" if cache is None else "miss",
+                          getattr(response, "usage", None), response is not None)
+        return response
+
+    async def call_llm_stream(self, messages, model=None):
+        """Async counterpart of OpenRouterAgent.call_llm_stream (an async generator)."""
+        loop = asyncio.get_running_loop()
+        target_model = model or self.config['openrouter']['model']
+        max_retries = 2
+        backoffs = [0.5, 1.0]
+        start = loop.time()
+        max_wait_seconds = 12.0
+        request = self._completion_kwargs(messages, target_model)
+
+        tape = cassette.get_cassette(self.config)
+        cache = llm_cache.get_cache(self.config)
+        cache_key = llm_cache.make_key(request) if cache is not None or tape is not None else None
+        replayed = _replayed_completion(tape, cache_key) if tape is not None else None
+        if replayed is not None:
+            completion, delay = replayed
+            await asyncio.sleep(delay)
+            self._record_call(target_model, loop.time() - start, 0, "replay",
+                              getattr(completion, "usage", None), completion is not None)
+            if completion is not None:
+                for event in _cached_stream_events(completion):
+                    yield event
+            return
+        if cache is not None:
+            cached = _cached_completion(cache, cache_key)
+            if cached is not None:
+                self._record_call(target_model, loop.time() - start, 0, "hit", None, True)
+                if tape is not None:
+                    tape.record(cache_key, request, cached.model_dump(), loop.time() - start)
+                for event in _cached_stream_events(cached):
+                    yield event
+                return
+        cache_status = "disabled" if cache is None else "miss"
+
+        for attempt in range(max_retries + 1):
+            assembler = _StreamAssembler()
+            produced = False
+            lease = await self._acquire_slot(target_model)
+            started = loop.time()
+            error = None
+            # Kept on cancellation or when the consumer stops iterating: no feedback
+            outcome = {"feedback": False}
+            try:
+                stream = await self.client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **request)
+                async for chunk in stream:
+                    for event in assembler.feed(chunk):
+                        produced = True
+                        yield event
+                outcome = {"latency": loop.time() - started}
+            except Exception as e:
+                error = e
+                outcome = {"error": e}
+            finally:
+                if lease is not None:
+                    lease.release(**outcome)
+
+            if error is None:
+                message = assembler.message()
+                if cache is not None and (message["content"] or message["tool_calls"]):
+                    cache.set(cache_key, _completion_dict(target_model, message))
+                if tape is not None:
+                    tape.record(cache_key, request, _completion_dict(target_model, message, assembler.usage), loop.time() - start)
+                self._record_call(target_model, loop.time() - start, attempt, cache_status, assembler.usage, True)
+                yield {"type": "message", "message": message}
+                return
+            if not self.silent:
+                print(f"[LLM ERROR] stream attempt {attempt+1} failed for model {target_model}: {error}")
+            if produced:
+                self._record_call(target_model, loop.time() - start, attempt, cache_status, assembler.usage, True)
+                yield {"type": "message", "message": assembler.message()}
+                return
+            if attempt < max_retries and loop.time() - start <= max_wait_seconds:
+                await asyncio.sleep(self._retry_delay(error, backoffs[attempt]))
+                continue
+            self._record_call(target_model, loop.time() - start, attempt, cache_status, None, False)
+            return
+
+    async def handle_tool_call(self, tool_call):
+        """Run the (blocking) tool in the default executor and return the result message"""
+        return await asyncio.to_thread(super().handle_tool_call, tool_call)
+
+    async def execute_tool_calls(self, tool_calls):
+        """Async counterpart of OpenRouterAgent.execute_tool_calls (concurrent, call order, per-tool timeouts)"""
+        semaphore = asyncio.Semaphore(self.config.get('agent', {}).get('max_tool_workers', 8))
+
+        async def run_one(tool_call):
+            tool_call_id, tool_name, _ = _tool_call_fields(tool_call)
+            timeout = self._tool_timeout(tool_name)
+            try:
+                async with semaphore:
+                    return await asyncio.wait_for(self.handle_tool_call(tool_call), timeout=timeout)
+            except asyncio.TimeoutError:
+                return _tool_error_message(tool_call_id, tool_name, f"Tool timed out after {timeout}s")
+
+        return list(await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls)))
+
+    async def run(self, user_input: str, model: str = None, cacheable_prefix: str = None):
+        """Async counterpart of OpenRouterAgent.run with identical output semantics."""
+        messages = self._initial_messages(user_input, model, cacheable_prefix)
+        full_response_content = []
+        max_iterations = self.config.get('agent', {}).get('max_iterations', 10)
+        iteration = 0
+        fallback = "ACK"
+
+        while iteration < max_iterations:
+            iteration += 1
+            if not self.silent:
+                print(f"🔄 Agent iteration {iteration}/{max_iterations}")
+
+            response = await self.call_llm(messages, model)
+            if response is None:
+                messages.append({"role": "assistant", "content": fallback})
+                full_response_content.append(fallback)
+                break
+
+            content_text, tool_calls = _message_parts(_response_message(response))
+
+            messages.append(self._assistant_history_message(content_text, tool_calls))
+            if content_text:
+                full_response_content.append(content_text)
+
+            if tool_calls:
+                tool_calls, task_completed = self._calls_until_completion(tool_calls)
+                if not self.silent:
+                    print(f"🔧 Agent making {len(tool_calls)} tool call(s)")
+                messages.extend(await self.execute_tool_calls(tool_calls))
+                if task_completed:
+                    if not self.silent:
+                        print("✅ Task completion tool called - exiting loop")
                     return "\n\n".join(full_response_content) if full_response_content else ""
+            elif self._stops_without_tool_calls():
+                break
             else:
                 if not self.silent:
                     print("💭 Agent responded without tool calls - continuing loop")
 
-            # For this orchestrated usage, we only need the first assistant turn
-            break
+        return "\n\n".join(full_response_content) if full_response_content else fallback
+
+    async def stream(self, user_input: str, model: str = None, cacheable_prefix: str = None):
+        """Async iterator counterpart of OpenRouterAgent.stream with the same events."""
+        messages = self._initial_messages(user_input, model, cacheable_prefix)
+        full_response_content = []
+        max_iterations = self.config.get('agent', {}).get('max_iterations', 10)
+        iteration = 0
+        fallback = "ACK"
+
+        while iteration < max_iterations:
+            iteration += 1
+            assistant_message = None
+            async for event in self.call_llm_stream(messages, model):
+                if event["type"] == "message":
+                    assistant_message = event["message"]
+                else:
+                    yield event
+            if assistant_message is None:
+                full_response_content.append(fallback)
+                yield {"type": "content", "delta": fallback}
+                break
+
+            content_text, tool_calls = _message_parts(assistant_message)
+            messages.append(self._assistant_history_message(content_text, tool_calls))
+            if content_text:
+                full_response_content.append(content_text)
+
+            if tool_calls:
+                tool_calls, task_completed = self._calls_until_completion(tool_calls)
+                for tool_call in tool_calls:
+                    _, tool_name, tool_arguments = _tool_call_fields(tool_call)
+                    yield {"type": "tool_call", "name": tool_name, "arguments": tool_arguments}
+                for tool_result in await self.execute_tool_calls(tool_calls):
+                    messages.append(tool_result)
+                    yield {"type": "tool_result", "name": tool_result["name"], "content": tool_result["content"]}
+                if task_completed:
+                    yield {"type": "done", "content": "\n\n".join(full_response_content)}
+                    return
+            elif self._stops_without_tool_calls():
+                break
 
-        return "\n\n".join(full_response_content) if full_response_content else fallback
\ No newline at end of file
+        yield {"type": "done", "content": "\n\n".join(full_response_content) if full_response_content else fallback}
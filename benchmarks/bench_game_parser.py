@@ -0,0 +1,185 @@
+"""
+Fuzz parity check and microbenchmark for game_parser.TurnParser.
+
+Generates random game replies from a grammar of slot claims, CONFIRMs, TABLE rows,
+PREPARE/PROPOSE payloads, aliases, odd casing and separators (plus character drops like
+the channel's noise) and checks that TurnParser.parse returns exactly what the game's
+regex parsers return: _parse_claims_and_confirms, _parse_table_update (compared by the
+state it leaves), _detect_prepare_candidate and InfoSharingEnvironment.is_valid_proposal,
+including the exceptions they raise. Then times both on the same corpus.
+
+Usage:
+    python benchmarks/bench_game_parser.py [--cases 20000] [--seed 0] [--iterations 5]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from types import SimpleNamespace
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_parser import TurnParser  # noqa: E402
+from multi_agent_runner import InfoSharingEnvironment, MultiAgentConsoleGame  # noqa: E402
+
+CELLS = ["A1", "A2", "B1", "B2", "a1", "b2", "C3", "A3"]
+ATTRS = ["C", "S", "c", "s", "X"]
+SEPARATORS = [" ", " ", " | ", ", ", ",", "\n", "\t", "\r\n", ";", "", "  "]
+KEYWORDS = ["CONFIRM", "confirm", "Confirm", "CONFIRMED", "xCONFIRM", "TABLE:", "table:", "TABLE",
+            "PREPARE_PROPOSAL", "prepare-proposal", "PREPAREPROPOSAL", "PREPARE PROPOSAL", "PREPARE_POPOSAL",
+            "PROPOSE=", "propose=", "SCHEMA", "UNKNOWN:", "OK", "?"]
+STATUSES = ["[OK]", "[ok]", "[UNK]", "[REVISE]", "[Ok]", "[OK", "OK]", ""]
+
+
+def _values(env):
+    values = env.COLORS + env.SHAPES + list(env.color_alias) + list(env.shape_alias)
+    return values + [v.lower() for v in values] + [v.upper() for v in values] + ["Purple", "x", "Redd1", "?"]
+
+
+def _slot(rng, env):
+    return (f"{rng.choice(CELLS)}.{rng.choice(ATTRS)}{rng.choice(['=', ' = ', '=', ' =', '= ', ':'])}"
+            f"{rng.choice(_values(env))}")
+
+
+def _grid(rng, env):
+    grid = {}
+    for cell in rng.sample(env.CELLS, rng.choice([4, 4, 4, 3])):
+        entry = {}
+        if rng.random() < 0.95:
+            entry["Color"] = rng.choice(_values(env) + [None, 3, ["Red"]])
+        if rng.random() < 0.95:
+            entry["Shape"] = rng.choice(_values(env) + [None])
+        grid[cell] = entry if rng.random() < 0.97 else "Red"
+    return grid
+
+
+def _fragment(rng, env):
+    kind = rng.random()
+    if kind < 0.35:
+        return _slot(rng, env)
+    if kind < 0.55:
+        return f"{rng.choice(KEYWORDS[:5])} {_slot(rng, env)}"
+    if kind < 0.7:
+        rows = [f"{_slot(rng, env)} {rng.choice(STATUSES)}" for _ in range(rng.randint(1, 8))]
+        return "TABLE: " + rng.choice([", ", ",", " ", "\n", " | "]).join(rows)
+    if kind < 0.8:
+        payload = json.dumps(_grid(rng, env))
+        if rng.random() < 0.2:
+            payload = payload[:rng.randrange(len(payload))]
+        return f"{rng.choice(KEYWORDS[8:15])}{rng.choice(['', ' ', '='])}{payload}"
+    if kind < 0.85:
+        return rng.choice(["{", "}", "{}", "[1]", "\"A1\""])
+    return rng.choice(KEYWORDS + ["hello", "A1", "B2.S", "=Red"])
+
+
+def make_reply(rng, env) -> str:
+    text = "".join(_fragment(rng, env) + rng.choice(SEPARATORS) for _ in range(rng.randint(0, 8)))
+    if rng.random() < 0.3:
+        # Channel-style noise
+        text = "".join(ch for ch in text if ch in "\n\r\t" or rng.random() >= 0.05)
+    return text
+
+
+def _outcome(fn, *args):
+    try:
+        return ("ok", fn(*args))
+    except Exception as e:
+        return ("error", type(e).__name__)
+
+
+def _state():
+    return SimpleNamespace(canonical_state={}, confirmations=defaultdict(lambda: defaultdict(set)), _state_section=None)
+
+
+def reference(game, text):
+    """What the game's regex parsers make of text"""
+    table_state = SimpleNamespace(env=game.env, **vars(_state()))
+    MultiAgentConsoleGame._parse_table_update(table_state, text)
+    return {
+        "claims": _outcome(MultiAgentConsoleGame._parse_claims_and_confirms, game, "Agent1", text),
+        "table": (table_state.canonical_state, {k: dict(v) for k, v in table_state.confirmations.items()}),
+        "prepare": _outcome(MultiAgentConsoleGame._detect_prepare_candidate, game, text),
+        "proposal": _outcome(game.env.is_valid_proposal, text),
+        "has_propose": "PROPOSE=" in text,
+    }
+
+
+def parsed(parser, text):
+    """The same fields from TurnParser"""
+    outcome = _outcome(parser.parse, text)
+    if outcome[0] == "error":
+        return {"error": outcome}
+    record = outcome[1]
+    table_state = _state()
+    MultiAgentConsoleGame._apply_table_rows(table_state, record.table)
+    return {
+        "claims": ("ok", record.claims),
+        "table": (table_state.canonical_state, {k: dict(v) for k, v in table_state.confirmations.items()}),
+        "prepare": ("ok", record.prepare),
+        "proposal": ("ok", record.proposal),
+        "has_propose": record.has_propose,
+    }
+
+
+def _expected_with_errors(expected):
+    # parse() fails as a whole where one of the reference functions raises
+    errors = [v for v in (expected["claims"], expected["prepare"], expected["proposal"]) if v[0] == "error"]
+    return {"error": errors[0]} if errors else expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=5, help="timed passes over the corpus")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    env = InfoSharingEnvironment(seed=args.seed)
+    game = SimpleNamespace(env=env)
+    turn_parser = TurnParser(env)
+    corpus = [make_reply(rng, env) for _ in range(args.cases)]
+
+    mismatches = 0
+    for text in corpus:
+        expected = _expected_with_errors(reference(game, text))
+        got = parsed(turn_parser, text)
+        if got != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"MISMATCH for {text!r}\n  expected: {expected}\n  got:      {got}\n")
+    print(f"parity: {args.cases - mismatches}/{args.cases} replies identical")
+
+    def old_turn(text):
+        # What _apply_reply used to run per reply
+        table_state = SimpleNamespace(env=env, **vars(_state()))
+        MultiAgentConsoleGame._parse_table_update(table_state, text)
+        MultiAgentConsoleGame._parse_claims_and_confirms(game, "Agent1", text)
+        MultiAgentConsoleGame._detect_prepare_candidate(game, text)
+        env.is_valid_proposal(text) or env.is_valid_proposal(text)
+        env.is_valid_proposal(text) or env.is_valid_proposal(text)
+
+    def new_turn(text):
+        table_state = _state()
+        record = turn_parser.parse(text)
+        MultiAgentConsoleGame._apply_table_rows(table_state, record.table)
+        record.proposal or turn_parser.parse_proposal(text)
+
+    for name, fn in (("regex parsers", old_turn), ("TurnParser", new_turn)):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for text in corpus:
+                try:
+                    fn(text)
+                except Exception:
+                    pass
+        elapsed = time.perf_counter() - start
+        print(f"{name:<14} {elapsed / (args.iterations * len(corpus)) * 1e6:7.2f} us/reply")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
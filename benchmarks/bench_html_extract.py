@@ -0,0 +1,68 @@
+"""
+Microbenchmark for search_web's HTML-to-text extraction backends.
+
+Feeds every saved page in benchmarks/fixtures/html to each installed backend in
+16 KB chunks (as SearchTool streams a response body) and reports time per page,
+how many bytes the backend actually consumed, and the snippet length.
+
+Usage:
+    python benchmarks/bench_html_extract.py [--iterations 20] [--limit 1000] [--backends stream,bs4]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.html_extract import BACKENDS, available_backends  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+CHUNK_SIZE = 16 * 1024
+
+
+def _chunks(data: bytes, consumed: list):
+    for i in range(0, len(data), CHUNK_SIZE):
+        chunk = data[i:i + CHUNK_SIZE]
+        consumed[0] += len(chunk)
+        yield chunk
+
+
+def bench(backend: str, data: bytes, limit: int, iterations: int) -> dict:
+    extractor = BACKENDS[backend]
+    consumed = [0]
+    text = extractor(_chunks(data, consumed), limit, "utf-8")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        extractor(_chunks(data, [0]), limit, "utf-8")
+    elapsed = (time.perf_counter() - start) / iterations
+    return {"ms": elapsed * 1000, "read_kb": consumed[0] / 1024, "chars": min(len(text), limit)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=1000, help="snippet length, as search.content_limit")
+    parser.add_argument("--backends", default=",".join(available_backends()),
+                        help="comma-separated backends (default: all installed)")
+    args = parser.parse_args()
+
+    backends = [b for b in args.backends.split(",") if b in available_backends()]
+    fixtures = sorted(f for f in os.listdir(FIXTURES_DIR) if f.endswith(".html"))
+    print(f"backends: {', '.join(backends)} | iterations: {args.iterations} | limit: {args.limit} chars\n")
+    print(f"{'fixture':<22}{'size KB':>9}  {'backend':<11}{'ms/page':>9}{'read KB':>9}{'chars':>7}")
+    totals = {b: 0.0 for b in backends}
+    for name in fixtures:
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            data = f.read()
+        for backend in backends:
+            result = bench(backend, data, args.limit, args.iterations)
+            totals[backend] += result["ms"]
+            print(f"{name:<22}{len(data) / 1024:>9.0f}  {backend:<11}{result['ms']:>9.2f}{result['read_kb']:>9.0f}{result['chars']:>7}")
+    print()
+    for backend in backends:
+        print(f"total {backend:<11}{totals[backend]:>9.2f} ms for {len(fixtures)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Load benchmark for the orchestrator and the console game against the fake OpenRouter server.
+
+Starts benchmarks/fake_openrouter.py in-process, writes a copy of the config whose
+openrouter.base_url points at it (response cache off, plus any --set overrides) and, for
+each profile, runs TaskOrchestrator.orchestrate queries and MultiAgentConsoleGame.play
+games at the given concurrency. Reports p50/p95/p99 end-to-end latency and throughput per
+workload, per-call LLM latency and token throughput from the metrics recorder, and the
+server's error counters. Latencies are real seconds, so pick --time-scale to taste.
+
+Usage:
+    python benchmarks/bench_openrouter_load.py [--profiles instant,realistic,rate-limited]
+        [--queries 8] [--games 2] [--concurrency 4] [--game-turns 8] [--time-scale 0.1]
+        [--set scheduler.enabled=false] [--json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import metrics  # noqa: E402
+from client_pool import apply_overrides  # noqa: E402
+from fake_openrouter import FakeOpenRouter, resolve_profile  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.yaml")
+QUERIES = [
+    "Compare the energy density of current battery chemistries",
+    "What drove the decline in global shipping rates?",
+    "Summarize the evidence on remote work and productivity",
+    "How do central banks use forward guidance?",
+]
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def latency_stats(values: List[float], elapsed: float) -> Dict[str, Any]:
+    return {
+        "runs": len(values),
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "per_second": round(len(values) / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+
+
+def write_config(base_config: str, url: str, overrides: Dict[str, Any]) -> str:
+    with open(base_config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config = apply_overrides(config, {
+        "openrouter.base_url": url,
+        "openrouter.api_key": "fake-key",
+        "cache.enabled": False,
+        **overrides,
+    })
+    fd, path = tempfile.mkstemp(prefix="fake_openrouter_", suffix=".yaml")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return path
+
+
+def run_timed(fn, jobs: List[Any], concurrency: int) -> tuple:
+    """(per-job latencies of the jobs that succeeded, failures, wall seconds)"""
+    latencies = []
+    failures = 0
+
+    def timed(job):
+        start = time.perf_counter()
+        fn(job)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(timed, job) for job in jobs]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                failures += 1
+    return latencies, failures, time.perf_counter() - start
+
+
+def run_profile(fake: FakeOpenRouter, profile: Dict[str, Any], config_path: str, args) -> Dict[str, Any]:
+    from orchestrator import TaskOrchestrator
+    from multi_agent_runner import MultiAgentConsoleGame
+
+    fake.set_profile(profile)
+    recorder = metrics.get_recorder()
+    recorder.reset()
+    report: Dict[str, Any] = {}
+
+    def query(i):
+        TaskOrchestrator(config_path=config_path, silent=True).orchestrate(QUERIES[i % len(QUERIES)])
+
+    def game(seed):
+        MultiAgentConsoleGame(config_path=config_path, seed=seed,
+                              config_overrides={"game.turns_total": args.game_turns}).play(synthesize=False)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, fn, jobs in (("orchestrate", query, list(range(args.queries))),
+                               ("game", game, list(range(1, args.games + 1)))):
+            if not jobs:
+                continue
+            latencies, failures, elapsed = run_timed(fn, jobs, args.concurrency)
+            report[name] = {**latency_stats(latencies, elapsed), "failures": failures}
+
+    wall = time.perf_counter() - started
+    records = recorder.records()
+    call_latencies = [r["latency"] for r in records if r["success"]]
+    completion_tokens = sum(r["completion_tokens"] for r in records)
+    busy = sum(call_latencies)
+    report["llm_calls"] = {
+        **latency_stats(call_latencies, wall),
+        "failures": sum(1 for r in records if not r["success"]),
+        "retries": sum(r["retries"] for r in records),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+        "completion_tokens": completion_tokens,
+        "completion_tokens_per_call_second": round(completion_tokens / busy, 1) if busy else 0.0,
+    }
+    report["server"] = dict(fake.stats)
+    return report
+
+
+def print_report(name: str, report: Dict[str, Any]):
+    print(f"\n=== profile: {name} ===")
+    print(f"{'workload':<12}{'runs':>6}{'fail':>6}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'runs/s':>9}")
+    for workload in ("orchestrate", "game", "llm_calls"):
+        stats = report.get(workload)
+        if stats:
+            print(f"{workload:<12}{stats['runs']:>6}{stats['failures']:>6}{stats['p50']:>9.3f}"
+                  f"{stats['p95']:>9.3f}{stats['p99']:>9.3f}{stats['per_second']:>9.2f}")
+    calls = report["llm_calls"]
+    server = report["server"]
+    print(f"tokens: {calls['prompt_tokens']} prompt, {calls['completion_tokens']} completion "
+          f"({calls['completion_tokens_per_call_second']} tok/s per call) | retries: {calls['retries']}")
+    print(f"server: {server['requests']} requests, {server['rate_limited']} x 429, "
+          f"{server['server_errors']} x 5xx, {server['cached_tokens']} cached prompt tokens")
+
+
+def _parse_set(items: List[str]) -> Dict[str, Any]:
+    overrides = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        overrides[key] = yaml.safe_load(value)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", default="instant,realistic,rate-limited",
+                        help="comma-separated presets or profile JSON files")
+    parser.add_argument("--queries", type=int, default=8, help="orchestrate() calls per profile")
+    parser.add_argument("--games", type=int, default=2, help="games per profile")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--game-turns", type=int, default=8)
+    parser.add_argument("--time-scale", type=float, default=0.1, help="multiplies every simulated delay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="dotted config override, e.g. orchestrator.parallel_agents=2")
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--json", action="store_true", help="also print the reports as JSON")
+    args = parser.parse_args()
+
+    fake = FakeOpenRouter().start()
+    config_path = write_config(args.config, fake.url, _parse_set(args.set))
+    reports = {}
+    try:
+        for name in args.profiles.split(","):
+            profile = {**resolve_profile(name), "time_scale": args.time_scale, "seed": args.seed}
+            reports[name] = run_profile(fake, profile, config_path, args)
+            print_report(name, reports[name])
+    finally:
+        fake.stop()
+        os.remove(config_path)
+    if args.json:
+        print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
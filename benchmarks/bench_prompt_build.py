@@ -0,0 +1,132 @@
+"""
+Microbenchmark for the console game's per-turn prompt construction.
+
+Plays a scripted game (no LLM calls: synthetic replies are fed through the game's own
+state update) and builds every turn's prompt twice: once with the cached sections and
+append-only transcript, once after dropping every cache, which is what each turn cost
+before prompts were built incrementally. Reports prompt size, characters rendered and
+build time per turn.
+
+Usage:
+    python benchmarks/bench_prompt_build.py [--turns 96] [--iterations 50] [--static-prefix-first]
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from multi_agent_runner import MultiAgentConsoleGame  # noqa: E402
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.yaml")
+
+
+def scripted_reply(game: MultiAgentConsoleGame, idx: int, rng: random.Random) -> str:
+    """A plausible turn: a couple of the agent's facts, a confirmation of someone else's slot, a table now and then"""
+    facts = game.private_facts[idx] or ["A1.C=Red"]
+    parts = rng.sample(facts, min(2, len(facts)))
+    slot = rng.choice(list(game.canonical_state))
+    value = game.canonical_state[slot] or game.env.solution[slot[:2]]["Color" if slot.endswith(".C") else "Shape"]
+    parts.append(f"CONFIRM {slot}={value}")
+    if rng.random() < 0.2:
+        parts.append("TABLE: " + ", ".join(f"{s}={v} [OK]" for s, v in game.canonical_state.items() if v))
+    return " | ".join(parts)
+
+
+def built(game: MultiAgentConsoleGame) -> int:
+    return game.prompt_bytes_built + game.channel.bytes_built
+
+
+def incremental_build(game: MultiAgentConsoleGame, idx: int, iterations: int) -> tuple:
+    """
+    (prompt, characters rendered, seconds per build) with the caches as the last turn left
+    them, i.e. only the sections its state updates marked dirty are re-rendered
+    """
+    dirty = [name for name in ("_state_section", "_reliability_section") if getattr(game, name) is None]
+    before = built(game)
+    prompt = game._build_prompt_for_agent(idx)
+    rendered = built(game) - before
+    elapsed = 0.0
+    for _ in range(iterations):
+        for name in dirty:
+            setattr(game, name, None)
+        start = time.perf_counter()
+        game._build_prompt_for_agent(idx)
+        elapsed += time.perf_counter() - start
+    return prompt, rendered, elapsed / iterations
+
+
+def full_build(game: MultiAgentConsoleGame, idx: int, iterations: int) -> tuple:
+    """(prompt, characters rendered, seconds per build) with every cache dropped before each build"""
+    elapsed = 0.0
+    rendered = 0
+    for _ in range(iterations):
+        game.reset_prompt_cache()
+        before = built(game)
+        start = time.perf_counter()
+        prompt = game._build_prompt_for_agent(idx)
+        elapsed += time.perf_counter() - start
+        rendered = built(game) - before
+    return prompt, rendered, elapsed / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, default=96)
+    parser.add_argument("--iterations", type=int, default=50, help="builds timed per turn and mode")
+    parser.add_argument("--static-prefix-first", action="store_true", help="as game.static_prefix_first")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--config", default=CONFIG_PATH)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = MultiAgentConsoleGame(config_path=args.config, seed=args.seed,
+                                     config_overrides={"game.static_prefix_first": args.static_prefix_first})
+
+    print(f"turns: {args.turns} | iterations: {args.iterations} | static_prefix_first: {args.static_prefix_first}\n")
+    print(f"{'turn':>5}{'prompt KB':>11}{'full KB':>9}{'incr KB':>9}{'full us':>9}{'incr us':>9}")
+    totals = {"prompt": 0, "full": 0, "incr": 0, "full_s": 0.0, "incr_s": 0.0}
+    previous = {}
+    prefix_hits = 0
+    appended = 0
+    for t in range(1, args.turns + 1):
+        idx = (t - 1) % 4
+        incr_prompt, incr_chars, incr_s = incremental_build(game, idx, args.iterations)
+        # The transcript line the last turn appended was rendered by send(), not by the build
+        incr_chars += appended
+        prompt, full_chars, full_s = full_build(game, idx, args.iterations)
+        assert incr_prompt == prompt, f"incremental prompt differs on turn {t}"
+        # Would a provider prefix cache see this agent's previous prompt as a prefix of this one?
+        common = os.path.commonprefix([previous.get(idx, ""), prompt])
+        prefix_hits += len(common)
+        previous[idx] = prompt
+
+        totals["prompt"] += len(prompt)
+        totals["full"] += full_chars
+        totals["incr"] += incr_chars
+        totals["full_s"] += full_s
+        totals["incr_s"] += incr_s
+        if t == 1 or t % max(1, args.turns // 12) == 0 or t == args.turns:
+            print(f"{t:>5}{len(prompt) / 1024:>11.1f}{full_chars / 1024:>9.1f}{incr_chars / 1024:>9.1f}"
+                  f"{full_s * 1e6:>9.1f}{incr_s * 1e6:>9.1f}")
+        before = game.channel.bytes_built
+        with contextlib.redirect_stdout(io.StringIO()):
+            if game._apply_reply(t, idx, scripted_reply(game, idx, rng)):
+                break
+        appended = game.channel.bytes_built - before
+
+    print(f"\ntotal prompt KB: {totals['prompt'] / 1024:.1f}")
+    print(f"rendered KB:     full {totals['full'] / 1024:.1f} | incremental {totals['incr'] / 1024:.1f}")
+    print(f"build ms:        full {totals['full_s'] * 1000:.2f} | incremental {totals['incr_s'] * 1000:.2f}")
+    print(f"prefix shared with the agent's previous prompt: {prefix_hits / max(1, totals['prompt']):.0%} of prompt bytes")
+    print(json.dumps({"turns": t, **{k: round(v, 6) for k, v in totals.items()}}))
+
+
+if __name__ == "__main__":
+    main()
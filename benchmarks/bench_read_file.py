@@ -0,0 +1,95 @@
+"""
+Microbenchmark for read_file on large files.
+
+Writes a generated text file of --mb megabytes and times the tool's reads against it:
+the whole file (capped at read_file.max_bytes), head, tail, a line range near the end
+(first call builds the sparse line index, later calls reuse it) and a byte range, next to
+the previous readlines()-based tail and f.read() full read. Tool results are not memoized
+here; execute() is called directly.
+
+Usage:
+    python benchmarks/bench_read_file.py [--mb 100] [--iterations 5] [--lines 20]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.read_file_tool import ReadFileTool, _line_indexes  # noqa: E402
+
+
+def write_file(path: str, mb: int) -> int:
+    """Lines of varying length (some non-ASCII) until the file reaches mb megabytes; returns the line count"""
+    lines = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while f.tell() < mb * 1024 * 1024:
+            f.write(f"{lines:>9} {'é' * (lines % 3)}{'x' * (lines % 97)}\n")
+            lines += 1
+    return lines
+
+
+def readlines_tail(path: str, n: int) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    return "".join(lines[-n:]).rstrip("\n")
+
+
+def full_read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def timed(fn, iterations: int) -> tuple:
+    """(ms of the first call, median ms of the following calls, result)"""
+    start = time.perf_counter()
+    result = fn()
+    first = (time.perf_counter() - start) * 1000
+    runs = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - start) * 1000)
+    runs.sort()
+    return first, runs[len(runs) // 2] if runs else first, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mb", type=int, default=100, help="size of the generated file")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--lines", type=int, default=20, help="N for head/tail and the line range")
+    args = parser.parse_args()
+
+    tool = ReadFileTool({})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.txt")
+        total_lines = write_file(path, args.mb)
+        size = os.path.getsize(path)
+        start_line = total_lines - total_lines // 10
+        print(f"file: {size / 1e6:.1f} MB, {total_lines} lines | max_bytes: {tool.max_bytes} | "
+              f"iterations: {args.iterations}\n")
+
+        cases = [
+            ("f.read() (before)", lambda: full_read(path)),
+            ("full read (capped)", lambda: tool.execute(path=path)),
+            ("readlines tail (before)", lambda: readlines_tail(path, args.lines)),
+            ("tail", lambda: tool.execute(path=path, tail=args.lines)),
+            ("head", lambda: tool.execute(path=path, head=args.lines)),
+            ("line range", lambda: tool.execute(path=path, start_line=start_line,
+                                                end_line=start_line + args.lines - 1)),
+            ("byte range", lambda: tool.execute(path=path, offset=size // 2, length=4096)),
+        ]
+        print(f"{'read':<26}{'first ms':>10}{'median ms':>11}{'KB returned':>13}")
+        for label, fn in cases:
+            if label == "line range":
+                _line_indexes.clear()  # So the first call includes building the index
+            first, median, result = timed(fn, args.iterations)
+            content = result["content"] if isinstance(result, dict) else result
+            print(f"{label:<26}{first:>10.1f}{median:>11.2f}{len(content.encode('utf-8')) / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
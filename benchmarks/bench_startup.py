@@ -0,0 +1,94 @@
+"""
+Startup benchmark for the entry points, using python -X importtime.
+
+For main.py, make_it_heavy.py and multi_agent_runner.py, starts a fresh interpreter that
+imports the module and builds what its main() builds before the first prompt (an agent,
+a tool-equipped agent via the orchestrator's factory, a console game), without any LLM
+call. Reports wall time, total import time, the number of modules imported and which
+heavy tool dependencies (ddgs, requests, bs4, lxml) were pulled in. --eager also loads
+every tool module up front, which is what discover_tools used to do; --cold drops the
+tool manifest cache first.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--eager] [--cold] [--top 10]
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_PATH = os.path.join(ROOT, "tools", "__pycache__", "tool_manifest.json")
+HEAVY_MODULES = ("ddgs", "requests", "bs4", "lxml", "selectolax")
+
+ENTRY_POINTS = {
+    "main.py": "import main\nfrom agent import OpenRouterAgent\nOpenRouterAgent(silent=True)",
+    "make_it_heavy.py": "import make_it_heavy\nfrom client_pool import create_agent\ncreate_agent()",
+    "multi_agent_runner.py": "import multi_agent_runner\nmulti_agent_runner.MultiAgentConsoleGame(seed=1)",
+}
+EAGER = "\nimport tools\nfor _tool in tools.discover_tools({}, silent=True).values():\n    getattr(_tool, 'load', lambda: None)()"
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def run_once(snippet: str, cold: bool) -> dict:
+    if cold and os.path.exists(MANIFEST_PATH):
+        os.remove(MANIFEST_PATH)
+    code = "import time, io, contextlib\n_t = time.perf_counter()\nwith contextlib.redirect_stdout(io.StringIO()):\n"
+    code += "".join(f"    {line}\n" for line in snippet.splitlines())
+    code += "print(time.perf_counter() - _t)"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    imports = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m:
+            imports.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3))))
+    top_level = min((depth for *_, depth in imports), default=1)
+    return {
+        "wall": float(proc.stdout.strip().splitlines()[-1]),
+        "import": sum(cumulative for _, _, cumulative, depth in imports if depth == top_level) / 1e6,
+        "modules": len(imports),
+        "heavy": sorted({name.split(".")[0] for name, *_ in imports if name.split(".")[0] in HEAVY_MODULES}),
+        "imports": imports,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per entry point (medians are reported)")
+    parser.add_argument("--eager", action="store_true", help="also import every tool module, as before lazy loading")
+    parser.add_argument("--cold", action="store_true", help="delete the tool manifest cache before each run")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list per entry point")
+    args = parser.parse_args()
+
+    print(f"repeat: {args.repeat} | eager tools: {args.eager} | cold manifest: {args.cold}\n")
+    print(f"{'entry point':<24}{'wall ms':>9}{'import ms':>11}{'modules':>9}  heavy deps")
+    slowest = {}
+    for name, snippet in ENTRY_POINTS.items():
+        try:
+            runs = [run_once(snippet + (EAGER if args.eager else ""), args.cold) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<24} failed: {e}")
+            continue
+        print(f"{name:<24}{statistics.median(r['wall'] for r in runs) * 1000:>9.1f}"
+              f"{statistics.median(r['import'] for r in runs) * 1000:>11.1f}{runs[-1]['modules']:>9}  "
+              f"{', '.join(runs[-1]['heavy']) or '-'}")
+        entry_module = name[:-3]
+        slowest[name] = sorted(((cumulative, module) for module, _, cumulative, _ in runs[-1]["imports"]
+                                if module != entry_module), reverse=True)[:args.top]
+
+    for name, imports in slowest.items():
+        if not imports:
+            continue
+        print(f"\n{name}: slowest imports (cumulative ms, last run)")
+        for cumulative, module in imports:
+            print(f"  {cumulative / 1000:8.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+Deterministic local stand-in for OpenRouter's OpenAI-compatible /chat/completions API.
+
+Point openrouter.base_url at it to measure the orchestrator and the console game without
+API credits or provider noise. A profile (dict, JSON file or one of PROFILES) controls:
+
+- latency: time to first token drawn from a distribution
+  ({"dist": "fixed", "value": s} | "uniform" low/high | "normal" mean/std |
+  "lognormal" median/sigma | "exponential" mean), then completion tokens paced at
+  tokens_per_second (also the SSE pacing when stream=true)
+- error_rate_429 / error_rate_5xx with retry_after (the Retry-After header of 429s)
+- tool_calls: tools called on successive agent iterations when the request offers them
+  (default: mark_task_complete, so orchestrator agents finish in one round)
+- replies: scripted [{"match": regex on the last user message, "reply": text or list}]
+  rules, tried before the built-in decomposition (JSON question array), console game
+  (claims, CONFIRMs, PROPOSE from the prompt's own state) and generic answers
+- models: per-model overrides of any of the above
+- time_scale: multiplies every sleep and Retry-After (0 for throughput runs without waiting)
+
+Randomness is seeded per request body and attempt, so runs are repeatable whatever the
+thread interleaving. Prompt caching is simulated: prompt prefixes seen before (in 1 KB
+blocks) are reported as usage.prompt_tokens_details.cached_tokens. GET /stats returns
+request and error counters.
+
+Usage:
+    python benchmarks/fake_openrouter.py [--port 8765] [--profile realistic|path.json]
+then set openrouter.base_url to http://127.0.0.1:8765/api/v1
+"""
+import re
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+CHARS_PER_TOKEN = 4
+CACHE_BLOCK = 1024  # Characters per simulated prompt-cache block
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "instant": {"latency": {"dist": "fixed", "value": 0.0}, "tokens_per_second": 0},
+    "realistic": {"latency": {"dist": "lognormal", "median": 0.6, "sigma": 0.5}, "tokens_per_second": 80},
+    "heavy-tail": {"latency": {"dist": "lognormal", "median": 0.6, "sigma": 1.2}, "tokens_per_second": 60},
+    "rate-limited": {"latency": {"dist": "lognormal", "median": 0.6, "sigma": 0.5}, "tokens_per_second": 80,
+                     "error_rate_429": 0.2, "retry_after": 1},
+    "flaky": {"latency": {"dist": "lognormal", "median": 0.6, "sigma": 0.5}, "tokens_per_second": 80,
+              "error_rate_5xx": 0.1},
+}
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "seed": 0,
+    "latency": {"dist": "fixed", "value": 0.0},
+    "tokens_per_second": 0,  # 0 = no pacing
+    "time_scale": 1.0,
+    "error_rate_429": 0.0,
+    "error_rate_5xx": 0.0,
+    "retry_after": 1,
+    "tool_calls": ["mark_task_complete"],
+    "tool_arguments": {},
+    "replies": [],
+    "answer_tokens": 200,  # Length of generic answers
+    "models": {},
+}
+
+
+def resolve_profile(profile: Any) -> Dict[str, Any]:
+    """Full settings from a preset name, a JSON file path or a (partial) dict"""
+    if isinstance(profile, str):
+        if profile in PROFILES:
+            profile = PROFILES[profile]
+        else:
+            with open(profile, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+    return {**DEFAULT_PROFILE, **(profile or {})}
+
+
+def sample_latency(spec: Dict[str, Any], rng: random.Random) -> float:
+    dist = spec.get("dist", "fixed")
+    if dist == "uniform":
+        value = rng.uniform(spec.get("low", 0.0), spec.get("high", 1.0))
+    elif dist == "normal":
+        value = rng.gauss(spec.get("mean", 1.0), spec.get("std", 0.2))
+    elif dist == "lognormal":
+        value = rng.lognormvariate(math.log(spec.get("median", 1.0)), spec.get("sigma", 0.5))
+    elif dist == "exponential":
+        value = rng.expovariate(1.0 / spec.get("mean", 1.0)) if spec.get("mean", 1.0) > 0 else 0.0
+    else:
+        value = spec.get("value", 0.0)
+    return max(0.0, value)
+
+
+def _tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+# ----- built-in replies -----
+
+_QUESTION_COUNT = re.compile(r"create (\d+) different questions")
+_FACT = re.compile(r"^([AB][12])\.(C|S)=(\w+)$", re.MULTILINE)
+_CANONICAL = re.compile(r"^([AB][12])\.C=(\w+|\?) \| \1\.S=(\w+|\?)$", re.MULTILINE)
+_QUORUM = re.compile(r"^([AB][12]\.[CS])=(\w+) quorum=(\d+) confidence=([\d.]+)$", re.MULTILINE)
+
+
+def decomposition_reply(prompt: str) -> Optional[str]:
+    m = _QUESTION_COUNT.search(prompt)
+    if not m or "JSON array" not in prompt:
+        return None
+    return json.dumps([f"Research question {i + 1} about the query" for i in range(int(m.group(1)))])
+
+
+def game_reply(prompt: str, rng: random.Random) -> Optional[str]:
+    """
+    A cooperative console game player working from the prompt alone: share private facts,
+    confirm canonical slots still short of quorum, and as the Closer propose the canonical
+    state once every quorum is met.
+    """
+    if "YOUR PRIVATE FACTS:" not in prompt:
+        return None
+    canonical = {}
+    for cell, color, shape in _CANONICAL.findall(prompt):
+        canonical[f"{cell}.C"] = color
+        canonical[f"{cell}.S"] = shape
+    if "FORCED_FINALIZATION" in prompt and "ROLE=Proposer/Closer" in prompt and "?" not in canonical.values():
+        proposal = {cell: {"Color": canonical[f"{cell}.C"], "Shape": canonical[f"{cell}.S"]}
+                    for cell in ("A1", "A2", "B1", "B2")}
+        return "PROPOSE=" + json.dumps(proposal, separators=(",", ":"))
+    facts_block = prompt.split("YOUR PRIVATE FACTS:", 1)[1].split("\n\n", 1)[0]
+    facts = {f"{cell}.{attr}": value for cell, attr, value in _FACT.findall(facts_block)}
+    parts = [f"{slot}={value}" for slot, value in facts.items() if canonical.get(slot) in (None, "?")][:3]
+    weak = [(slot, value) for slot, value, quorum, confidence in _QUORUM.findall(prompt)
+            if (int(quorum) < 2 or float(confidence) < 0.8) and facts.get(slot, value) == value]
+    rng.shuffle(weak)
+    parts += [f"CONFIRM {slot}={value}" for slot, value in weak[:3]]
+    return " | ".join(parts) or "SCHEMA OK"
+
+
+def generic_reply(prompt: str, tokens: int, rng: random.Random) -> str:
+    words = ["findings", "source", "analysis", "evidence", "trend", "estimate", "caveat", "result", "data", "impact"]
+    text = [f"Answer to: {prompt[:80].strip()}"]
+    while _tokens(" ".join(text)) < tokens:
+        text.append(rng.choice(words))
+    return " ".join(text)
+
+
+class FakeOpenRouter:
+    """The server; start() runs it on a background thread, set_profile() swaps settings live"""
+
+    def __init__(self, profile: Any = "instant", host: str = "127.0.0.1", port: int = 0):
+        self.profile = resolve_profile(profile)
+        self._lock = threading.Lock()
+        self._attempts: Dict[str, int] = {}
+        self._cache_blocks = set()
+        self.stats = self._empty_stats()
+        handler = type("Handler", (_Handler,), {"fake": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {"requests": 0, "streams": 0, "rate_limited": 0, "server_errors": 0, "tool_calls": 0,
+                "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def start(self) -> "FakeOpenRouter":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openrouter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def set_profile(self, profile: Any):
+        with self._lock:
+            self.profile = resolve_profile(profile)
+            self._attempts.clear()
+            self._cache_blocks.clear()
+            self.stats = self._empty_stats()
+
+    def count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    # ----- request handling -----
+
+    def settings_for(self, model: str) -> Dict[str, Any]:
+        return {**self.profile, **(self.profile.get("models") or {}).get(model, {})}
+
+    def rng_for(self, raw_body: bytes) -> random.Random:
+        """Seeded by the request body and how often that body was sent, so retries differ"""
+        digest = hashlib.sha1(raw_body).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return random.Random(f"{self.profile.get('seed', 0)}:{digest}:{attempt}")
+
+    def cached_tokens(self, prompt: str) -> int:
+        """Simulated provider prefix cache: full 1 KB blocks whose whole prefix was seen before"""
+        cached = 0
+        with self._lock:
+            for end in range(CACHE_BLOCK, len(prompt) + 1, CACHE_BLOCK):
+                key = hashlib.sha1(prompt[:end].encode("utf-8")).digest()
+                if key in self._cache_blocks:
+                    cached = end
+                else:
+                    self._cache_blocks.add(key)
+        return cached // CHARS_PER_TOKEN
+
+    def reply_for(self, request: Dict[str, Any], settings: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+        """The assistant message (content and tool_calls) for a request"""
+        messages = request.get("messages") or []
+        user_messages = [_content_text(m.get("content")) for m in messages if m.get("role") == "user"]
+        prompt = user_messages[-1] if user_messages else ""
+
+        for rule in settings.get("replies") or []:
+            if re.search(rule.get("match", ""), prompt):
+                reply = rule.get("reply", "")
+                if isinstance(reply, list):
+                    reply = reply[rng.randrange(len(reply))]
+                return {"content": reply, "tool_calls": rule.get("tool_calls") or []}
+
+        content = decomposition_reply(prompt) or game_reply(prompt, rng) or \
+            generic_reply(prompt, settings["answer_tokens"], rng)
+        tool_names = {t.get("function", {}).get("name") for t in request.get("tools") or []}
+        script = [name for name in settings.get("tool_calls") or [] if name in tool_names]
+        tool_calls = []
+        if script:
+            iteration = sum(1 for m in messages if m.get("role") == "assistant")
+            name = script[min(iteration, len(script) - 1)]
+            arguments = (settings.get("tool_arguments") or {}).get(name)
+            if arguments is None and name == "mark_task_complete":
+                arguments = {"task_summary": "Answered the question", "completion_message": "Done"}
+            tool_calls.append({
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments or {})},
+            })
+        return {"content": content, "tool_calls": tool_calls}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake: FakeOpenRouter
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            with self.fake._lock:
+                stats = dict(self.fake.stats)
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            request = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+
+        fake = self.fake
+        model = request.get("model") or "fake/model"
+        settings = fake.settings_for(model)
+        rng = fake.rng_for(raw)
+        scale = settings.get("time_scale", 1.0)
+        fake.count(requests=1)
+
+        roll = rng.random()
+        if roll < settings.get("error_rate_429", 0.0):
+            fake.count(rate_limited=1)
+            time.sleep(0.05 * scale)
+            self._send_json(429, {"error": {"message": "Rate limit exceeded", "code": 429}},
+                            {"Retry-After": f"{settings.get('retry_after', 1) * scale:g}"})
+            return
+        if roll < settings.get("error_rate_429", 0.0) + settings.get("error_rate_5xx", 0.0):
+            fake.count(server_errors=1)
+            status = rng.choice([500, 502, 503])
+            time.sleep(sample_latency(settings["latency"], rng) * scale)
+            self._send_json(status, {"error": {"message": "Upstream provider error", "code": status}})
+            return
+
+        message = fake.reply_for(request, settings, rng)
+        prompt_text = "".join(_content_text(m.get("content")) for m in request.get("messages") or []) + \
+            json.dumps(request.get("tools") or [])
+        usage = {
+            "prompt_tokens": _tokens(prompt_text),
+            "completion_tokens": _tokens(message["content"]) + sum(
+                _tokens(c["function"]["arguments"]) for c in message["tool_calls"]),
+            "prompt_tokens_details": {"cached_tokens": fake.cached_tokens(prompt_text)},
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        fake.count(prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"],
+                   cached_tokens=usage["prompt_tokens_details"]["cached_tokens"],
+                   tool_calls=len(message["tool_calls"]))
+
+        ttft = sample_latency(settings["latency"], rng) * scale
+        tps = settings.get("tokens_per_second") or 0
+        per_token = scale / tps if tps > 0 else 0.0
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if request.get("stream"):
+            fake.count(streams=1)
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            self._stream(completion_id, created, model, message, usage if include_usage else None, ttft, per_token)
+            return
+
+        time.sleep(ttft + per_token * usage["completion_tokens"])
+        assistant = {"role": "assistant", "content": message["content"]}
+        if message["tool_calls"]:
+            assistant["tool_calls"] = message["tool_calls"]
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": assistant,
+                         "finish_reason": "tool_calls" if message["tool_calls"] else "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id, created, model, message, usage, ttft, per_token):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None, chunk_usage=None, choices=True):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else []}
+            if chunk_usage is not None:
+                chunk["usage"] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            time.sleep(ttft)
+            event({"role": "assistant", "content": ""})
+            content = message["content"]
+            for i in range(0, len(content), CHARS_PER_TOKEN):
+                time.sleep(per_token)
+                event({"content": content[i:i + CHARS_PER_TOKEN]})
+            for index, call in enumerate(message["tool_calls"]):
+                arguments = call["function"]["arguments"]
+                event({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                       "function": {"name": call["function"]["name"], "arguments": ""}}]})
+                for i in range(0, len(arguments), 4 * CHARS_PER_TOKEN):
+                    time.sleep(per_token * 4)
+                    event({"tool_calls": [{"index": index, "function": {"arguments": arguments[i:i + 4 * CHARS_PER_TOKEN]}}]})
+            event({}, finish_reason="tool_calls" if message["tool_calls"] else "stop")
+            if usage is not None:
+                event(None, chunk_usage=usage, choices=False)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away (e.g. a cancelled hedge); nothing left to do
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", default="realistic", help=f"preset ({', '.join(PROFILES)}) or JSON file")
+    args = parser.parse_args()
+
+    fake = FakeOpenRouter(args.profile, host=args.host, port=args.port)
+    print(f"Fake OpenRouter on {fake.url} (profile: {args.profile}); Ctrl+C to stop")
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Record/replay of LLM traffic.
+
+In record mode every completed chat completion is appended to a JSONL cassette: the
+request key (llm_cache.make_key), the model, the observed latency and the response. In
+replay mode the cassette is loaded once and requests are answered from it, at the
+recorded latency or immediately, without touching the network, the scheduler or the
+response cache. Identical requests are served from a per-key FIFO in recording order, so
+a game that sends the same prompt twice gets both recorded answers back.
+"""
+import os
+import json
+import threading
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from llm_cache import json_default
+
+MODES = ("off", "record", "replay")
+
+
+class Cassette:
+    """One JSONL cassette in record or replay mode, shared by every agent of the process"""
+
+    def __init__(self, path: str, mode: str = "replay", latency: str = "recorded",
+                 on_miss: str = "live", store_requests: bool = False):
+        if mode not in MODES[1:]:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.on_miss = on_miss
+        self.store_requests = store_requests
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Deque[dict]] = defaultdict(deque)
+        self._drained = set()  # Keys whose last answer has been served at least once
+        self._counters = {"recorded": 0, "replayed": 0, "misses": 0, "exhausted": 0}
+        self._fd = None
+
+        if mode == "replay":
+            self._load()
+        else:
+            parent = os.path.dirname(os.path.abspath(path))
+            os.makedirs(parent, exist_ok=True)
+            # O_APPEND keeps whole lines intact when several processes record into one file
+            self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial last line from an interrupted recording
+                    continue
+                self._entries[entry["key"]].append(entry)
+
+    def record(self, key: str, request: Dict[str, Any], response: Dict[str, Any], latency: float):
+        """Append one request/response pair (no-op when replaying)"""
+        if self.mode != "record":
+            return
+        entry = {"key": key, "model": request.get("model"), "latency": round(latency, 4), "response": response}
+        if self.store_requests:
+            entry["request"] = request
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False, default=json_default) + "\n"
+        with self._lock:
+            os.write(self._fd, line.encode("utf-8"))
+            self._counters["recorded"] += 1
+
+    def replay(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        (response, delay in seconds) for the next recorded answer to key, or None when the
+        cassette has none (or is recording). Once a key's answers are used up its last one
+        is repeated.
+        """
+        if self.mode != "replay":
+            return None
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self._counters["misses"] += 1
+                return None
+            if len(entries) > 1:
+                entry = entries.popleft()
+            else:
+                entry = entries[0]
+                if key in self._drained:
+                    self._counters["exhausted"] += 1
+                self._drained.add(key)
+            self._counters["replayed"] += 1
+        delay = entry.get("latency", 0.0) if self.latency == "recorded" else 0.0
+        return entry["response"], delay
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"path": self.path, "mode": self.mode, "keys": len(self._entries), **self._counters}
+
+
+_cassettes: Dict[Tuple, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(config: dict) -> Optional[Cassette]:
+    """Process-wide cassette for the `cassette` config section, or None when mode is off"""
+    cassette_config = config.get('cassette') or {}
+    mode = cassette_config.get('mode', 'off') or 'off'
+    if mode == 'off':
+        return None
+    settings = (
+        cassette_config.get('path', '.cache/cassette.jsonl'),
+        mode,
+        cassette_config.get('latency', 'recorded'),
+        cassette_config.get('on_miss', 'live'),
+        bool(cassette_config.get('store_requests', False)),
+    )
+    with _cassettes_lock:
+        cassette = _cassettes.get(settings)
+        if cassette is None:
+            cassette = _cassettes[settings] = Cassette(*settings)
+        return cassette
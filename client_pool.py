@@ -0,0 +1,216 @@
+"""
+Process-wide shared resources for OpenRouter agents.
+
+Every orchestrator phase (decomposition, parallel agents, synthesis) and every
+concurrent query used to build its own OpenAI client, re-read config.yaml and
+re-run tool discovery. This module keeps one parsed config per file, one tool
+registry per config and one keep-alive HTTP connection pool per
+(base_url, api_key), so all agents in the process share warm connections.
+"""
+import os
+import copy
+import json
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import yaml
+from openai import OpenAI, AsyncOpenAI
+
+from tools import discover_tools
+
+_lock = threading.Lock()
+_configs: Dict[str, Tuple[float, dict]] = {}
+_tool_registries: Dict[str, dict] = {}
+_clients: Dict[Tuple[str, str], OpenAI] = {}
+# Async HTTP connections are bound to the event loop that opened them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+_counters = {"config_loads": 0, "tool_discoveries": 0, "clients_created": 0, "client_reuses": 0}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def load_config(config_path: str = "config.yaml") -> dict:
+    """Return the parsed config, re-reading the file only when its mtime changes.
+    The returned dict is shared between callers and must be treated as read-only."""
+    key = os.path.abspath(config_path)
+    mtime = os.path.getmtime(key)
+    with _lock:
+        cached = _configs.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    with _lock:
+        _configs[key] = (mtime, config)
+        _counters["config_loads"] += 1
+    return config
+
+
+def _config_key(config: dict) -> str:
+    """Canonical JSON of a config, so equal configs (e.g. the same overrides applied twice) share a key"""
+    return json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def get_tools(config: dict, silent: bool = False) -> dict:
+    """Discover tools once per distinct config and share the instances between agents"""
+    key = _config_key(config)
+    with _lock:
+        cached = _tool_registries.get(key)
+        if cached is not None:
+            return cached
+    tools = discover_tools(config, silent=silent)
+    with _lock:
+        tools = _tool_registries.setdefault(key, tools)
+        _counters["tool_discoveries"] += 1
+    return tools
+
+
+def _pool_settings(config: dict) -> dict:
+    pool_config = config.get('openrouter', {}).get('connection_pool', {}) or {}
+    return {
+        "http2": pool_config.get('http2', True) and _http2_available(),
+        "limits": httpx.Limits(
+            max_connections=pool_config.get('max_connections', 100),
+            max_keepalive_connections=pool_config.get('max_keepalive_connections', 20),
+            keepalive_expiry=pool_config.get('keepalive_expiry', 30.0),
+        ),
+    }
+
+
+def _client_key(config: dict) -> Tuple[str, str]:
+    return (config['openrouter']['base_url'], config['openrouter']['api_key'])
+
+
+def get_client(config: dict) -> OpenAI:
+    """Shared sync client for this OpenRouter endpoint"""
+    key = _client_key(config)
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _counters["client_reuses"] += 1
+            return client
+        settings = _pool_settings(config)
+        client = OpenAI(
+            base_url=key[0],
+            api_key=key[1],
+            # Retries go through call_llm, so the scheduler sees every 429 and releases its lease
+            max_retries=0,
+            http_client=httpx.Client(http2=settings["http2"], limits=settings["limits"]),
+        )
+        _clients[key] = client
+        _counters["clients_created"] += 1
+        return client
+
+
+def get_async_client(config: dict) -> AsyncOpenAI:
+    """Shared async client for this endpoint and the running event loop.
+    Outside a running loop an unshared client is returned."""
+    key = _client_key(config)
+    settings = _pool_settings(config)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _lock:
+        per_loop = _async_clients.setdefault(loop, {}) if loop is not None else {}
+        client = per_loop.get(key)
+        if client is not None:
+            _counters["client_reuses"] += 1
+            return client
+        client = AsyncOpenAI(
+            base_url=key[0],
+            api_key=key[1],
+            # Retries go through call_llm, so the scheduler sees every 429 and releases its lease
+            max_retries=0,
+            http_client=httpx.AsyncClient(http2=settings["http2"], limits=settings["limits"]),
+        )
+        per_loop[key] = client
+        _counters["clients_created"] += 1
+        return client
+
+
+def _connection_stats(http_client: Any) -> Dict[str, int]:
+    """Count open/idle connections of an httpx client (relies on httpcore internals)"""
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", None) or [])
+    open_connections = [c for c in connections if not c.is_closed()]
+    idle = sum(1 for c in open_connections if c.is_idle())
+    return {"open": len(open_connections), "idle": idle, "active": len(open_connections) - idle}
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Snapshot of shared clients and their connection pools"""
+    with _lock:
+        sync_clients = list(_clients.items())
+        async_clients = [item for per_loop in _async_clients.values() for item in per_loop.items()]
+        stats: Dict[str, Any] = dict(_counters)
+    endpoints = []
+    totals = {"open": 0, "idle": 0, "active": 0}
+    for kind, items in (("sync", sync_clients), ("async", async_clients)):
+        for (base_url, _api_key), client in items:
+            conn = _connection_stats(getattr(client, "_client", None))
+            endpoints.append({"kind": kind, "base_url": base_url, **conn})
+            for k in totals:
+                totals[k] += conn[k]
+    stats["endpoints"] = endpoints
+    stats["connections"] = totals
+    return stats
+
+
+def close_all():
+    """Close every shared sync connection pool (async pools close with their event loop)"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def apply_overrides(config: dict, overrides: Optional[Dict[str, Any]]) -> dict:
+    """Copy of config with dotted-key overrides applied, e.g. {"openrouter.model1": "x/y"}.
+    Returns config itself when there is nothing to override."""
+    if not overrides:
+        return config
+    config = copy.deepcopy(config)
+    for dotted_key, value in overrides.items():
+        section = config
+        *parents, leaf = dotted_key.split(".")
+        for part in parents:
+            section = section.setdefault(part, {})
+        section[leaf] = value
+    return config
+
+
+def create_agent(config_path: str = "config.yaml", silent: bool = True, asynchronous: bool = False,
+                 with_tools: bool = True, exclude_tools: Optional[Tuple[str, ...]] = None,
+                 phase: Optional[str] = None, query_id: Optional[str] = None,
+                 config_overrides: Optional[Dict[str, Any]] = None):
+    """Reusable agent factory backed by the shared config, tool registry and clients.
+
+    with_tools=False builds a tool-less agent (e.g. for synthesis); exclude_tools drops
+    specific tools such as mark_task_complete. phase/query_id label the agent's LLM calls
+    in the metrics recorder. config_overrides (dotted keys) apply to this agent only.
+    """
+    from agent import OpenRouterAgent, AsyncOpenRouterAgent
+
+    agent_cls = AsyncOpenRouterAgent if asynchronous else OpenRouterAgent
+    agent = agent_cls(config_path=config_path, silent=silent, config_overrides=config_overrides)
+    if phase is not None:
+        agent.phase = phase
+    agent.query_id = query_id
+    if not with_tools:
+        agent.tools = []
+        agent.tool_mapping = {}
+    elif exclude_tools:
+        agent.tools = [tool for tool in agent.tools if tool.get('function', {}).get('name') not in exclude_tools]
+        agent.tool_mapping = {name: func for name, func in agent.tool_mapping.items() if name not in exclude_tools}
+    return agent
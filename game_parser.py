@@ -0,0 +1,155 @@
+"""
+Single-pass parser for console game replies.
+
+One precompiled scanner walks a reply once and collects everything the game reacts to:
+slot claims and CONFIRMs, the [OK] rows of a TABLE, a PREPARE_PROPOSAL payload and a
+PROPOSE= payload. Values are canonicalized with precomputed lookup tables built from the
+environment's enums and typo aliases.
+
+Results match MultiAgentConsoleGame._parse_claims_and_confirms, _parse_table_update,
+_detect_prepare_candidate and InfoSharingEnvironment.is_valid_proposal exactly
+(benchmarks/bench_game_parser.py fuzzes that parity).
+"""
+import re
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Every kind is a lookahead, so matches of different kinds may overlap (a CONFIRM also
+# yields the CLAIM inside it), as they did with one finditer per kind. The kinds start
+# with different characters, so at most one alternative matches at a position, and the
+# leading character class lets the engine skip every other position cheaply.
+_SCANNER = re.compile(
+    r"(?=[ABCcPpT])(?="
+    r"(?P<confirm>(?i:\bCONFIRM\s+([AB][12])\.(C|S)\s*=\s*([A-Za-z]+)))"
+    r"|(?P<claim>\b([AB][12])\.(C|S)\s*=\s*([A-Za-z]+))"
+    r"|(?P<prepare>(?i:\bPREPARE[-_ ]?PROPOSAL))"
+    r"|(?P<table>TABLE:)"
+    r"|(?P<propose>PROPOSE=)"
+    r")"
+)
+
+# One row per comma/newline separated part of a TABLE (the first row in each part), as
+# splitting the table on [,\n]+ and searching every part did
+_TABLE_ROW = re.compile(
+    r"(?:\A|(?<=[,\n]))[^,\n]*?\b([AB][12])\.(C|S)[^\S\n]*=[^\S\n]*([A-Za-z]+)[^\S\n]*\[(OK|UNK|REVISE)\]",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class TurnRecord:
+    """Everything the game extracts from one reply"""
+    claims: List[Tuple[str, str, str]] = field(default_factory=list)  # ("CONFIRM" | "CLAIM", slot, value), CONFIRMs first
+    table: List[Tuple[str, str]] = field(default_factory=list)  # (slot, value) of TABLE rows marked [OK], in order
+    prepare: Optional[Dict[str, Any]] = None  # PREPARE_PROPOSAL JSON payload, canonicalized
+    proposal: Optional[Dict[str, Any]] = None  # Valid PROPOSE= JSON, canonicalized
+    has_propose: bool = False  # "PROPOSE=" present, so a None proposal means a malformed one
+
+
+class TurnParser:
+    def __init__(self, env):
+        self.cells = list(env.CELLS)
+        self._colors = {**{c: c for c in env.COLORS}, **env.color_alias}
+        self._shapes = {**{s: s for s in env.SHAPES}, **env.shape_alias}
+        self._by_attr = {"C": self._colors, "S": self._shapes}
+
+    def parse(self, text: str) -> TurnRecord:
+        record = TurnRecord()
+        if not text:
+            return record
+        confirms = []
+        claims = []
+        confirm_end = claim_end = 0
+        prepare = False
+        table_at = propose_at = -1
+        for m in _SCANNER.finditer(text):
+            start = m.start()
+            kind = m.lastgroup
+            if kind == "confirm":
+                # Non-overlapping within a kind, like finditer over the kind's own pattern
+                if start < confirm_end:
+                    continue
+                confirm_end = m.end("confirm")
+                cell, attr, value = m.group(2, 3, 4)
+                attr = attr.upper()
+                canon = self._by_attr[attr].get(value.capitalize())
+                if canon:
+                    confirms.append(("CONFIRM", f"{cell.upper()}.{attr}", canon))
+            elif kind == "claim":
+                if start < claim_end:
+                    continue
+                claim_end = m.end("claim")
+                cell, attr, value = m.group(6, 7, 8)
+                canon = self._by_attr[attr].get(value.capitalize())
+                if canon:
+                    claims.append(("CLAIM", f"{cell}.{attr}", canon))
+            elif kind == "prepare":
+                prepare = True
+            elif kind == "table":
+                if table_at < 0:
+                    table_at = m.end("table")
+            elif propose_at < 0:
+                propose_at = m.end("propose")
+        record.claims = confirms + claims
+
+        if table_at >= 0:
+            for row in _TABLE_ROW.finditer(text[table_at:]):
+                cell, attr, value, status = row.groups()
+                attr = attr.upper()
+                canon = self._by_attr[attr].get(value.capitalize())
+                if canon and status.upper() == "OK":
+                    record.table.append((f"{cell.upper()}.{attr}", canon))
+
+        if prepare:
+            record.prepare = self._prepare_payload(text)
+        if propose_at >= 0:
+            record.has_propose = True
+            record.proposal = self._proposal_payload(text[propose_at:])
+        return record
+
+    def parse_proposal(self, text: str) -> Optional[Dict[str, Any]]:
+        """Valid, canonicalized PROPOSE= payload of text, or None"""
+        idx = text.find("PROPOSE=")
+        if idx == -1:
+            return None
+        return self._proposal_payload(text[idx + len("PROPOSE="):])
+
+    def _prepare_payload(self, text: str) -> Optional[Dict[str, Any]]:
+        # Outermost braces, as a greedy DOTALL \{.*\} search
+        start = text.find("{")
+        end = text.rfind("}")
+        if start == -1 or end < start:
+            return None
+        try:
+            obj = json.loads(text[start:end + 1])
+        except Exception:
+            return None
+        try:
+            for cell in self.cells:
+                if cell in obj and isinstance(obj[cell], dict):
+                    color = obj[cell].get("Color")
+                    shape = obj[cell].get("Shape")
+                    obj[cell]["Color"] = self._colors.get(color) or color
+                    obj[cell]["Shape"] = self._shapes.get(shape) or shape
+        except Exception:
+            pass
+        return obj
+
+    def _proposal_payload(self, payload: str) -> Optional[Dict[str, Any]]:
+        try:
+            obj = json.loads(payload.strip())
+        except Exception:
+            return None
+        if not isinstance(obj, dict):
+            return None
+        for cell in self.cells:
+            if cell not in obj or not isinstance(obj[cell], dict):
+                return None
+            if "Color" not in obj[cell] or "Shape" not in obj[cell]:
+                return None
+            color = obj[cell].get("Color")
+            shape = obj[cell].get("Shape")
+            obj[cell]["Color"] = self._colors.get(color) or color
+            obj[cell]["Shape"] = self._shapes.get(shape) or shape
+        return obj
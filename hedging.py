@@ -0,0 +1,128 @@
+"""
+Online per-model latency tracking and hedged-request policy.
+
+Every chat completion's latency is recorded in a per-model log-bucketed histogram.
+When hedging is enabled, a request that has not answered within its model's observed
+p90 (configurable quantile) is fired again at the fastest other model from
+model1..model4, and whichever answers first wins.
+"""
+import bisect
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class LatencyHistogram:
+    """Log-spaced latency histogram; counts are halved past max_count so it follows drift."""
+
+    def __init__(self, min_seconds: float = 0.05, max_seconds: float = 600.0, growth: float = 1.25,
+                 max_count: int = 2000):
+        self.bounds: List[float] = []
+        bound = min_seconds
+        while bound < max_seconds:
+            self.bounds.append(bound)
+            bound *= growth
+        self.bounds.append(max_seconds)
+        self.counts = [0.0] * (len(self.bounds) + 1)
+        self.count = 0.0
+        self.max_count = max_count
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        if self.count > self.max_count:
+            self.counts = [c / 2 for c in self.counts]
+            self.count /= 2
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile, or None without samples"""
+        if self.count <= 0:
+            return None
+        target = q * self.count
+        seen = 0.0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return self.bounds[min(i, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+
+class LatencyTracker:
+    """Thread-safe per-model histograms plus hedging counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.counters = {"hedges": 0, "hedge_wins": 0}
+
+    def observe(self, model: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(model)
+            if histogram is None:
+                histogram = self._histograms[model] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def quantile(self, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            histogram = self._histograms.get(model)
+            if histogram is None or histogram.count < min_samples:
+                return None
+            return histogram.quantile(q)
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {
+                model: {
+                    "samples": int(h.count),
+                    "p50": h.quantile(0.5),
+                    "p90": h.quantile(0.9),
+                    "p99": h.quantile(0.99),
+                }
+                for model, h in self._histograms.items()
+            }
+            return {"models": models, **self.counters}
+
+
+_tracker = LatencyTracker()
+
+
+def get_tracker() -> LatencyTracker:
+    return _tracker
+
+
+def hedge_settings(config: dict) -> Dict[str, Any]:
+    hedge_config = config['openrouter'].get('hedging') or {}
+    return {
+        "enabled": bool(hedge_config.get('enabled', False)),
+        "quantile": float(hedge_config.get('quantile', 0.9)),
+        "min_samples": int(hedge_config.get('min_samples', 5)),
+        "default_delay": float(hedge_config.get('default_delay', 10.0)),
+        "models": hedge_config.get('models'),
+    }
+
+
+def hedge_plan(config: dict, model: str) -> Optional[tuple]:
+    """
+    (delay_seconds, secondary_model) for a request to `model`, or None when hedging is off
+    or there is no other model. The secondary is the candidate with the lowest observed
+    quantile latency; models without enough samples are tried in config order after those.
+    """
+    settings = hedge_settings(config)
+    if not settings["enabled"]:
+        return None
+    openrouter = config['openrouter']
+    pool = settings["models"] or [openrouter.get(f"model{i}") for i in range(1, 5)]
+    candidates = [m for m in dict.fromkeys(pool) if m and m != model]
+    if not candidates:
+        return None
+
+    def expected(candidate):
+        observed = _tracker.quantile(candidate, settings["quantile"], settings["min_samples"])
+        return (observed is None, observed or 0.0)
+
+    secondary = min(candidates, key=expected)
+    delay = _tracker.quantile(model, settings["quantile"], settings["min_samples"])
+    return (settings["default_delay"] if delay is None else delay), secondary
@@ -0,0 +1,232 @@
+"""
+Content-addressed cache for chat completion responses.
+
+Responses are keyed by a hash of everything that determines the model output
+(model, messages, tools schema, sampling/provider params). Lookups go through an
+in-memory LRU tier first and an optional on-disk SQLite tier second; both tiers
+honour a per-entry TTL and a size cap. The cache is shared by all threads of the
+orchestrator and, through SQLite, by separate processes using the same file.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Keys that do not influence the model output
+_NON_SEMANTIC_KEYS = ("stream", "stream_options", "timeout")
+
+
+def json_default(obj: Any):
+    """Serialize SDK objects (pydantic models) appearing in message histories"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "__dict__"):
+        return vars(obj)
+    return str(obj)
+
+
+def make_key(request: Dict[str, Any]) -> str:
+    """Stable SHA-256 key for a chat completion request"""
+    semantic = {k: v for k, v in request.items() if k not in _NON_SEMANTIC_KEYS}
+    canonical = json.dumps(semantic, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=json_default)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) response cache with TTL, size-based eviction and counters."""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 86400.0,
+                 max_memory_entries: int = 512, max_memory_bytes: int = 64 * 1024 * 1024,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, size, value)
+        self._memory: "OrderedDict[str, Tuple[float, int, dict]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._local = threading.local()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if self.path:
+            parent = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(parent, exist_ok=True)
+            conn = self._conn()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+            conn.commit()
+
+    # ----- SQLite tier -----
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets other processes read while we write"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, bytes]]:
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        blob, expires_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            conn.commit()
+            with self._lock:
+                self._counters["expired"] += 1
+            return None
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return expires_at, blob
+
+    def _disk_set(self, key: str, blob: bytes, expires_at: float, now: float):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), expires_at, now),
+        )
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        while total > self.max_disk_bytes:
+            # Evict least recently used entries in small batches
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 32").fetchall()
+            if not rows:
+                break
+            for row_key, size in rows:
+                conn.execute("DELETE FROM responses WHERE key = ?", (row_key,))
+                total -= size
+                evicted += 1
+                if total <= self.max_disk_bytes:
+                    break
+        conn.commit()
+        if evicted:
+            with self._lock:
+                self._counters["disk_evictions"] += evicted
+
+    # ----- memory tier -----
+
+    def _memory_put(self, key: str, value: dict, size: int, expires_at: float):
+        """Insert into the LRU; caller holds the lock"""
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[1]
+        self._memory[key] = (expires_at, size, value)
+        self._memory_bytes += size
+        while self._memory and (len(self._memory) > self.max_memory_entries or self._memory_bytes > self.max_memory_bytes):
+            _, (_, evicted_size, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._counters["memory_evictions"] += 1
+
+    # ----- public API -----
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached response dict, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return entry[2]
+                self._memory.pop(key)
+                self._memory_bytes -= entry[1]
+                self._counters["expired"] += 1
+
+        if self.path:
+            found = self._disk_get(key, now)
+            if found is not None:
+                expires_at, blob = found
+                value = json.loads(zlib.decompress(blob))
+                with self._lock:
+                    self._memory_put(key, value, len(blob), expires_at)
+                    self._counters["disk_hits"] += 1
+                return value
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def set(self, key: str, value: dict, ttl: Optional[float] = None):
+        """Store a JSON-serializable response dict"""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        blob = zlib.compress(json.dumps(value, separators=(",", ":"), default=json_default).encode("utf-8"))
+        with self._lock:
+            self._memory_put(key, value, len(blob), expires_at)
+            self._counters["stores"] += 1
+        if self.path:
+            self._disk_set(key, blob, expires_at, now)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.path:
+            conn = self._conn()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        if self.path:
+            row = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            stats["disk_entries"], stats["disk_bytes"] = row
+        return stats
+
+
+_caches: Dict[Tuple, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(config: dict) -> Optional[ResponseCache]:
+    """Process-wide cache for the `cache` config section, or None when caching is disabled"""
+    cache_config = config.get('cache') or {}
+    if not cache_config.get('enabled', False):
+        return None
+    settings = (
+        cache_config.get('path'),
+        float(cache_config.get('ttl', 86400)),
+        int(cache_config.get('max_memory_entries', 512)),
+        int(cache_config.get('max_memory_mb', 64)) * 1024 * 1024,
+        int(cache_config.get('max_disk_mb', 256)) * 1024 * 1024,
+    )
+    with _caches_lock:
+        cache = _caches.get(settings)
+        if cache is None:
+            cache = ResponseCache(*settings)
+            _caches[settings] = cache
+        return cache
@@ -1,12 +1,29 @@
+import os
+import sys
+import json
 import time
+import asyncio
+import hashlib
+import argparse
 import threading
-import sys
 from orchestrator import TaskOrchestrator
+from client_pool import load_config
+import metrics
+import scheduler
+from tools import tool_cache_stats
+
+
+def tool_cache_line():
+    """Per-tool hit rates of the tool-result cache, or "" before any cacheable call"""
+    parts = [f"{name} {stats['hits']}/{stats['hits'] + stats['misses']} ({stats['hit_rate']:.0%})"
+             for name, stats in tool_cache_stats().items() if stats['hits'] + stats['misses']]
+    return f"Tool cache hits: {', '.join(parts)}" if parts else ""
+
 
 class OrchestratorCLI:
     
-    def __init__(self):
-        self.orchestrator = TaskOrchestrator()
+    def __init__(self, config_path="config.yaml"):
+        self.orchestrator = TaskOrchestrator(config_path)
         self.start_time = None
         self.running = False
         
@@ -103,7 +120,7 @@ class OrchestratorCLI:
             time.sleep(1.0)  # Update every 1 second (reduced flicker)
     
     def run_task(self, user_input):
-        """Run orchestrator task with live progress display"""
+        """Run orchestrator task with live progress display, streaming the final synthesis"""
         self.start_time = time.time()
         self.running = True
         
@@ -111,30 +128,51 @@ class OrchestratorCLI:
         progress_thread = threading.Thread(target=self.progress_monitor, daemon=True)
         progress_thread.start()
         
+        result = None
         try:
-            # Run the orchestrator
-            result = self.orchestrator.orchestrate(user_input)
+            # Run the orchestrator, printing synthesis chunks as soon as they arrive
+            for event in self.orchestrator.orchestrate_stream(user_input):
+                if event["type"] == "synthesis_delta":
+                    if self.running:
+                        # Stop progress monitoring before the answer starts
+                        self.running = False
+                        progress_thread.join(timeout=2.0)
+                        
+                        # Final display update
+                        self.update_display()
+                        
+                        print("=" * 80)
+                        print("FINAL RESULTS")
+                        print("=" * 80)
+                        print()
+                    sys.stdout.write(event["delta"])
+                    sys.stdout.flush()
+                elif event["type"] == "final":
+                    result = event["content"]
+                elif event["type"] == "late_delta":
+                    # Incremental aggregation: an agent that missed the quorum added something
+                    print(f"\n\n[UPDATE from agent {event['agent_id'] + 1}]\n")
+                    sys.stdout.write(event["delta"])
+                    sys.stdout.flush()
+                    result = f"{result}\n\n{event['delta']}"
             
-            # Stop progress monitoring
-            self.running = False
-            
-            # Final display update
-            self.update_display()
-            
-            # Show results
-            print("=" * 80)
-            print("FINAL RESULTS")
-            print("=" * 80)
             print()
-            print(result)
             print()
             print("=" * 80)
             
+            usage = self.orchestrator.query_metrics().get("total", {})
+            if usage:
+                print(f"Tokens: {usage['prompt_tokens']} prompt ({usage['cached_prompt_tokens']} from provider cache) / "
+                      f"{usage['completion_tokens']} completion across {usage['calls']} LLM calls")
+            if tool_cache_line():
+                print(tool_cache_line())
+            
             return result
             
         except Exception as e:
-            self.running = False
-            self.update_display()
+            if self.running:
+                self.running = False
+                self.update_display()
             print(f"\nError during orchestration: {str(e)}")
             return None
     
@@ -186,9 +224,168 @@ class OrchestratorCLI:
                 print(f"Error: {e}")
                 print("Please try again or type 'quit' to exit.")
 
+class BatchRunner:
+    """
+    Run a JSONL file of queries through concurrent orchestrations.
+
+    Each input line is {"id": ..., "query": ...} (id optional) or a plain line of text.
+    Results are appended to the output JSONL as each query finishes, so a crashed run
+    resumes by skipping ids already answered successfully.
+    """
+    
+    def __init__(self, config_path="config.yaml", concurrency=None, max_in_flight=None):
+        self.config_path = config_path
+        self.config = load_config(config_path)
+        batch_config = self.config.get('batch', {})
+        self.concurrency = concurrency or batch_config.get('concurrency', 8)
+        max_in_flight = max_in_flight or batch_config.get('max_in_flight')
+        if max_in_flight:
+            if not scheduler.scheduler_settings(self.config)["enabled"]:
+                # The scheduler is what enforces the cap, so a batch with a cap always runs one
+                sys.stderr.write(f"Warning: scheduler.enabled is false in {config_path}; enabling the scheduler "
+                                 f"for this batch to cap in-flight LLM requests at {max_in_flight}\n")
+                scheduler.force_enable()
+            # Global cap on LLM requests across all concurrent orchestrations
+            scheduler.get_scheduler(self.config).set_max_in_flight(max_in_flight)
+        self.metrics = metrics.get_recorder()
+    
+    @staticmethod
+    def read_queries(lines):
+        """
+        Parse input lines into (id, query) pairs. Ids default to a hash of the line number and
+        the query, so repeated queries stay separate results while a rerun on the same file
+        still recognizes the finished ones.
+        """
+        queries = []
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                item = line
+            if isinstance(item, dict):
+                query = item.get('query') or item.get('input') or ""
+                query_id = item.get('id')
+            else:
+                query, query_id = str(item), None
+            if not query:
+                continue
+            if query_id is None:
+                query_id = hashlib.sha1(f"{line_no}:{query}".encode("utf-8")).hexdigest()[:16]
+            queries.append((str(query_id), query))
+        return queries
+    
+    @staticmethod
+    def completed_ids(output_path):
+        """Ids already answered successfully in the output file (checkpoint)"""
+        done = set()
+        if not os.path.exists(output_path):
+            return done
+        with open(output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial last line from a crash
+                    continue
+                if record.get('status') == 'ok':
+                    done.add(str(record.get('id')))
+        return done
+    
+    async def _run_query(self, query_id, query):
+        orchestrator = TaskOrchestrator(config_path=self.config_path, silent=True)
+        started = time.monotonic()
+        try:
+            result = await orchestrator.aorchestrate(query)
+            status, error = "ok", None
+        except Exception as e:
+            result, status, error = None, "error", str(e)
+        usage = orchestrator.query_metrics().get("total", {}) if orchestrator.query_id else {}
+        return {
+            "id": query_id,
+            "query": query,
+            "status": status,
+            "result": result,
+            "error": error,
+            "elapsed": round(time.monotonic() - started, 3),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "cached_prompt_tokens": usage.get("cached_prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+        }
+    
+    def _report(self, finished, total, started, tokens_before):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        totals = self.metrics.summary()["total"]
+        tokens = totals["prompt_tokens"] + totals["completion_tokens"] - tokens_before
+        sys.stderr.write(f"\r[{finished}/{total}] {finished / elapsed * 60:.1f} queries/min, "
+                         f"{tokens / elapsed:.0f} tokens/s")
+        sys.stderr.flush()
+    
+    async def run(self, queries, output_path):
+        done = self.completed_ids(output_path)
+        todo = [(query_id, query) for query_id, query in queries if query_id not in done]
+        sys.stderr.write(f"{len(queries)} queries, {len(queries) - len(todo)} already done, "
+                         f"{len(todo)} to run with concurrency {self.concurrency}\n")
+        if not todo:
+            return
+        
+        queue = asyncio.Queue()
+        for item in todo:
+            queue.put_nowait(item)
+        started = time.monotonic()
+        totals = self.metrics.summary()["total"]
+        tokens_before = totals["prompt_tokens"] + totals["completion_tokens"]
+        finished = 0
+        failed = 0
+        
+        with open(output_path, 'a', encoding='utf-8') as out:
+            async def worker():
+                nonlocal finished, failed
+                while True:
+                    try:
+                        query_id, query = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    record = await self._run_query(query_id, query)
+                    # One complete line per query, flushed immediately, is the checkpoint
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    finished += 1
+                    failed += record["status"] != "ok"
+                    self._report(finished, len(todo), started, tokens_before)
+            
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(todo)))))
+        
+        sys.stderr.write(f"\nDone: {finished - failed} ok, {failed} failed in {time.monotonic() - started:.1f}s\n")
+        if tool_cache_line():
+            sys.stderr.write(tool_cache_line() + "\n")
+
+
 def main():
     """Main entry point for the orchestrator CLI"""
-    cli = OrchestratorCLI()
+    parser = argparse.ArgumentParser(description="Multi-agent orchestrator")
+    parser.add_argument("--batch", metavar="QUERIES_JSONL",
+                        help="run queries from a JSONL file ('-' for stdin) instead of the interactive CLI")
+    parser.add_argument("--output", default="results.jsonl", help="batch results JSONL (appended; used to resume)")
+    parser.add_argument("--concurrency", type=int, help="concurrent queries (default: batch.concurrency)")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="global cap on in-flight LLM requests (default: batch.max_in_flight)")
+    parser.add_argument("--config", default="config.yaml")
+    args = parser.parse_args()
+    
+    if args.batch:
+        runner = BatchRunner(args.config, concurrency=args.concurrency, max_in_flight=args.max_in_flight)
+        if args.batch == "-":
+            queries = runner.read_queries(sys.stdin)
+        else:
+            with open(args.batch, 'r', encoding='utf-8') as f:
+                queries = runner.read_queries(f)
+        asyncio.run(runner.run(queries, args.output))
+        return
+    
+    cli = OrchestratorCLI(args.config)
     cli.interactive_mode()
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""
+Token, latency and cost accounting for LLM calls.
+
+Every call_llm/call_llm_stream records one CallRecord (model, phase, query id,
+prompt/completion tokens, latency, retries, cache status). Records are aggregated
+per phase, per model and per query, and can be exported as JSON or in the
+Prometheus text exposition format.
+
+Phases used by this repo: "decompose", "agent", "reduce", "synthesis", "game_turn", "game_summary".
+"""
+import json
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class CallRecord:
+    model: str
+    phase: str
+    query_id: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+    cached_prompt_tokens: int
+    latency: float
+    retries: int
+    cache_status: str  # "hit", "miss", "disabled" or "replay" (served from a cassette)
+    success: bool
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "failures": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_prompt_tokens": 0,
+        "latency_seconds": 0.0,
+        "max_latency_seconds": 0.0,
+        "retries": 0,
+        "cache_hits": 0,
+    }
+
+
+def _add(totals: Dict[str, Any], record: CallRecord):
+    totals["calls"] += 1
+    totals["failures"] += 0 if record.success else 1
+    totals["prompt_tokens"] += record.prompt_tokens
+    totals["completion_tokens"] += record.completion_tokens
+    totals["cached_prompt_tokens"] += record.cached_prompt_tokens
+    totals["latency_seconds"] += record.latency
+    totals["max_latency_seconds"] = max(totals["max_latency_seconds"], record.latency)
+    totals["retries"] += record.retries
+    totals["cache_hits"] += 1 if record.cache_status == "hit" else 0
+
+
+def usage_counts(usage: Any) -> tuple:
+    """(prompt_tokens, completion_tokens, cached_prompt_tokens) from an SDK usage object or dict"""
+    if usage is None:
+        return 0, 0, 0
+    if not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, "model_dump") else vars(usage)
+    details = usage.get("prompt_tokens_details") or {}
+    if not isinstance(details, dict):
+        details = details.model_dump() if hasattr(details, "model_dump") else vars(details)
+    return (
+        int(usage.get("prompt_tokens") or 0),
+        int(usage.get("completion_tokens") or 0),
+        int(details.get("cached_tokens") or 0),
+    )
+
+
+class MetricsRecorder:
+    """Thread-safe aggregation of LLM call records"""
+
+    def __init__(self, max_records: int = 10000):
+        self._lock = threading.Lock()
+        self._records: deque = deque(maxlen=max_records)
+        self._totals = _empty_totals()
+        self._by_phase: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+        self._by_model: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+        self._by_query: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(lambda: defaultdict(_empty_totals))
+        # (phase, model, cache_status) -> totals, for Prometheus labels
+        self._series: Dict[tuple, Dict[str, Any]] = defaultdict(_empty_totals)
+
+    def record(self, record: CallRecord):
+        with self._lock:
+            self._records.append(record)
+            _add(self._totals, record)
+            _add(self._by_phase[record.phase], record)
+            _add(self._by_model[record.model], record)
+            if record.query_id:
+                _add(self._by_query[record.query_id]["total"], record)
+                _add(self._by_query[record.query_id][record.phase], record)
+            _add(self._series[(record.phase, record.model, record.cache_status)], record)
+
+    def query(self, query_id: str) -> Dict[str, Any]:
+        """Totals for one query, overall and per phase"""
+        with self._lock:
+            per_phase = self._by_query.get(query_id, {})
+            return {phase: dict(totals) for phase, totals in per_phase.items()}
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total": dict(self._totals),
+                "by_phase": {k: dict(v) for k, v in self._by_phase.items()},
+                "by_model": {k: dict(v) for k, v in self._by_model.items()},
+                "by_query": {q: {p: dict(t) for p, t in phases.items()} for q, phases in self._by_query.items()},
+            }
+
+    def records(self) -> list:
+        with self._lock:
+            return [asdict(r) for r in self._records]
+
+    def to_json(self, include_records: bool = False) -> str:
+        data = self.summary()
+        if include_records:
+            data["records"] = self.records()
+        return json.dumps(data, indent=2)
+
+    def to_prometheus(self, prefix: str = "heavy_llm") -> str:
+        """Prometheus text exposition of per (phase, model, cache) counters"""
+        metrics = [
+            ("calls_total", "calls", "LLM calls"),
+            ("failures_total", "failures", "LLM calls that returned no usable response"),
+            ("prompt_tokens_total", "prompt_tokens", "Prompt tokens billed"),
+            ("completion_tokens_total", "completion_tokens", "Completion tokens billed"),
+            ("cached_prompt_tokens_total", "cached_prompt_tokens", "Prompt tokens served from provider prompt cache"),
+            ("retries_total", "retries", "Retried LLM attempts"),
+            ("latency_seconds_total", "latency_seconds", "Total LLM call latency including retries"),
+        ]
+        with self._lock:
+            series = {k: dict(v) for k, v in self._series.items()}
+        lines = []
+        for name, field, help_text in metrics:
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (phase, model, cache_status), totals in sorted(series.items()):
+                labels = f'phase="{_escape(phase)}",model="{_escape(model)}",cache="{cache_status}"'
+                lines.append(f"{metric}{{{labels}}} {totals[field]}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._totals = _empty_totals()
+            for table in (self._by_phase, self._by_model, self._by_query, self._series):
+                table.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_recorder = MetricsRecorder()
+
+
+def get_recorder() -> MetricsRecorder:
+    """Process-wide recorder used by all agents unless one is injected"""
+    return _recorder
@@ -3,26 +3,131 @@ import json
 import time
 import random
 import string
-import yaml
 import re
+import uuid
+import asyncio
 from typing import List, Dict, Any, Optional, Tuple, Set, DefaultDict
 from collections import defaultdict
-from agent import OpenRouterAgent
+from concurrent.futures import ThreadPoolExecutor
+from client_pool import load_config, create_agent, apply_overrides
 from orchestrator import TaskOrchestrator
+from game_parser import TurnParser
+from token_budget import count_tokens
+import metrics
 
 # =========================
 # Information Sharing and Integration Game (Console)
 # Category D per competition brief
 # =========================
 
+SLOT_PATTERN = re.compile(r"\b([AB][12])\.(C|S)\s*=\s*([A-Za-z]+)", re.IGNORECASE)
+
+
+class FullMemory:
+    """Prompts see every message verbatim"""
+    name = "full"
+
+    def render(self, channel: "MessageChannel") -> str:
+        return channel.get_history_text()
+
+
+class WindowMemory:
+    """Prompts see only the last `turns` messages"""
+    name = "window"
+
+    def __init__(self, turns: int = 8):
+        self.turns = max(1, turns)
+
+    def _recent(self, channel: "MessageChannel") -> str:
+        return "\n".join(channel.lines[-self.turns:])
+
+    def render(self, channel: "MessageChannel") -> str:
+        omitted = max(0, len(channel.lines) - self.turns)
+        if not omitted:
+            return self._recent(channel)
+        return f"({omitted} earlier messages omitted)\n{self._recent(channel)}"
+
+
+class CompactMemory(WindowMemory):
+    """
+    The last `turns` messages verbatim; older messages are reduced to the slot assertions
+    they carried (A1.C=Red ...), deduplicated, with who said them and when.
+    """
+    name = "compact"
+
+    def __init__(self, turns: int = 8):
+        super().__init__(turns)
+        self._compacted = 0
+        self._slots: Dict[str, List[str]] = {}
+
+    def render(self, channel: "MessageChannel") -> str:
+        older = len(channel.lines) - self.turns
+        # Older messages only ever grow, so fold in the ones that left the window since last time
+        for entry in channel.transcript[self._compacted:max(self._compacted, older)]:
+            for cell, attr, value in SLOT_PATTERN.findall(entry["noised"]):
+                key = f"{cell.upper()}.{attr.upper()}={value.capitalize()}"
+                self._slots.setdefault(key, []).append(f"{entry['from']}@{entry['turn']}")
+        self._compacted = max(self._compacted, older)
+        if not self._compacted:
+            return self._recent(channel)
+        asserted = "; ".join(f"{key} ({', '.join(sources)})" for key, sources in sorted(self._slots.items()))
+        return (f"EARLIER MESSAGES 1-{self._compacted} (slot assertions only): {asserted or 'none'}\n"
+                f"{self._recent(channel)}")
+
+
+class SummaryMemory(WindowMemory):
+    """
+    A running LLM summary of older messages plus every message after it verbatim.
+    Once `every` messages have left the window unsummarized, summarize(previous_summary, lines)
+    runs in the background; prompts keep using the previous summary (and the extra verbatim
+    messages) until it finishes, so summarization never delays a turn.
+    """
+    name = "summary"
+
+    def __init__(self, summarize, turns: int = 8, every: int = 8):
+        super().__init__(turns)
+        self.summarize = summarize
+        self.every = max(1, every)
+        self.summary = ""
+        self.summarized = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="game-summary")
+        self._pending = None  # (future, messages covered)
+
+    def render(self, channel: "MessageChannel") -> str:
+        if self._pending is not None and self._pending[0].done():
+            future, upto = self._pending
+            self._pending = None
+            try:
+                self.summary, self.summarized = future.result(), upto
+            except Exception as e:
+                print(f"[WARN] Transcript summary failed: {e}")
+        older = len(channel.lines) - self.turns
+        if self._pending is None and older - self.summarized >= self.every:
+            lines = channel.lines[self.summarized:older]
+            self._pending = (self._executor.submit(self.summarize, self.summary, lines), older)
+        recent = "\n".join(channel.lines[self.summarized:])
+        if not self.summarized:
+            return recent
+        return f"SUMMARY OF MESSAGES 1-{self.summarized}:\n{self.summary}\nLATER MESSAGES:\n{recent}"
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
 class MessageChannel:
     """In-memory message bus with adjustable bandwidth cap and noise injection to encourage emergent shorthand.
-       Proposals starting with PROPOSE= bypass noise/cap to avoid JSON corruption while keeping pressure on normal turns."""
-    def __init__(self, max_len: int = 200, char_drop_pct: float = 0.05, seed: Optional[int] = None):
+       Proposals starting with PROPOSE= bypass noise/cap to avoid JSON corruption while keeping pressure on normal turns.
+       `memory` decides how much of the transcript prompts see (FullMemory, WindowMemory, CompactMemory, SummaryMemory)."""
+    def __init__(self, max_len: int = 200, char_drop_pct: float = 0.05, seed: Optional[int] = None, memory=None):
         self.max_len = max_len
         self.char_drop_pct = char_drop_pct
         self.rng = random.Random(seed)
+        self.memory = memory or FullMemory()
         self.transcript: List[Dict[str, Any]] = []
+        self.lines: List[str] = []  # Rendered "Agent@turn: message" lines
+        self.history_tokens = 0  # Tokens of the full rendered history
+        self._history_text: Optional[str] = None
+        self.bytes_built = 0  # Characters of history text rendered so far
 
     def _apply_bandwidth_cap(self, msg: str) -> str:
         if len(msg) > self.max_len:
@@ -58,13 +163,28 @@ class MessageChannel:
             "noised": noised,
         }
         self.transcript.append(entry)
+        # History text is append-only: extend it instead of re-rendering the whole transcript per prompt
+        line = f"{agent_name}@{turn_index}: {noised}"
+        self.lines.append(line)
+        self.history_tokens += count_tokens(line + "\n")
+        if self._history_text is not None:
+            self._history_text = f"{self._history_text}\n{line}" if self._history_text else line
+            self.bytes_built += len(line) + 1
         print(f"[{agent_name}] {noised}")
 
     def get_history_text(self) -> str:
-        lines = []
-        for e in self.transcript:
-            lines.append(f"{e['from']}@{e['turn']}: {e['noised']}")
-        return "\n".join(lines)
+        if self._history_text is None:
+            self._history_text = "\n".join(self.lines)
+            self.bytes_built += len(self._history_text)
+        return self._history_text
+
+    def get_prompt_history(self) -> str:
+        """The transcript as prompts see it under the memory policy"""
+        return self.memory.render(self)
+
+    def reset_history_cache(self):
+        """Drop the rendered history so the next get_history_text() re-renders the transcript"""
+        self._history_text = None
 
     def stats(self) -> Dict[str, Any]:
         if not self.transcript:
@@ -204,18 +324,43 @@ class InfoSharingEnvironment:
 
 
 class MultiAgentConsoleGame:
-    def __init__(self, config_path: str = "config.yaml", seed: Optional[int] = None):
-        with open(config_path, "r") as f:
-            self.config = yaml.safe_load(f)
+    def __init__(self, config_path: str = "config.yaml", seed: Optional[int] = None,
+                 config_overrides: Optional[Dict[str, Any]] = None):
+        self.config_path = config_path
+        # Dotted-key overrides (e.g. {"openrouter.model1": ..., "game.turns_total": 32}) for experiment grids
+        self.config_overrides = config_overrides or {}
+        self.config = apply_overrides(load_config(config_path), self.config_overrides)
+        self.seed = seed
+        game_config = self.config.get("game", {})
         self.env = InfoSharingEnvironment(seed=seed)
         # Relax constraints: longer cap, less noise to allow richer protocols to form, plus proposal bypass
-        self.channel = MessageChannel(max_len=200, char_drop_pct=0.05, seed=seed)
+        self.channel = MessageChannel(max_len=game_config.get("max_message_len", 200), char_drop_pct=0.05, seed=seed)
         om = self.config["openrouter"]
         self.model_ids = [om.get("model1"), om.get("model2"), om.get("model3"), om.get("model4")]
-        self.agents = [OpenRouterAgent(silent=True) for _ in range(4)]
+        # The game is pure messaging: tool-less agents end their loop on the first text reply
+        # All turns of one game share a query id in the metrics recorder
+        self.game_id = uuid.uuid4().hex
+        self.agents = [create_agent(config_path, with_tools=False, phase="game_turn", query_id=self.game_id,
+                                    config_overrides=self.config_overrides)
+                       for _ in range(4)]
+        # Used by aplay(); speculation policy for prefetching the next turn: state | off
+        self.async_agents = [create_agent(config_path, asynchronous=True, with_tools=False, phase="game_turn",
+                                          query_id=self.game_id, config_overrides=self.config_overrides)
+                             for _ in range(4)]
+        self.speculation = game_config.get("speculation", "state")
+        # How much of the transcript prompts see (game.memory.policy: full | window | compact | summary)
+        self.memory_config = game_config.get("memory") or {}
+        self.summary_agent = None
+        if self.memory_config.get("policy") == "summary":
+            self.summary_agent = create_agent(config_path, with_tools=False, phase="game_summary",
+                                              query_id=self.game_id, config_overrides=self.config_overrides)
+        self.channel.memory = self._memory_policy()
+        self.memory_stats = {"history_tokens": 0, "full_history_tokens": 0}
+        self.parser = TurnParser(self.env)
+        self.last_record = None  # TurnRecord of the most recent reply
         self.public_brief = self.env.render_public_brief()
         self.private_facts = self.env.sample_private_facts(n_agents=4)
-        self.turns_total = 24
+        self.turns_total = game_config.get("turns_total", 24)
         self.names = ["Agent1", "Agent2", "Agent3", "Agent4"]
         self.schema_locked = False
         self.schema_votes = 0
@@ -238,15 +383,169 @@ class MultiAgentConsoleGame:
         # track agent reliability for weighting confirmations
         self.agent_reliability: Dict[str, float] = {name: 1.0 for name in self.names}
 
+        # Prompt sections are cached: the guidance and per-agent brief never change, the state and
+        # reliability blocks are re-rendered only after their mutators mark them dirty.
+        # static_prefix_first moves the guidance up so every prompt starts with the same bytes,
+        # which lets provider-side prompt caching hit.
+        self.static_prefix_first = bool(game_config.get("static_prefix_first", False))
+        self.prompt_bytes_built = 0  # Characters of prompt sections rendered so far
+        self.reset_prompt_cache()
+
+    def _memory_policy(self):
+        policy = self.memory_config.get("policy", "full")
+        turns = self.memory_config.get("window_turns", 8)
+        if policy == "window":
+            return WindowMemory(turns)
+        if policy == "compact":
+            return CompactMemory(turns)
+        if policy == "summary":
+            return SummaryMemory(self._summarize_messages, turns=turns, every=self.memory_config.get("summary_every", 8))
+        return FullMemory()
+
+    def _summarize_messages(self, previous_summary: str, lines: List[str]) -> str:
+        """Fold transcript lines into the running summary (runs on SummaryMemory's background thread)"""
+        prompt = self.memory_config.get("summary_prompt") or (
+            "Summarize this noised multi-agent transcript for agents who will not see the original messages. "
+            "Keep every slot value asserted (e.g. A1.C=Red), who asserted or confirmed it, conflicts, "
+            "agreed notation and open requests. Reply with the summary only.\n\n"
+            "Summary so far:\n{summary}\n\nNew messages:\n{messages}"
+        )
+        return self.summary_agent.run(prompt.format(summary=previous_summary or "(none)", messages="\n".join(lines)),
+                                      model=self.memory_config.get("summary_model"))
+
+    def _history_token_counts(self) -> Tuple[int, int]:
+        """(transcript tokens a prompt built now carries under the memory policy, with the full transcript)"""
+        full = self.channel.history_tokens
+        used = full if isinstance(self.channel.memory, FullMemory) else count_tokens(self.channel.get_prompt_history())
+        return used, full
+
+    def _count_history_tokens(self, counts: Optional[Tuple[int, int]] = None):
+        """Add one sent prompt's transcript tokens (by default, of a prompt built now) to memory_stats"""
+        used, full = counts or self._history_token_counts()
+        self.memory_stats["history_tokens"] += used
+        self.memory_stats["full_history_tokens"] += full
+
     def _maybe_lock_schema(self, text: str):
         if "SCHEMA" in text.upper():
             self.schema_votes += 1
         if not self.schema_locked and self.schema_votes >= 3:
             self.schema_locked = True
 
-    def _build_prompt_for_agent(self, idx: int) -> str:
-        history = self.channel.get_history_text()
-        facts = "\n".join(self.private_facts[idx]) if self.private_facts[idx] else "(no private facts visible)"
+    def reset_prompt_cache(self):
+        """Forget every cached prompt section (they are rebuilt on the next prompt)"""
+        self._agent_sections: Dict[int, str] = {}
+        self._guidance_section: Optional[str] = None
+        self._state_section: Optional[Tuple[str, str]] = None
+        self._reliability_section: Optional[str] = None
+        self.channel.reset_history_cache()
+
+    def _rendered(self, text: str) -> str:
+        self.prompt_bytes_built += len(text)
+        return text
+
+    def _agent_section(self, idx: int) -> str:
+        section = self._agent_sections.get(idx)
+        if section is None:
+            facts = "\n".join(self.private_facts[idx]) if self.private_facts[idx] else "(no private facts visible)"
+            # Light role alignment (no structural change)
+            role_map = {
+                0: "ROLE=Schema Guardian + Aggregator",
+                1: "ROLE=Fact Broadcaster",
+                2: "ROLE=Consistency Checker",
+                3: "ROLE=Proposer/Closer",
+            }
+            role_hint = role_map.get(idx, "")
+            section = self._agent_sections[idx] = self._rendered(f"{role_hint}\nYOUR PRIVATE FACTS:\n{facts}\n\n")
+        return section
+
+    def _guidance(self) -> str:
+        if self._guidance_section is None:
+            late_emphasis = (
+                "- Late-turn emphasis (turns 20–22): Focus only on ONE unknown slot; do not restate known slots except to confirm a change.\n"
+                "- Near-final check (turns 20–22): emit a compact table with status tags [OK/UNK/REVISE]:\n"
+                "  TABLE: A1.C=?, A1.S=?, A2.C=?, A2.S=?, B1.C=?, B1.S=?, B2.C=?, B2.S=?\n"
+                "  Then push the Closer to issue PREPARE_PROPOSAL on the next turn and final PROPOSE= after that.\n"
+            )
+            pre_proposal_contract = (
+                "Proposal contract:\n"
+                "- Before issuing PROPOSE=, the Proposer/Closer must verify:\n"
+                "  * All 8 slots listed with status [OK] (no UNK/REVISE).\n"
+                "  * Each slot has TWO independent confirmations (not counting the original proposer).\n"
+                "- Use PREPARE_PROPOSAL={...} one turn BEFORE the final proposal (this line will be noised).\n"
+                "- On the NEXT turn, issue the final PROPOSE= JSON (this line is un-noised and must be the only content on the line).\n"
+            )
+            one_slot_assignments = (
+                "One-slot repair loop (when ≥6/8 slots are [OK]):\n"
+                "- Assign responsibilities explicitly for the remaining unknowns, e.g.:\n"
+                "  * Agent2: provide best evidence for B2.S\n"
+                "  * Agent3: request/confirm B2.S from Agent2\n"
+                "  * Agent1: recheck table and mark B2.S [OK/REVISE]\n"
+                "  * Agent4 (Closer): prepare PREPARE_PROPOSAL if all [OK] next turn\n"
+            )
+            mid_game_feedback = (
+                "Mid-game feedback rule:\n"
+                "- After any PREPARE_PROPOSAL or malformed PROPOSE, reflect explicitly on the very next turn which slots are correct/incorrect in plain language, then update the table and proceed with the one-slot repair loop.\n"
+            )
+            self._guidance_section = self._rendered(
+                "Guidance:\n"
+                "- Only state NEW or CORRECTED facts; avoid repeating unchanged items.\n"
+                "- Use compact schema (A1.C=Red | B2.S=Star). Use '|' as a separator.\n"
+                "- When you share a NEW slot, REPEAT it exactly twice in your next turn for robustness.\n"
+                "- Confirm slotwise using 'CONFIRM cell.attr=value' (e.g., 'CONFIRM B1.S=Circle'); avoid generic OK.\n"
+                "- Always list Unknown fields at the end, ordered by importance: 'UNKNOWN: A1.S, B2.C, ...'.\n"
+                "- Turn budgeting:\n"
+                "  * Early (turns 1–6): dump private facts compactly.\n"
+                "  * Mid (turns 7–16): consolidate + confirm; focus only on Unknown list.\n"
+                "  * Late (turns 17+): if ≥7/8 known, Closer attempts PREPARE_PROPOSAL then PROPOSE=; else focus one-slot-per-turn.\n"
+                "- After any proposal (even partial), reflect back slotwise correctness as DELTA corrections next turn.\n"
+                f"{late_emphasis}"
+                f"{one_slot_assignments}"
+                f"{pre_proposal_contract}"
+                f"{mid_game_feedback}"
+                "- When enough info is shared, output a single PROPOSE=... JSON line with no extra text.\n"
+            )
+        return self._guidance_section
+
+    def _state_sections(self) -> Tuple[str, str]:
+        """(CANONICAL_STATE + QUORUM_STATUS blocks, forced finalization hint); dirty after state mutators"""
+        if self._state_section is None:
+            # Compose CANONICAL_STATE and QUORUM_STATUS blocks for stronger closure pressure
+            canonical_lines = []
+            for cell in self.env.CELLS:
+                c = self.canonical_state[f"{cell}.C"] or "?"
+                s = self.canonical_state[f"{cell}.S"] or "?"
+                canonical_lines.append(f"{cell}.C={c} | {cell}.S={s}")
+            canonical_block = "CANONICAL_STATE:\n" + "\n".join(canonical_lines)
+
+            quorum_lines = []
+            for cell in self.env.CELLS:
+                for attr, key in [("Color", f"{cell}.C"), ("Shape", f"{cell}.S")]:
+                    cur = self.canonical_state[key]
+                    if cur:
+                        count = len(self.confirmations[key][cur])
+                        conf = self.confidence[key][cur]
+                        quorum_lines.append(f"{key}={cur} quorum={count} confidence={conf:.2f}")
+                    else:
+                        quorum_lines.append(f"{key}=? quorum=0 confidence=0.00")
+            quorum_block = "QUORUM_STATUS:\n" + "\n".join(quorum_lines)
+
+            forced_finalization_hint = ""
+            if self._quorum_all_met():
+                forced_finalization_hint = "\nFORCED_FINALIZATION: All quorums met. If you are Agent4 on turn 23, you MUST issue the final PROPOSE= JSON exactly as per canonical state.\n"
+            self._state_section = (self._rendered(f"{canonical_block}\n\n{quorum_block}\n\n"),
+                                   forced_finalization_hint)
+        return self._state_section
+
+    def _reliability(self) -> str:
+        if self._reliability_section is None:
+            reliability_lines = []
+            for agent in self.names:
+                reliability_lines.append(f"{agent}: {self.agent_reliability[agent]:.2f}")
+            self._reliability_section = self._rendered("AGENT_RELIABILITY:\n" + "\n".join(reliability_lines) + "\n\n")
+        return self._reliability_section
+
+    def _build_prompt_for_agent(self, idx: int, include_history: bool = True) -> str:
+        history = self.channel.get_prompt_history() if include_history else ""
         lock_hint = ""
         if self.schema_locked:
             lock_hint = (
@@ -254,109 +553,37 @@ class MultiAgentConsoleGame:
                 "Normalize malformed keys to this schema before sending.\n"
                 "Repeat any newly asserted slot exactly twice in your next turn."
             )
-        # Light role alignment (no structural change)
-        role_map = {
-            0: "ROLE=Schema Guardian + Aggregator",
-            1: "ROLE=Fact Broadcaster",
-            2: "ROLE=Consistency Checker",
-            3: "ROLE=Proposer/Closer",
-        }
-        role_hint = role_map.get(idx, "")
-        late_emphasis = (
-            "- Late-turn emphasis (turns 20–22): Focus only on ONE unknown slot; do not restate known slots except to confirm a change.\n"
-            "- Near-final check (turns 20–22): emit a compact table with status tags [OK/UNK/REVISE]:\n"
-            "  TABLE: A1.C=?, A1.S=?, A2.C=?, A2.S=?, B1.C=?, B1.S=?, B2.C=?, B2.S=?\n"
-            "  Then push the Closer to issue PREPARE_PROPOSAL on the next turn and final PROPOSE= after that.\n"
-        )
-        pre_proposal_contract = (
-            "Proposal contract:\n"
-            "- Before issuing PROPOSE=, the Proposer/Closer must verify:\n"
-            "  * All 8 slots listed with status [OK] (no UNK/REVISE).\n"
-            "  * Each slot has TWO independent confirmations (not counting the original proposer).\n"
-            "- Use PREPARE_PROPOSAL={...} one turn BEFORE the final proposal (this line will be noised).\n"
-            "- On the NEXT turn, issue the final PROPOSE= JSON (this line is un-noised and must be the only content on the line).\n"
-        )
-        one_slot_assignments = (
-            "One-slot repair loop (when ≥6/8 slots are [OK]):\n"
-            "- Assign responsibilities explicitly for the remaining unknowns, e.g.:\n"
-            "  * Agent2: provide best evidence for B2.S\n"
-            "  * Agent3: request/confirm B2.S from Agent2\n"
-            "  * Agent1: recheck table and mark B2.S [OK/REVISE]\n"
-            "  * Agent4 (Closer): prepare PREPARE_PROPOSAL if all [OK] next turn\n"
-        )
-        mid_game_feedback = (
-            "Mid-game feedback rule:\n"
-            "- After any PREPARE_PROPOSAL or malformed PROPOSE, reflect explicitly on the very next turn which slots are correct/incorrect in plain language, then update the table and proceed with the one-slot repair loop.\n"
-        )
-        # Compose CANONICAL_STATE and QUORUM_STATUS blocks for stronger closure pressure
-        canonical_lines = []
-        for cell in self.env.CELLS:
-            c = self.canonical_state[f"{cell}.C"] or "?"
-            s = self.canonical_state[f"{cell}.S"] or "?"
-            canonical_lines.append(f"{cell}.C={c} | {cell}.S={s}")
-        canonical_block = "CANONICAL_STATE:\n" + "\n".join(canonical_lines)
-
-        quorum_lines = []
-        for cell in self.env.CELLS:
-            for attr, key in [("Color", f"{cell}.C"), ("Shape", f"{cell}.S")]:
-                cur = self.canonical_state[key]
-                if cur:
-                    count = len(self.confirmations[key][cur])
-                    conf = self.confidence[key][cur]
-                    quorum_lines.append(f"{key}={cur} quorum={count} confidence={conf:.2f}")
-                else:
-                    quorum_lines.append(f"{key}=? quorum=0 confidence=0.00")
-        quorum_block = "QUORUM_STATUS:\n" + "\n".join(quorum_lines)
-
-        forced_finalization_hint = ""
-        if self._quorum_all_met():
-            forced_finalization_hint = "\nFORCED_FINALIZATION: All quorums met. If you are Agent4 on turn 23, you MUST issue the final PROPOSE= JSON exactly as per canonical state.\n"
+        state_blocks, forced_finalization_hint = self._state_sections()
 
         # Create machine feedback string separately to avoid backslash issue in f-string
         if self.last_feedback:
             machine_feedback = "MACHINE_FEEDBACK:\n" + self.last_feedback + "\n\n"
         else:
             machine_feedback = ""
-            
-        # Create agent reliability block
-        reliability_lines = []
-        for agent in self.names:
-            reliability_lines.append(f"{agent}: {self.agent_reliability[agent]:.2f}")
-        reliability_block = "AGENT_RELIABILITY:\n" + "\n".join(reliability_lines)
-            
-        return (
-            f"{self.public_brief}\n"
-            f"{role_hint}\n"
-            f"YOUR PRIVATE FACTS:\n{facts}\n\n"
-            f"TRANSCRIPT SO FAR (noised):\n{history if history else '(none)'}\n\n"
-            f"{canonical_block}\n\n"
-            f"{quorum_block}\n\n"
-            f"{reliability_block}\n\n"
-            f"{machine_feedback}"
-            "Guidance:\n"
-            "- Only state NEW or CORRECTED facts; avoid repeating unchanged items.\n"
-            "- Use compact schema (A1.C=Red | B2.S=Star). Use '|' as a separator.\n"
-            "- When you share a NEW slot, REPEAT it exactly twice in your next turn for robustness.\n"
-            "- Confirm slotwise using 'CONFIRM cell.attr=value' (e.g., 'CONFIRM B1.S=Circle'); avoid generic OK.\n"
-            "- Always list Unknown fields at the end, ordered by importance: 'UNKNOWN: A1.S, B2.C, ...'.\n"
-            "- Turn budgeting:\n"
-            "  * Early (turns 1–6): dump private facts compactly.\n"
-            "  * Mid (turns 7–16): consolidate + confirm; focus only on Unknown list.\n"
-            "  * Late (turns 17+): if ≥7/8 known, Closer attempts PREPARE_PROPOSAL then PROPOSE=; else focus one-slot-per-turn.\n"
-            "- After any proposal (even partial), reflect back slotwise correctness as DELTA corrections next turn.\n"
-            f"{late_emphasis}"
-            f"{one_slot_assignments}"
-            f"{pre_proposal_contract}"
-            f"{mid_game_feedback}"
-            "- When enough info is shared, output a single PROPOSE=... JSON line with no extra text.\n"
-            f"{lock_hint}"
-            f"{forced_finalization_hint}"
-        )
+
+        transcript = f"TRANSCRIPT SO FAR (noised):\n{history if history else '(none)'}\n\n"
+        if self.static_prefix_first:
+            # Same leading bytes for every agent and turn; then this agent's brief and the
+            # append-only transcript, so each agent's previous prompt is a prefix of its next one
+            parts = [self._cacheable_prefix(idx), transcript, state_blocks, self._reliability(),
+                     machine_feedback, lock_hint, forced_finalization_hint]
+        else:
+            parts = [self._cacheable_prefix(idx), transcript, state_blocks, self._reliability(),
+                     machine_feedback, self._guidance(), lock_hint, forced_finalization_hint]
+        return "".join(parts)
+
+    def _cacheable_prefix(self, idx: int) -> str:
+        """Leading part of agent idx's prompt that stays the same all game (a prompt-cache breakpoint)"""
+        if self.static_prefix_first:
+            return f"{self.public_brief}{self._guidance()}\n{self._agent_section(idx)}"
+        return f"{self.public_brief}\n{self._agent_section(idx)}"
 
     def _extract_first_line(self, text: str) -> str:
         return (text or "").strip()
 
     # === New helpers: parsing, canonicalization, quorum, and feedback ===
+    # Turns are parsed by game_parser.TurnParser; the regex parsers below are its reference
+    # behaviour (benchmarks/bench_game_parser.py checks parity)
 
     def _parse_claims_and_confirms(self, speaker: str, text: str) -> List[Tuple[str, str, str]]:
         """
@@ -389,6 +616,8 @@ class MultiAgentConsoleGame:
         return results
 
     def _update_canonical_and_quorum(self, speaker: str, parsed: List[Tuple[str, str, str]]):
+        if parsed:
+            self._state_section = None
         for kind, slot, value in parsed:
             if kind == "CLAIM":
                 # adopt claim as tentative canonical if empty; don't override a different non-empty value
@@ -454,9 +683,17 @@ class MultiAgentConsoleGame:
             canon = self.env._canon_value(slot, val)
             if canon and status == "OK":
                 # adopt as canonical and treat as an implicit confirmation by "TABLE"
+                self._state_section = None
                 self.canonical_state[slot] = canon
                 self.confirmations[slot][canon].add("TABLE")
 
+    def _apply_table_rows(self, rows: List[Tuple[str, str]]):
+        """Adopt [OK] TABLE rows (from game_parser) as canonical; each counts as a confirmation by TABLE"""
+        for slot, canon in rows:
+            self._state_section = None
+            self.canonical_state[slot] = canon
+            self.confirmations[slot][canon].add("TABLE")
+
     def _detect_prepare_candidate(self, text: str) -> Optional[Dict[str, Any]]:
         """
         Detect PREPARE_* lines with fuzzy prefix and try to extract JSON payload if present.
@@ -531,84 +768,88 @@ class MultiAgentConsoleGame:
         Update agent reliability based on proposal score.
         """
         # Simple update rule: if score is high, increase reliability; if low, decrease
+        self._reliability_section = None
         if proposal_score >= 0.9:
             self.agent_reliability[agent_name] = min(1.0, self.agent_reliability[agent_name] + 0.1)
         elif proposal_score <= 0.5:
             self.agent_reliability[agent_name] = max(0.1, self.agent_reliability[agent_name] - 0.1)
 
-    def play(self):
-        print("=== Information Sharing and Integration: Console Game ===")
-        print("Relaxed bandwidth/noise and extended turns to encourage emergent protocol formation.\n")
-        # Reset machine feedback at start
-        self.last_feedback = ""
+    def _set_noise_for_turn(self, t: int):
+        # Dynamic noise schedule: stabilize early, test robustness mid, protect closure late
+        if t <= (self.turns_total // 2):
+            self.channel.char_drop_pct = 0.03     # early: stabilize
+        elif t <= (self.turns_total - 4):
+            self.channel.char_drop_pct = 0.05     # mid: robustness
+        else:
+            self.channel.char_drop_pct = 0.01     # late closure: ultra-low noise for confirmations/proposals
 
-        proposal_best_score = 0.0
-        proposal_best: Optional[Dict[str, Any]] = None
+    def _apply_reply(self, t: int, turn_idx: int, reply_full: str) -> bool:
+        """Parse one agent reply into the game state and channel. Returns True on a perfect proposal."""
+        name = self.names[turn_idx]
+        reply_line = self._extract_first_line(reply_full)
+        # One pass over the reply for claims, confirmations, TABLE rows and PREPARE/PROPOSE payloads
+        record = self.parser.parse(reply_line)
+        self.last_record = record
+        # TABLE rows update canonical state
+        self._apply_table_rows(record.table)
+        # Claims and confirmations update quorum/canonical
+        self._update_canonical_and_quorum(name, record.claims)
 
-        for t in range(1, self.turns_total + 1):
-            # Dynamic noise schedule: stabilize early, test robustness mid, protect closure late
-            if t <= (self.turns_total // 2):
-                self.channel.char_drop_pct = 0.03     # early: stabilize
-            elif t <= (self.turns_total - 4):
-                self.channel.char_drop_pct = 0.05     # mid: robustness
+        self._maybe_lock_schema(reply_line)
+        self.channel.send(name, t, reply_line)
+
+        # Detect PREPARE_* candidate or malformed PROPOSE to generate machine feedback
+        prepare_obj = record.prepare
+        propose_obj = record.proposal or self.parser.parse_proposal(self.channel.transcript[-1]["noised"])
+        malformed_propose = record.has_propose and (propose_obj is None)
+        if prepare_obj is not None:
+            self.shadow_candidate = prepare_obj
+            self._machine_feedback_after_prepare_or_malformed(self.shadow_candidate)
+        elif malformed_propose:
+            self._machine_feedback_after_prepare_or_malformed(None)
+        else:
+            # Clear feedback unless we are still missing quorum
+            if not self._quorum_all_met():
+                # maintain last feedback to keep pressure
+                pass
             else:
-                self.channel.char_drop_pct = 0.01     # late closure: ultra-low noise for confirmations/proposals
+                self.last_feedback = ""
 
-            turn_idx = (t - 1) % 4
-            agent = self.agents[turn_idx]
-            model = self.model_ids[turn_idx]
-            name = self.names[turn_idx]
+        # The entry's raw text is reply_line, so its proposal is the one parsed above
+        candidate = propose_obj
+        # Enforce quorum: accept proposal only if quorum satisfied for all slots
+        if candidate and self._quorum_all_met():
+            score = self.env.score_proposal(candidate)
+            # Update agent reliability based on proposal score
+            self._update_agent_reliability(name, score)
+            if score >= self.proposal_best_score:
+                self.proposal_best_score = score
+                self.proposal_best = candidate
+            if score == 1.0:
+                print("\nPerfect proposal received. Ending early.\n")
+                return True
+        elif candidate and not self._quorum_all_met():
+            # Reject proposal silently but produce targeted feedback
+            self._machine_feedback_after_prepare_or_malformed(candidate)
 
-            user_prompt = self._build_prompt_for_agent(turn_idx)
-            reply_full = agent.run(user_prompt, model=model)
-            reply_line = self._extract_first_line(reply_full)
-            # Parse TABLE to update canonical state
-            self._parse_table_update(reply_line)
-            # Parse claims and confirmations; update quorum/canonical
-            parsed = self._parse_claims_and_confirms(name, reply_line)
-            self._update_canonical_and_quorum(name, parsed)
-
-            self._maybe_lock_schema(reply_line)
-            self.channel.send(name, t, reply_line)
-
-            # Detect PREPARE_* candidate or malformed PROPOSE to generate machine feedback
-            prepare_obj = self._detect_prepare_candidate(reply_line)
-            propose_obj = self.env.is_valid_proposal(reply_line) or self.env.is_valid_proposal(self.channel.transcript[-1]["noised"])
-            malformed_propose = (("PROPOSE=" in reply_line) and (propose_obj is None))
-            if prepare_obj is not None:
-                self.shadow_candidate = prepare_obj
-                self._machine_feedback_after_prepare_or_malformed(self.shadow_candidate)
-            elif malformed_propose:
-                self._machine_feedback_after_prepare_or_malformed(None)
-            else:
-                # Clear feedback unless we are still missing quorum
-                if not self._quorum_all_met():
-                    # maintain last feedback to keep pressure
-                    pass
-                else:
-                    self.last_feedback = ""
-
-            last_entry = self.channel.transcript[-1]
-            candidate = self.env.is_valid_proposal(last_entry["raw"]) or self.env.is_valid_proposal(last_entry["noised"])
-            # Enforce quorum: accept proposal only if quorum satisfied for all slots
-            if candidate and self._quorum_all_met():
-                score = self.env.score_proposal(candidate)
-                # Update agent reliability based on proposal score
-                self._update_agent_reliability(name, score)
-                if score >= proposal_best_score:
-                    proposal_best_score = score
-                    proposal_best = candidate
-                if score == 1.0:
-                    print("\nPerfect proposal received. Ending early.\n")
-                    break
-            elif candidate and not self._quorum_all_met():
-                # Reject proposal silently but produce targeted feedback
-                self._machine_feedback_after_prepare_or_malformed(candidate)
+        # Forced finalization directive: if by end of turn 22 quorums are met, force Agent4 to propose on 23
+        if t == 22 and self._quorum_all_met():
+            self.last_feedback = "All slots have quorum≥2. Agent4 must issue final PROPOSE= JSON on next turn using CANONICAL_STATE exactly."
+        return False
 
-            # Forced finalization directive: if by end of turn 22 quorums are met, force Agent4 to propose on 23
-            if t == 22 and self._quorum_all_met():
-                self.last_feedback = "All slots have quorum≥2. Agent4 must issue final PROPOSE= JSON on next turn using CANONICAL_STATE exactly."
+    def _start_round(self):
+        print("=== Information Sharing and Integration: Console Game ===")
+        print("Relaxed bandwidth/noise and extended turns to encourage emergent protocol formation.\n")
+        # Reset machine feedback at start
+        self.last_feedback = ""
+
+        self.proposal_best_score = 0.0
+        self.proposal_best: Optional[Dict[str, Any]] = None
 
+    def _finish_round(self, turns_played: int) -> Dict[str, Any]:
+        """Print the round report and return the game summary"""
+        proposal_best = self.proposal_best
+        proposal_best_score = self.proposal_best_score
         print("\n=== Round Complete ===\n")
         print("Transcript:")
         print(self.channel.get_history_text())
@@ -617,6 +858,10 @@ class MultiAgentConsoleGame:
         print("\nAgent reliability scores:")
         for agent, score in self.agent_reliability.items():
             print(f"  {agent}: {score:.2f}")
+        usage = metrics.get_recorder().query(self.game_id).get("total", {})
+        print(f"\nLLM usage: {usage.get('calls', 0)} calls, {usage.get('prompt_tokens', 0)} prompt "
+              f"({usage.get('cached_prompt_tokens', 0)} cached) / {usage.get('completion_tokens', 0)} completion tokens, "
+              f"{usage.get('latency_seconds', 0.0):.1f}s")
 
         if proposal_best is not None:
             print("\nBest proposal received:")
@@ -625,36 +870,206 @@ class MultiAgentConsoleGame:
         else:
             print("\nNo valid proposal received.")
 
-        try:
-            orch = TaskOrchestrator(silent=True)
-            synthesis_input = [
-                "Synthesize the multi-agent interaction below into a concise final report that evaluates semantic/pragmatic emergent language properties (grounding, compositionality, consistency, efficiency, signaling/listening, symmetry).",
-                "",
-                "Transcript:",
-                self.channel.get_history_text(),
+        memory = self.channel.memory
+        if hasattr(memory, "close"):
+            memory.close()
+        history_tokens, full_tokens = self.memory_stats["history_tokens"], self.memory_stats["full_history_tokens"]
+        memory_report = {
+            "policy": memory.name,
+            "history_tokens": history_tokens,
+            "full_history_tokens": full_tokens,
+            "saved_pct": 100.0 * (full_tokens - history_tokens) / full_tokens if full_tokens else 0.0,
+            # What the summaries themselves cost
+            "summary_tokens": metrics.get_recorder().query(self.game_id).get("game_summary", {}).get("prompt_tokens", 0),
+        }
+        print(f"Transcript memory ({memory.name}): {history_tokens} of {full_tokens} transcript tokens sent "
+              f"({memory_report['saved_pct']:.0f}% saved"
+              + (f", {memory_report['summary_tokens']} prompt tokens spent on summaries)" if self.summary_agent else ")"))
+
+        return {
+            "seed": self.seed,
+            "score": proposal_best_score * 100 if proposal_best is not None else 0.0,
+            "valid_proposal": proposal_best is not None,
+            "proposal": proposal_best,
+            "turns_played": turns_played,
+            "agent_reliability": dict(self.agent_reliability),
+            "channel_stats": self.channel.stats(),
+            "usage": usage,
+            "memory": memory_report,
+            "report": None,
+        }
+
+    def _synthesis_input(self) -> str:
+        synthesis_input = [
+            "Synthesize the multi-agent interaction below into a concise final report that evaluates semantic/pragmatic emergent language properties (grounding, compositionality, consistency, efficiency, signaling/listening, symmetry).",
+            "",
+            "Transcript:",
+            self.channel.get_history_text(),
+            "",
+            "Channel stats JSON:",
+            json.dumps(self.channel.stats()),
+        ]
+        if self.proposal_best is not None:
+            synthesis_input += [
                 "",
-                "Channel stats JSON:",
-                json.dumps(self.channel.stats()),
+                "Best Proposal JSON:",
+                json.dumps(self.proposal_best),
+                f"Score: {self.proposal_best_score*100:.1f}%",
             ]
-            if proposal_best is not None:
-                synthesis_input += [
-                    "",
-                    "Best Proposal JSON:",
-                    json.dumps(proposal_best),
-                    f"Score: {proposal_best_score*100:.1f}%",
-                ]
-            final_report = orch.orchestrate("\n".join(synthesis_input))
+        return "\n".join(synthesis_input)
+
+    def play(self, synthesize: bool = True) -> Dict[str, Any]:
+        """
+        Play one game and return a summary dict (score, proposal, turns, usage, ...).
+        synthesize=False skips the final orchestrator report, e.g. for experiment sweeps.
+        """
+        self._start_round()
+
+        t = 0
+        for t in range(1, self.turns_total + 1):
+            self._set_noise_for_turn(t)
+
+            turn_idx = (t - 1) % 4
+            agent = self.agents[turn_idx]
+            model = self.model_ids[turn_idx]
+
+            user_prompt = self._build_prompt_for_agent(turn_idx)
+            self._count_history_tokens()
+            reply_full = agent.run(user_prompt, model=model, cacheable_prefix=self._cacheable_prefix(turn_idx))
+            if self._apply_reply(t, turn_idx, reply_full):
+                break
+
+        summary = self._finish_round(t)
+        if not synthesize:
+            return summary
+
+        try:
+            orch = TaskOrchestrator(config_path=self.config_path, silent=True)
+            final_report = orch.orchestrate(self._synthesis_input())
+            print("\n=== Final Synthesized Report ===\n")
+            print(final_report)
+            summary["report"] = final_report
+        except Exception as e:
+            print(f"\n[WARN] Synthesis failed: {e}")
+        return summary
+
+    # ===== async engine with speculative prefetch =====
+
+    def _speculation_key(self, turn_idx: int) -> str:
+        """
+        What must be unchanged for a speculative reply to stay valid: the prompt without the
+        transcript, i.e. the structured state (canonical slots, quorum, feedback, schema lock,
+        reliability)
+        """
+        return self._build_prompt_for_agent(turn_idx, include_history=False)
+
+    @staticmethod
+    def _invalidates_speculation(record) -> bool:
+        """
+        Whether the reply sent during a speculative call carries anything addressed to the game
+        state (claims, CONFIRMs, TABLE rows, PREPARE/PROPOSE). The speculative reply has not seen
+        that message, so it is only reused when the message was plain chatter.
+        """
+        return bool(record.claims or record.table or record.prepare is not None or record.has_propose)
+
+    async def aplay(self, synthesize: bool = True) -> Dict[str, Any]:
+        """
+        Async counterpart of play(). With game.speculation "state", while turn t's call is in
+        flight, turn t+1's call is started on a prompt built from the current state (turn order
+        is fixed). It is cancelled as soon as turn t's reply touches the game state, and when
+        turn t+1 comes up it is only used if the structured state it was built from is unchanged;
+        otherwise the turn is called fresh.
+        """
+        self._start_round()
+        agents = self.async_agents
+        speculative = None  # (turn, task, key, history token counts of its prompt)
+        launched = hits = invalidated = 0
+
+        t = 0
+        try:
+            for t in range(1, self.turns_total + 1):
+                self._set_noise_for_turn(t)
+                turn_idx = (t - 1) % 4
+                user_prompt = self._build_prompt_for_agent(turn_idx)
+
+                reply_task = None
+                if speculative is not None:
+                    spec_turn, spec_task, spec_key, spec_counts = speculative
+                    speculative = None
+                    if spec_turn == t and spec_key == self._speculation_key(turn_idx):
+                        hits += 1
+                        reply_task = spec_task
+                        # The speculative prompt is the one actually sent
+                        self._count_history_tokens(spec_counts)
+                    else:
+                        spec_task.cancel()
+                if reply_task is None:
+                    self._count_history_tokens()
+                    reply_task = asyncio.ensure_future(agents[turn_idx].run(
+                        user_prompt, model=self.model_ids[turn_idx], cacheable_prefix=self._cacheable_prefix(turn_idx)))
+
+                # Prefetch the next agent's turn on the current state
+                if self.speculation == "state" and t < self.turns_total:
+                    next_idx = t % 4
+                    next_prompt = self._build_prompt_for_agent(next_idx)
+                    speculative = (
+                        t + 1,
+                        asyncio.ensure_future(agents[next_idx].run(
+                            next_prompt, model=self.model_ids[next_idx], cacheable_prefix=self._cacheable_prefix(next_idx))),
+                        self._speculation_key(next_idx),
+                        self._history_token_counts(),
+                    )
+                    launched += 1
+
+                reply_full = await reply_task
+                if self._apply_reply(t, turn_idx, reply_full):
+                    break
+                if speculative is not None and self._invalidates_speculation(self.last_record):
+                    speculative[1].cancel()
+                    speculative = None
+                    invalidated += 1
+        finally:
+            if speculative is not None:
+                speculative[1].cancel()
+
+        summary = self._finish_round(t)
+        # Speculations still pending when the game ended early are not counted
+        resolved = launched - (1 if speculative is not None else 0)
+        summary["speculation"] = {
+            "policy": self.speculation,
+            "launched": launched,
+            "hits": hits,
+            "resolved": resolved,
+            "invalidated": invalidated,
+            "hit_rate": hits / resolved if resolved else 0.0,
+        }
+        print(f"Speculation ({self.speculation}): {hits}/{resolved} hits, "
+              f"{invalidated} dropped by a state-changing reply")
+        if not synthesize:
+            return summary
+
+        try:
+            orch = TaskOrchestrator(config_path=self.config_path, silent=True)
+            final_report = await orch.aorchestrate(self._synthesis_input())
             print("\n=== Final Synthesized Report ===\n")
             print(final_report)
+            summary["report"] = final_report
         except Exception as e:
             print(f"\n[WARN] Synthesis failed: {e}")
+        return summary
+
+    def run(self, synthesize: bool = True) -> Dict[str, Any]:
+        """Play with the engine selected by game.engine ("sync" or "async")"""
+        if self.config.get("game", {}).get("engine", "sync") == "async":
+            return asyncio.run(self.aplay(synthesize=synthesize))
+        return self.play(synthesize=synthesize)
 
 
 def main():
     seed_env = os.getenv("EMERGENT_GAME_SEED")
     seed = int(seed_env) if seed_env and seed_env.isdigit() else None
     game = MultiAgentConsoleGame(config_path="config.yaml", seed=seed)
-    game.play()
+    game.run()
 
 
 if __name__ == "__main__":
@@ -1,114 +1,253 @@
 import os
+import io
 import json
-import subprocess
-import sys
-from typing import List, Dict, Any, Optional
+import time
+import signal
+import hashlib
+import argparse
+import itertools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+def parse_seeds(spec: str) -> List[int]:
+    """Parse a seed spec like "1-100,200,300-310" into a list of seeds"""
+    seeds = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            seeds.extend(range(int(start), int(end) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+def expand_grid(grid: Optional[Dict[str, List[Any]]]) -> List[Dict[str, Any]]:
+    """Cartesian product of a {dotted.config.key: [values]} grid; no grid means one empty override"""
+    if not grid:
+        return [{}]
+    keys = sorted(grid)
+    value_lists = [grid[key] if isinstance(grid[key], list) else [grid[key]] for key in keys]
+    return [dict(zip(keys, values)) for values in itertools.product(*value_lists)]
+
+def config_key(overrides: Dict[str, Any]) -> str:
+    """Stable short id for a set of config overrides"""
+    canonical = json.dumps(overrides, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+
+class _GameTimeout(BaseException):
+    """Raised by the alarm; a BaseException so the game's own `except Exception` handlers don't swallow it"""
+
+def _game_timed_out(signum, frame):
+    raise _GameTimeout()
+
+def run_game(seed: int, overrides: Dict[str, Any], synthesize: bool = False,
+             config_path: str = "config.yaml", workers: int = 1, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Play one game in this process and return its summary.
+    Runs inside pool workers, so the game's console output is discarded. Each of the `workers`
+    processes has its own LLM scheduler, so it gets 1/workers of the configured rate and
+    concurrency limits. A game still running after `timeout` seconds raises TimeoutError
+    (where SIGALRM exists), which frees the worker for the next game.
+    """
+    from multi_agent_runner import MultiAgentConsoleGame
+    from client_pool import load_config, apply_overrides
+    from scheduler import split_settings
+
+    # Applied on top of the grid overrides but kept out of the config key
+    game_overrides = {**overrides, **split_settings(apply_overrides(load_config(config_path), overrides), workers)}
+    alarm = timeout and hasattr(signal, "SIGALRM")
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _game_timed_out)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    started = time.time()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            game = MultiAgentConsoleGame(config_path=config_path, seed=seed, config_overrides=game_overrides)
+            summary = game.run(synthesize=synthesize)
+    except _GameTimeout:
+        raise TimeoutError(f"game timed out after {timeout:g}s") from None
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    summary["elapsed"] = round(time.time() - started, 2)
+    return summary
+
+def read_results(results_path: str) -> List[Dict[str, Any]]:
+    """All records in a results file"""
+    records = []
+    if not os.path.exists(results_path):
+        return records
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Partial last line from an interrupted run
+                continue
+    return records
+
+def completed_runs(results_path: str) -> set:
+    """(seed, run, config_key) triples already recorded successfully in the results file"""
+    return {
+        (record["seed"], record["run"], record["config_key"])
+        for record in read_results(results_path)
+        if record.get("status") == "ok"
+    }
+
+def run_experiments(seeds: Iterable[int], grid: Optional[Dict[str, List[Any]]] = None, runs_per_seed: int = 1,
+                    workers: Optional[int] = None, results_path: str = "experiment_results.jsonl",
+                    synthesize: bool = False, config_path: str = "config.yaml",
+                    base_overrides: Optional[Dict[str, Any]] = None,
+                    timeout: Optional[float] = 300) -> List[Dict[str, Any]]:
+    """
+    Play every (seed, run, config) combination on a process pool, appending one JSONL record per
+    finished game to results_path. Combinations already in the file are skipped, so an
+    interrupted sweep resumes where it stopped. base_overrides apply to every combination.
+    Games longer than timeout seconds are recorded as failed (and rerun on resume).
+    Returns the records produced by this call.
+    """
+    done = completed_runs(results_path)
+    todo: List[Tuple[int, int, Dict[str, Any]]] = [
+        (seed, run, overrides)
+        for overrides in ({**(base_overrides or {}), **grid_overrides} for grid_overrides in expand_grid(grid))
+        for seed in seeds
+        for run in range(1, runs_per_seed + 1)
+        if (seed, run, config_key(overrides)) not in done
+    ]
+    print(f"{len(todo)} games to run ({len(done)} already in {results_path})")
+    if not todo:
+        return []
+
+    records = []
+    workers = workers or min(len(todo), os.cpu_count() or 4)
+    if workers > 1:
+        print(f"Each of the {workers} worker processes gets 1/{workers} of the scheduler's rate and concurrency limits")
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            open(results_path, "a", encoding="utf-8") as out:
+        future_to_run = {
+            executor.submit(run_game, seed, overrides, synthesize, config_path, workers, timeout): (seed, run, overrides)
+            for seed, run, overrides in todo
+        }
+        for future in as_completed(future_to_run):
+            seed, run, overrides = future_to_run[future]
+            record = {"seed": seed, "run": run, "config_key": config_key(overrides), "overrides": overrides}
+            try:
+                summary = future.result()
+                record.update(status="ok", **summary)
+            except Exception as e:
+                print(f"Seed {seed} run {run} failed with error: {e}")
+                record.update(status="error", error=str(e))
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            records.append(record)
+            if record["status"] == "ok":
+                print(f"  seed {seed} run {run} [{record['config_key']}]: {record['score']:.1f}% "
+                      f"in {record['elapsed']}s")
+    return records
+
+def summarize(records: List[Dict[str, Any]], seed: Optional[int] = None, num_runs: Optional[int] = None) -> Dict[str, Any]:
+    """Score statistics over result records"""
+    scores = [r["score"] for r in records if r.get("status") == "ok"]
+    savings = [r["memory"]["saved_pct"] for r in records if r.get("status") == "ok" and r.get("memory")]
+    # Async-engine games, so a speculation policy's hit rate can be read next to its scores
+    speculation = [r["speculation"] for r in records if r.get("status") == "ok" and r.get("speculation")]
+    resolved = sum(s.get("resolved", s["launched"]) for s in speculation)
+    return {
+        "seed": seed,
+        "num_runs": num_runs if num_runs is not None else len(records),
+        "valid_runs": len(scores),
+        "average_score": sum(scores) / len(scores) if scores else 0.0,
+        "max_score": max(scores) if scores else 0.0,
+        "min_score": min(scores) if scores else 0.0,
+        "transcript_tokens_saved_pct": sum(savings) / len(savings) if savings else 0.0,
+        "speculation_hit_rate": sum(s["hits"] for s in speculation) / resolved if resolved else None,
+        "speculation_invalidated": sum(s.get("invalidated", 0) for s in speculation),
+        "scores": scores
+    }
 
 def run_single_experiment(seed: int, run_id: int) -> Optional[float]:
     """
     Run a single experiment with the given seed and return the score.
     """
-    env = os.environ.copy()
-    env["EMERGENT_GAME_SEED"] = str(seed)
-    
     try:
-        # Run the multi_agent_runner.py script
-        result = subprocess.run(
-            [sys.executable, "-u", "multi_agent_runner.py"],
-            env=env,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
-        )
-        
-        # Parse the output to extract the score
-        output = result.stdout
-        lines = output.split('\n')
-        
-        # Look for the score line
-        for line in lines:
-            if line.startswith("Score: "):
-                # Extract the score value
-                score_str = line.split("Score: ")[1].split("%")[0]
-                return float(score_str)
-        
-        # If no score found, check if there was a valid proposal
-        if "No valid proposal received." in output:
-            return 0.0
-            
-        return None  # Unknown result
-        
-    except subprocess.TimeoutExpired:
-        print(f"Run {run_id} with seed {seed} timed out")
-        return None
+        return run_game(seed, {}, synthesize=True, timeout=300)["score"]
     except Exception as e:
         print(f"Run {run_id} with seed {seed} failed with error: {e}")
         return None
 
-def run_multiple_experiments(seed: int, num_runs: int = 3) -> Dict[str, Any]:
+def run_multiple_experiments(seed: int, num_runs: int = 3, workers: Optional[int] = None) -> Dict[str, Any]:
     """
-    Run multiple experiments with the same seed and return statistics.
+    Run multiple experiments with the same seed (concurrently) and return statistics.
     """
     print(f"Running {num_runs} experiments with seed {seed}")
-    
-    scores = []
-    valid_runs = 0
-    
-    for i in range(num_runs):
-        print(f"Running experiment {i+1}/{num_runs}")
-        score = run_single_experiment(seed, i+1)
-        
-        if score is not None:
-            scores.append(score)
-            valid_runs += 1
-            print(f"  Score: {score}%")
-        else:
-            print(f"  Failed to get score")
-    
-    if not scores:
-        return {
-            "seed": seed,
-            "num_runs": num_runs,
-            "valid_runs": 0,
-            "average_score": 0.0,
-            "max_score": 0.0,
-            "min_score": 0.0,
-            "scores": []
-        }
-    
-    return {
-        "seed": seed,
-        "num_runs": num_runs,
-        "valid_runs": valid_runs,
-        "average_score": sum(scores) / len(scores),
-        "max_score": max(scores),
-        "min_score": min(scores),
-        "scores": scores
-    }
+    results_path = f"experiment_results_seed_{seed}.jsonl"
+    run_experiments([seed], runs_per_seed=num_runs, workers=workers, results_path=results_path)
+    records = [r for r in read_results(results_path) if r["seed"] == seed and r["run"] <= num_runs and not r["overrides"]]
+    return summarize(records, seed=seed, num_runs=num_runs)
+
+def _load_grid(spec: Optional[str]) -> Optional[Dict[str, List[Any]]]:
+    """Grid from inline JSON or a JSON file path"""
+    if not spec:
+        return None
+    if os.path.exists(spec):
+        with open(spec, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(spec)
 
 def main():
-    # Default seed is 42
-    seed = int(os.getenv("EMERGENT_GAME_SEED", "42"))
-    num_runs = int(os.getenv("NUM_RUNS", "3"))
-    
-    # Run multiple experiments
-    results = run_multiple_experiments(seed, num_runs)
-    
-    # Print results
+    parser = argparse.ArgumentParser(description="Run console-game experiments over seeds and config overrides")
+    parser.add_argument("--seeds", default=os.getenv("EMERGENT_GAME_SEED", "42"),
+                        help='seeds, e.g. "1-100,200" (default: $EMERGENT_GAME_SEED or 42)')
+    parser.add_argument("--runs", type=int, default=int(os.getenv("NUM_RUNS", "3")),
+                        help="runs per (seed, config) (default: $NUM_RUNS or 3)")
+    parser.add_argument("--grid", help='JSON (or JSON file) of dotted config keys to value lists, '
+                                       'e.g. \'{"openrouter.model1": ["a/b", "c/d"], "game.turns_total": [24, 32]}\'')
+    parser.add_argument("--workers", type=int, help="concurrent games (default: CPU count)")
+    parser.add_argument("--output", default="experiment_results.jsonl", help="results JSONL (appended; used to resume)")
+    parser.add_argument("--synthesize", action="store_true", help="also run the final orchestrator report per game")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds before a game is recorded as failed")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="CASSETTE", help="record all LLM traffic to this JSONL cassette")
+    cassette_group.add_argument("--replay", metavar="CASSETTE", help="answer LLM calls from this cassette instead of the API")
+    parser.add_argument("--zero-latency", action="store_true", help="replay without the recorded latencies")
+    args = parser.parse_args()
+
+    base_overrides = {}
+    if args.record or args.replay:
+        base_overrides = {"cassette.mode": "record" if args.record else "replay",
+                          "cassette.path": args.record or args.replay}
+    if args.replay and args.zero_latency:
+        base_overrides["cassette.latency"] = "zero"
+
+    seeds = parse_seeds(args.seeds)
+    run_experiments(seeds, grid=_load_grid(args.grid), runs_per_seed=args.runs, workers=args.workers,
+                    results_path=args.output, synthesize=args.synthesize, config_path=args.config,
+                    base_overrides=base_overrides, timeout=args.timeout)
+
+    # Aggregate over the whole results file, including runs finished before a restart
     print("\n=== Experiment Results ===")
-    print(f"Seed: {results['seed']}")
-    print(f"Number of runs: {results['num_runs']}")
-    print(f"Valid runs: {results['valid_runs']}")
-    print(f"Average score: {results['average_score']:.1f}%")
-    print(f"Maximum score: {results['max_score']:.1f}%")
-    print(f"Minimum score: {results['min_score']:.1f}%")
-    print(f"All scores: {results['scores']}")
-    
-    # Save results to file
-    with open(f"experiment_results_seed_{seed}.json", "w") as f:
-        json.dump(results, f, indent=2)
-    
-    print(f"\nResults saved to experiment_results_seed_{seed}.json")
+    by_config: Dict[str, List[Dict[str, Any]]] = {}
+    for record in read_results(args.output):
+        if record.get("seed") in seeds:
+            by_config.setdefault(record["config_key"], []).append(record)
+    for key, records in sorted(by_config.items()):
+        stats = summarize(records)
+        print(f"Config {key} {json.dumps(records[0].get('overrides', {}))}")
+        print(f"  Valid runs: {stats['valid_runs']}/{stats['num_runs']}")
+        print(f"  Average score: {stats['average_score']:.1f}%")
+        print(f"  Maximum score: {stats['max_score']:.1f}%")
+        print(f"  Minimum score: {stats['min_score']:.1f}%")
+        print(f"  Transcript tokens saved: {stats['transcript_tokens_saved_pct']:.1f}%")
+        if stats["speculation_hit_rate"] is not None:
+            print(f"  Speculation hit rate: {stats['speculation_hit_rate'] * 100:.1f}% "
+                  f"({stats['speculation_invalidated']} dropped by state-changing replies)")
+
+    print(f"\nResults saved to {args.output}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,16 +1,20 @@
 import json
-import yaml
 import time
+import asyncio
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import List, Dict, Any
-from agent import OpenRouterAgent
+from client_pool import load_config, create_agent
+from token_budget import count_tokens, truncate_to_tokens
+import metrics
 
 class TaskOrchestrator:
     def __init__(self, config_path="config.yaml", silent=False):
         # Load configuration
-        with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
+        self.config_path = config_path
+        self.config = load_config(config_path)
         
         self.num_agents = self.config['orchestrator']['parallel_agents']
         self.task_timeout = self.config['orchestrator']['task_timeout']
@@ -21,28 +25,22 @@ class TaskOrchestrator:
         self.agent_progress = {}
         self.agent_results = {}
         self.progress_lock = threading.Lock()
-    
-    def decompose_task(self, user_input: str, num_agents: int) -> List[str]:
-        """Use AI to dynamically generate different questions based on user input"""
-        
-        # Create question generation agent
-        question_agent = OpenRouterAgent(silent=True)
         
-        # Get question generation prompt from config
+        # Token/latency accounting, labelled per query and phase
+        self.metrics = metrics.get_recorder()
+        self.query_id = None
+    
+    def _question_generation_prompt(self, user_input: str, num_agents: int) -> str:
+        """Format the configured question generation prompt"""
         prompt_template = self.config['orchestrator']['question_generation_prompt']
-        generation_prompt = prompt_template.format(
+        return prompt_template.format(
             user_input=user_input,
             num_agents=num_agents
         )
-        
-        # Remove task completion tool to avoid issues
-        question_agent.tools = [tool for tool in question_agent.tools if tool.get('function', {}).get('name') != 'mark_task_complete']
-        question_agent.tool_mapping = {name: func for name, func in question_agent.tool_mapping.items() if name != 'mark_task_complete'}
-        
+    
+    def _parse_questions(self, response: str, user_input: str, num_agents: int) -> List[str]:
+        """Parse the JSON question list, falling back to simple variations if the AI output is unusable"""
         try:
-            # Get AI-generated questions
-            response = question_agent.run(generation_prompt)
-            
             # Parse JSON response
             questions = json.loads(response.strip())
             
@@ -53,13 +51,26 @@ class TaskOrchestrator:
             return questions
             
         except (json.JSONDecodeError, ValueError) as e:
-            # Fallback: create simple variations if AI fails
-            return [
+            # Fallback: create simple variations if AI fails (cycled when there are more than 4 agents)
+            variations = [
                 f"Research comprehensive information about: {user_input}",
                 f"Analyze and provide insights about: {user_input}",
                 f"Find alternative perspectives on: {user_input}",
                 f"Verify and cross-check facts about: {user_input}"
-            ][:num_agents]
+            ]
+            return [variations[i % len(variations)] for i in range(num_agents)]
+    
+    def decompose_task(self, user_input: str, num_agents: int) -> List[str]:
+        """Use AI to dynamically generate different questions based on user input"""
+        
+        # Create question generation agent (task completion tool removed to avoid issues)
+        question_agent = create_agent(self.config_path, exclude_tools=("mark_task_complete",),
+                                      phase="decompose", query_id=self.query_id)
+        generation_prompt = self._question_generation_prompt(user_input, num_agents)
+        
+        # Get AI-generated questions
+        response = question_agent.run(generation_prompt)
+        return self._parse_questions(response, user_input, num_agents)
     
     def update_agent_progress(self, agent_id: int, status: str, result: str = None):
         """Thread-safe progress tracking"""
@@ -68,6 +79,11 @@ class TaskOrchestrator:
             if result is not None:
                 self.agent_results[agent_id] = result
     
+    def _model_for_agent(self, agent_id: int):
+        """Get the model for this specific agent from config"""
+        model_key = f"model{agent_id + 1}"
+        return self.config['openrouter'].get(model_key)
+    
     def run_agent_parallel(self, agent_id: int, subtask: str) -> Dict[str, Any]:
         """
         Run a single agent with the given subtask.
@@ -77,11 +93,9 @@ class TaskOrchestrator:
             self.update_agent_progress(agent_id, "PROCESSING...")
             
             # Use simple agent like in main.py
-            agent = OpenRouterAgent(silent=True)
+            agent = create_agent(self.config_path, phase="agent", query_id=self.query_id)
             
-            # Get the model for this specific agent from config
-            model_key = f"model{agent_id + 1}"
-            model = self.config['openrouter'].get(model_key)
+            model = self._model_for_agent(agent_id)
             
             start_time = time.time()
             response = agent.run(subtask, model)
@@ -118,68 +132,239 @@ class TaskOrchestrator:
         # Extract responses for aggregation
         responses = [r["response"] for r in successful_results]
         
-        if self.aggregation_strategy == "consensus":
-            return self._aggregate_consensus(responses, successful_results)
+        if self.aggregation_strategy == "tree":
+            # Reduce in parallel until the synthesis prompt fits the context window
+            return self._aggregate_consensus(self._tree_reduce(responses), successful_results)
         else:
             # Default to consensus
             return self._aggregate_consensus(responses, successful_results)
     
-    def _aggregate_consensus(self, responses: List[str], _results: List[Dict[str, Any]]) -> str:
-        """
-        Use one final AI call to synthesize all agent responses into a coherent answer.
-        """
-        if len(responses) == 1:
-            return responses[0]
-        
-        # Create synthesis agent to combine all responses
-        synthesis_agent = OpenRouterAgent(silent=True)
-        
+    @staticmethod
+    def _format_responses_prompt(prompt_template: str, responses: List[str]) -> str:
+        """Format a synthesis/reduction prompt template around a list of responses"""
         # Build agent responses section
         agent_responses_text = ""
         for i, response in enumerate(responses, 1):
             agent_responses_text += f"=== AGENT {i} RESPONSE ===\n{response}\n\n"
         
-        # Get synthesis prompt from config and format it
-        synthesis_prompt_template = self.config['orchestrator']['synthesis_prompt']
-        synthesis_prompt = synthesis_prompt_template.format(
+        return prompt_template.format(
             num_responses=len(responses),
             agent_responses=agent_responses_text
         )
+    
+    def _build_synthesis_prompt(self, responses: List[str]) -> str:
+        """Format the configured synthesis prompt around all agent responses"""
+        return self._format_responses_prompt(self.config['orchestrator']['synthesis_prompt'], responses)
+    
+    def _build_reduction_prompt(self, responses: List[str]) -> str:
+        """Format the prompt that merges one group of responses in tree aggregation"""
+        orchestrator_config = self.config['orchestrator']
+        prompt_template = orchestrator_config.get('reduction_prompt') or orchestrator_config['synthesis_prompt']
+        return self._format_responses_prompt(prompt_template, responses)
+    
+    # ===== tree (hierarchical map-reduce) aggregation =====
+    
+    def _tree_settings(self) -> Dict[str, int]:
+        tree_config = self.config['orchestrator'].get('tree') or {}
+        return {
+            "context_window": int(tree_config.get('context_window', 128000)),
+            "reserve_tokens": int(tree_config.get('reserve_tokens', 8000)),
+            "fanout": max(2, int(tree_config.get('fanout', 4))),
+        }
+    
+    def _prompt_budget(self) -> int:
+        """Prompt tokens available to one synthesis or reduction call"""
+        settings = self._tree_settings()
+        return settings["context_window"] - settings["reserve_tokens"]
+    
+    def _synthesis_fits(self, responses: List[str]) -> bool:
+        model = self.config['openrouter']['model']
+        return count_tokens(self._build_synthesis_prompt(responses), model) <= self._prompt_budget()
+    
+    def _reduction_groups(self, responses: List[str]) -> List[List[str]]:
+        """
+        Pack responses, in order, into groups of at most `fanout` whose reduction prompt fits
+        the budget. Each response is capped at half the space so any two fit together, so
+        every group but the last merges at least two responses and each level shrinks the list.
+        """
+        model = self.config['openrouter']['model']
+        fanout = self._tree_settings()["fanout"]
+        available = self._prompt_budget() - count_tokens(self._build_reduction_prompt([]), model)
+        # Leave room for the "=== AGENT n RESPONSE ===" header of each response
+        per_response = max(1, available // 2 - 16)
         
-        # Completely remove all tools from synthesis agent to force direct response
-        synthesis_agent.tools = []
-        synthesis_agent.tool_mapping = {}
+        groups = []
+        current, current_tokens = [], 0
+        for response in responses:
+            response = truncate_to_tokens(response, per_response, model)
+            tokens = count_tokens(response, model) + 16
+            if current and (len(current) >= fanout or current_tokens + tokens > available):
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(response)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+    
+    def _reduce_group(self, group: List[str]) -> str:
+        """Merge one group of responses into a single intermediate answer"""
+        if len(group) == 1:
+            return group[0]
+        reduction_agent = create_agent(self.config_path, with_tools=False, phase="reduce", query_id=self.query_id)
+        try:
+            return reduction_agent.run(self._build_reduction_prompt(group))
+        except Exception:
+            # Keep the material; the next level truncates it to fit
+            return "\n\n".join(group)
+    
+    def _tree_reduce(self, responses: List[str]) -> List[str]:
+        """Reduce responses level by level, all groups of a level in parallel, until synthesis fits"""
+        while len(responses) > 1 and not self._synthesis_fits(responses):
+            groups = self._reduction_groups(responses)
+            with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+                responses = list(executor.map(self._reduce_group, groups))
+        return responses
+    
+    async def _areduce_group(self, group: List[str]) -> str:
+        """Async counterpart of _reduce_group"""
+        if len(group) == 1:
+            return group[0]
+        reduction_agent = create_agent(self.config_path, asynchronous=True, with_tools=False,
+                                       phase="reduce", query_id=self.query_id)
+        try:
+            return await reduction_agent.run(self._build_reduction_prompt(group))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return "\n\n".join(group)
+    
+    async def _atree_reduce(self, responses: List[str]) -> List[str]:
+        """Async counterpart of _tree_reduce"""
+        while len(responses) > 1 and not self._synthesis_fits(responses):
+            groups = self._reduction_groups(responses)
+            responses = list(await asyncio.gather(*(self._areduce_group(group) for group in groups)))
+        return responses
+    
+    @staticmethod
+    def _concatenate_responses(responses: List[str], error: Exception) -> str:
+        """Fallback used when synthesis fails: concatenate responses"""
+        # Log the error for debugging
+        print(f"\n🚨 SYNTHESIS FAILED: {str(error)}")
+        print("📋 Falling back to concatenated responses\n")
+        combined = []
+        for i, response in enumerate(responses, 1):
+            combined.append(f"=== Agent {i} Response ===")
+            combined.append(response)
+            combined.append("")
+        return "\n".join(combined)
+    
+    def _aggregate_consensus(self, responses: List[str], results: List[Dict[str, Any]]) -> str:
+        """
+        Use one final AI call to synthesize all agent responses into a coherent answer.
+        """
+        # A lone agent answer is final as is; tree-reduced notes still need the synthesis call
+        if len(results) == 1:
+            return responses[0]
+        
+        # Create synthesis agent without any tools to force a direct response
+        synthesis_agent = create_agent(self.config_path, with_tools=False, phase="synthesis", query_id=self.query_id)
+        synthesis_prompt = self._build_synthesis_prompt(responses)
         
         # Get the synthesized response
         try:
             final_answer = synthesis_agent.run(synthesis_prompt)
             return final_answer
         except Exception as e:
-            # Log the error for debugging
-            print(f"\n🚨 SYNTHESIS FAILED: {str(e)}")
-            print("📋 Falling back to concatenated responses\n")
-            # Fallback: if synthesis fails, concatenate responses
-            combined = []
-            for i, response in enumerate(responses, 1):
-                combined.append(f"=== Agent {i} Response ===")
-                combined.append(response)
-                combined.append("")
-            return "\n".join(combined)
+            return self._concatenate_responses(responses, e)
+    
+    def _stream_aggregate(self, agent_results: List[Dict[str, Any]]):
+        """
+        Streaming counterpart of aggregate_results: yields {"type": "synthesis_delta"} events
+        while the synthesis model generates, then {"type": "final", "content"}.
+        """
+        successful_results = [r for r in agent_results if r["status"] == "success"]
+        if not successful_results:
+            final_answer = "All agents failed to provide results. Please try again."
+            yield {"type": "synthesis_delta", "delta": final_answer}
+            yield {"type": "final", "content": final_answer}
+            return
+        
+        responses = [r["response"] for r in successful_results]
+        if self.aggregation_strategy == "tree":
+            responses = self._tree_reduce(responses)
+        # A lone agent answer is final as is; tree-reduced notes still need the synthesis call
+        if len(successful_results) == 1:
+            yield {"type": "synthesis_delta", "delta": responses[0]}
+            yield {"type": "final", "content": responses[0]}
+            return
+        
+        synthesis_agent = create_agent(self.config_path, with_tools=False, phase="synthesis", query_id=self.query_id)
+        final_answer = None
+        streamed = False
+        try:
+            for event in synthesis_agent.stream(self._build_synthesis_prompt(responses)):
+                if event["type"] == "content":
+                    streamed = True
+                    yield {"type": "synthesis_delta", "delta": event["delta"]}
+                elif event["type"] == "done":
+                    final_answer = event["content"]
+        except Exception as e:
+            if streamed:
+                raise
+            final_answer = self._concatenate_responses(responses, e)
+            yield {"type": "synthesis_delta", "delta": final_answer}
+        yield {"type": "final", "content": final_answer}
+    
+    def query_metrics(self, query_id: str = None) -> Dict[str, Any]:
+        """Token/latency totals (overall and per phase) for the last or given query"""
+        return self.metrics.query(query_id or self.query_id)
     
     def get_progress_status(self) -> Dict[int, str]:
         """Get current progress status for all agents"""
         with self.progress_lock:
             return self.agent_progress.copy()
     
+    def _iter_agent_results(self, subtasks: List[str]):
+        """Run all agents in parallel and yield each result as it completes"""
+        with ThreadPoolExecutor(max_workers=self.num_agents) as executor:
+            # Submit all agent tasks
+            future_to_agent = {
+                executor.submit(self.run_agent_parallel, i, subtasks[i]): i 
+                for i in range(self.num_agents)
+            }
+            
+            # Collect results as they complete
+            for future in as_completed(future_to_agent, timeout=self.task_timeout):
+                yield self._future_result(future, future_to_agent[future])
+    
+    def _future_result(self, future, agent_id: int) -> Dict[str, Any]:
+        """Result of a finished agent future, or a timeout/failure result"""
+        try:
+            return future.result()
+        except Exception as e:
+            return {
+                "agent_id": agent_id,
+                "status": "timeout",
+                "response": f"Agent {agent_id + 1} timed out or failed: {str(e)}",
+                "execution_time": self.task_timeout
+            }
+    
     def orchestrate(self, user_input: str):
         """
         Main orchestration method.
         Takes user input, delegates to parallel agents, and returns aggregated result.
         """
+        if self.aggregation_strategy == "incremental":
+            # Return as soon as the quorum answer is ready; late deltas are only streamed
+            for event in self.orchestrate_stream(user_input):
+                if event["type"] == "final":
+                    return event["content"]
         
         # Reset progress tracking
         self.agent_progress = {}
         self.agent_results = {}
+        self.query_id = uuid.uuid4().hex
         
         # Decompose task into subtasks
         subtasks = self.decompose_task(user_input, self.num_agents)
@@ -189,28 +374,7 @@ class TaskOrchestrator:
             self.agent_progress[i] = "QUEUED"
         
         # Execute agents in parallel
-        agent_results = []
-        
-        with ThreadPoolExecutor(max_workers=self.num_agents) as executor:
-            # Submit all agent tasks
-            future_to_agent = {
-                executor.submit(self.run_agent_parallel, i, subtasks[i]): i 
-                for i in range(self.num_agents)
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_agent, timeout=self.task_timeout):
-                try:
-                    result = future.result()
-                    agent_results.append(result)
-                except Exception as e:
-                    agent_id = future_to_agent[future]
-                    agent_results.append({
-                        "agent_id": agent_id,
-                        "status": "timeout",
-                        "response": f"Agent {agent_id + 1} timed out or failed: {str(e)}",
-                        "execution_time": self.task_timeout
-                    })
+        agent_results = list(self._iter_agent_results(subtasks))
         
         # Sort results by agent_id for consistent output
         agent_results.sort(key=lambda x: x["agent_id"])
@@ -218,4 +382,350 @@ class TaskOrchestrator:
         # Aggregate results
         final_result = self.aggregate_results(agent_results)
         
-        return final_result
\ No newline at end of file
+        return final_result
+    
+    def orchestrate_stream(self, user_input: str):
+        """
+        Streaming orchestration. Yields events instead of returning one string:
+        {"type": "subtasks"}, one {"type": "agent_result"} per agent as it finishes,
+        {"type": "synthesis_delta"} chunks of the final answer and a closing {"type": "final"}.
+        Use format_sse() to forward events to an HTTP client as server-sent events.
+        """
+        self.agent_progress = {}
+        self.agent_results = {}
+        self.query_id = uuid.uuid4().hex
+        
+        subtasks = self.decompose_task(user_input, self.num_agents)
+        yield {"type": "subtasks", "subtasks": subtasks}
+        
+        for i in range(self.num_agents):
+            self.agent_progress[i] = "QUEUED"
+        
+        if self.aggregation_strategy == "incremental":
+            yield from self._stream_incremental(subtasks)
+            return
+        
+        agent_results = []
+        for result in self._iter_agent_results(subtasks):
+            agent_results.append(result)
+            yield {"type": "agent_result", **result}
+        
+        agent_results.sort(key=lambda x: x["agent_id"])
+        yield from self._stream_aggregate(agent_results)
+    
+    # ===== incremental (quorum/deadline) aggregation =====
+    
+    def _incremental_settings(self) -> Dict[str, Any]:
+        incremental_config = self.config['orchestrator'].get('incremental') or {}
+        return {
+            "quorum": max(1, min(self.num_agents, int(incremental_config.get('quorum', self.num_agents)))),
+            "deadline": float(incremental_config.get('deadline', self.task_timeout)),
+            "late_answers": incremental_config.get('late_answers', 'ignore'),
+        }
+    
+    def _build_late_delta_prompt(self, answer: str, response: str) -> str:
+        prompt_template = self.config['orchestrator']['incremental']['late_delta_prompt']
+        return prompt_template.format(answer=answer, agent_response=response)
+    
+    @staticmethod
+    def _late_delta_text(reply: str) -> str:
+        """Delta text from a late-answer reply; empty when the agent added nothing new"""
+        reply = (reply or "").strip()
+        return "" if not reply or reply.upper().startswith("NO_CHANGES") else reply
+    
+    def _late_delta(self, answer: str, response: str) -> str:
+        """Ask for only the additions/corrections a late agent response brings to the answer"""
+        delta_agent = create_agent(self.config_path, with_tools=False, phase="synthesis", query_id=self.query_id)
+        try:
+            return self._late_delta_text(delta_agent.run(self._build_late_delta_prompt(answer, response)))
+        except Exception:
+            return ""
+    
+    def _stream_incremental(self, subtasks: List[str]):
+        """
+        Synthesize once `quorum` agents have succeeded, or once `deadline` seconds have passed
+        with at least one success, instead of waiting for the slowest agent. Agents still running
+        at that point are left to finish in the background; with late_answers: "delta" their
+        answers are turned into {"type": "late_delta"} events after the final answer.
+        """
+        settings = self._incremental_settings()
+        start = time.monotonic()
+        quorum_at = start + settings["deadline"]
+        give_up_at = start + self.task_timeout
+        
+        # No `with` block: leaving it would wait for the stragglers
+        executor = ThreadPoolExecutor(max_workers=self.num_agents)
+        future_to_agent = {
+            executor.submit(self.run_agent_parallel, i, subtasks[i]): i
+            for i in range(self.num_agents)
+        }
+        executor.shutdown(wait=False)
+        
+        pending = set(future_to_agent)
+        agent_results = []
+        successes = 0
+        while pending and successes < settings["quorum"]:
+            # Past the deadline only the first success is still awaited
+            wake_at = give_up_at if successes == 0 else min(quorum_at, give_up_at)
+            timeout = wake_at - time.monotonic()
+            if timeout <= 0:
+                break
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = self._future_result(future, future_to_agent[future])
+                successes += result["status"] == "success"
+                agent_results.append(result)
+                yield {"type": "agent_result", **result}
+        
+        agent_results.sort(key=lambda x: x["agent_id"])
+        answer = None
+        for event in self._stream_aggregate(agent_results):
+            if event["type"] == "final":
+                answer = event["content"]
+            yield event
+        
+        if settings["late_answers"] != "delta" or not pending:
+            return
+        try:
+            for future in as_completed(pending, timeout=max(0.0, give_up_at - time.monotonic())):
+                result = self._future_result(future, future_to_agent[future])
+                yield {"type": "agent_result", **result}
+                if result["status"] != "success":
+                    continue
+                delta = self._late_delta(answer, result["response"])
+                if delta:
+                    answer = f"{answer}\n\n{delta}"
+                    yield {"type": "late_delta", "agent_id": result["agent_id"], "delta": delta}
+        except FutureTimeoutError:
+            pass
+    
+    @staticmethod
+    def format_sse(event: Dict[str, Any]) -> str:
+        """Encode one orchestration event as a server-sent event frame"""
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    # ===== asyncio execution path =====
+    
+    async def adecompose_task(self, user_input: str, num_agents: int) -> List[str]:
+        """Async counterpart of decompose_task"""
+        question_agent = create_agent(self.config_path, asynchronous=True, exclude_tools=("mark_task_complete",),
+                                      phase="decompose", query_id=self.query_id)
+        generation_prompt = self._question_generation_prompt(user_input, num_agents)
+        response = await question_agent.run(generation_prompt)
+        return self._parse_questions(response, user_input, num_agents)
+    
+    async def arun_agent(self, agent_id: int, subtask: str) -> Dict[str, Any]:
+        """
+        Async counterpart of run_agent_parallel, bounded by the per-agent task_timeout.
+        Returns result dictionary with agent_id, status, and response.
+        """
+        start_time = time.time()
+        try:
+            self.update_agent_progress(agent_id, "PROCESSING...")
+            agent = create_agent(self.config_path, asynchronous=True, phase="agent", query_id=self.query_id)
+            response = await asyncio.wait_for(
+                agent.run(subtask, self._model_for_agent(agent_id)),
+                timeout=self.task_timeout
+            )
+            execution_time = time.time() - start_time
+            self.update_agent_progress(agent_id, "COMPLETED", response)
+            return {
+                "agent_id": agent_id,
+                "status": "success",
+                "response": response,
+                "execution_time": execution_time
+            }
+        except asyncio.TimeoutError:
+            self.update_agent_progress(agent_id, "FAILED (timeout)")
+            return {
+                "agent_id": agent_id,
+                "status": "timeout",
+                "response": f"Agent {agent_id + 1} timed out after {self.task_timeout}s",
+                "execution_time": self.task_timeout
+            }
+        except Exception as e:
+            self.update_agent_progress(agent_id, "FAILED")
+            return {
+                "agent_id": agent_id,
+                "status": "error",
+                "response": f"Error: {str(e)}",
+                "execution_time": 0
+            }
+    
+    async def aaggregate_results(self, agent_results: List[Dict[str, Any]]) -> str:
+        """Async counterpart of aggregate_results"""
+        successful_results = [r for r in agent_results if r["status"] == "success"]
+        
+        if not successful_results:
+            return "All agents failed to provide results. Please try again."
+        
+        responses = [r["response"] for r in successful_results]
+        if self.aggregation_strategy == "tree":
+            responses = await self._atree_reduce(responses)
+        return await self._aaggregate_consensus(responses, successful_results)
+    
+    async def _aaggregate_consensus(self, responses: List[str], results: List[Dict[str, Any]]) -> str:
+        """Async counterpart of _aggregate_consensus"""
+        if len(results) == 1:
+            return responses[0]
+        
+        synthesis_agent = create_agent(self.config_path, asynchronous=True, with_tools=False,
+                                       phase="synthesis", query_id=self.query_id)
+        try:
+            return await synthesis_agent.run(self._build_synthesis_prompt(responses))
+        except Exception as e:
+            return self._concatenate_responses(responses, e)
+    
+    async def aorchestrate(self, user_input: str):
+        """
+        asyncio orchestration: decompose, fan out all agents on the running event loop
+        with a per-agent timeout, then synthesize.
+        Progress tracking is per orchestrator, so use one TaskOrchestrator per concurrent query.
+        """
+        if self.aggregation_strategy == "incremental":
+            stream = self.aorchestrate_stream(user_input)
+            try:
+                async for event in stream:
+                    if event["type"] == "final":
+                        return event["content"]
+            finally:
+                # Cancels agents that missed the quorum
+                await stream.aclose()
+        
+        self.agent_progress = {}
+        self.agent_results = {}
+        self.query_id = uuid.uuid4().hex
+        
+        subtasks = await self.adecompose_task(user_input, self.num_agents)
+        
+        for i in range(self.num_agents):
+            self.agent_progress[i] = "QUEUED"
+        
+        # arun_agent never raises, so gather preserves agent order
+        agent_results = await asyncio.gather(
+            *(self.arun_agent(i, subtasks[i]) for i in range(self.num_agents))
+        )
+        
+        return await self.aaggregate_results(list(agent_results))
+    
+    async def _astream_aggregate(self, agent_results: List[Dict[str, Any]]):
+        """Async counterpart of _stream_aggregate"""
+        successful_results = [r for r in agent_results if r["status"] == "success"]
+        if not successful_results:
+            final_answer = "All agents failed to provide results. Please try again."
+            yield {"type": "synthesis_delta", "delta": final_answer}
+            yield {"type": "final", "content": final_answer}
+            return
+        
+        responses = [r["response"] for r in successful_results]
+        if self.aggregation_strategy == "tree":
+            responses = await self._atree_reduce(responses)
+        if len(successful_results) == 1:
+            yield {"type": "synthesis_delta", "delta": responses[0]}
+            yield {"type": "final", "content": responses[0]}
+            return
+        
+        synthesis_agent = create_agent(self.config_path, asynchronous=True, with_tools=False,
+                                       phase="synthesis", query_id=self.query_id)
+        final_answer = None
+        streamed = False
+        try:
+            async for event in synthesis_agent.stream(self._build_synthesis_prompt(responses)):
+                if event["type"] == "content":
+                    streamed = True
+                    yield {"type": "synthesis_delta", "delta": event["delta"]}
+                elif event["type"] == "done":
+                    final_answer = event["content"]
+        except Exception as e:
+            if streamed:
+                raise
+            final_answer = self._concatenate_responses(responses, e)
+            yield {"type": "synthesis_delta", "delta": final_answer}
+        yield {"type": "final", "content": final_answer}
+    
+    async def aorchestrate_stream(self, user_input: str):
+        """Async iterator counterpart of orchestrate_stream, yielding the same events"""
+        self.agent_progress = {}
+        self.agent_results = {}
+        self.query_id = uuid.uuid4().hex
+        
+        subtasks = await self.adecompose_task(user_input, self.num_agents)
+        yield {"type": "subtasks", "subtasks": subtasks}
+        
+        for i in range(self.num_agents):
+            self.agent_progress[i] = "QUEUED"
+        
+        if self.aggregation_strategy == "incremental":
+            async for event in self._astream_incremental(subtasks):
+                yield event
+            return
+        
+        agent_results = []
+        for next_result in asyncio.as_completed([self.arun_agent(i, subtasks[i]) for i in range(self.num_agents)]):
+            result = await next_result
+            agent_results.append(result)
+            yield {"type": "agent_result", **result}
+        
+        agent_results.sort(key=lambda x: x["agent_id"])
+        async for event in self._astream_aggregate(agent_results):
+            yield event
+    
+    async def _alate_delta(self, answer: str, response: str) -> str:
+        """Async counterpart of _late_delta"""
+        delta_agent = create_agent(self.config_path, asynchronous=True, with_tools=False,
+                                   phase="synthesis", query_id=self.query_id)
+        try:
+            return self._late_delta_text(await delta_agent.run(self._build_late_delta_prompt(answer, response)))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return ""
+    
+    async def _astream_incremental(self, subtasks: List[str]):
+        """
+        Async counterpart of _stream_incremental. Agents that are no longer needed (late
+        answers ignored, or the consumer stopped iterating) are cancelled.
+        """
+        settings = self._incremental_settings()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        quorum_at = start + settings["deadline"]
+        
+        pending = {asyncio.ensure_future(self.arun_agent(i, subtasks[i])) for i in range(self.num_agents)}
+        try:
+            agent_results = []
+            successes = 0
+            while pending and successes < settings["quorum"]:
+                # arun_agent enforces task_timeout itself, so without a success we wait it out
+                timeout = None if successes == 0 else quorum_at - loop.time()
+                if timeout is not None and timeout <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    successes += result["status"] == "success"
+                    agent_results.append(result)
+                    yield {"type": "agent_result", **result}
+            
+            agent_results.sort(key=lambda x: x["agent_id"])
+            answer = None
+            async for event in self._astream_aggregate(agent_results):
+                if event["type"] == "final":
+                    answer = event["content"]
+                yield event
+            
+            if settings["late_answers"] != "delta":
+                return
+            for next_result in asyncio.as_completed(pending):
+                result = await next_result
+                yield {"type": "agent_result", **result}
+                if result["status"] != "success":
+                    continue
+                delta = await self._alate_delta(answer, result["response"])
+                if delta:
+                    answer = f"{answer}\n\n{delta}"
+                    yield {"type": "late_delta", "agent_id": result["agent_id"], "delta": delta}
+            pending = set()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,344 @@
+"""
+Process-wide admission control for LLM requests.
+
+All agents (threads and event loops alike) acquire a slot here before calling the API:
+
+- per-model token buckets (requests_per_minute / burst) keep us under provider quotas
+- per-model AIMD concurrency limits: +1/limit per fast success, halved on 429, shrunk
+  when completions are slower than latency_target
+- Retry-After from a 429 pauses the whole model instead of every caller retrying blindly
+- a global max_in_flight cap across models
+- waiting requests are served by priority, derived from the agent's phase:
+  synthesis/reduce before agent turns before new decompositions
+"""
+import json
+import bisect
+import itertools
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Lower runs first
+PRIORITIES = {"synthesis": 0, "reduce": 0, "agent": 1, "game_turn": 1, "decompose": 2}
+DEFAULT_PRIORITY = 1
+
+
+class Lease:
+    """One granted request slot; hand it back with release() (later calls are no-ops)"""
+
+    __slots__ = ("model", "granted_at", "_scheduler", "_released")
+
+    def __init__(self, scheduler: "Scheduler", model: str):
+        self.model = model
+        self.granted_at = time.monotonic()
+        self._scheduler = scheduler
+        self._released = False
+
+    def release(self, latency: Optional[float] = None, error: Optional[BaseException] = None,
+                feedback: bool = True):
+        if not self._released:
+            self._released = True
+            self._scheduler.release(self, latency=latency, error=error, feedback=feedback)
+
+
+class _ModelState:
+    def __init__(self, settings: Dict[str, Any]):
+        self.rate = settings["requests_per_minute"] / 60.0
+        self.burst = max(1.0, float(settings["burst"]))
+        self.tokens = self.burst
+        self.refilled_at = time.monotonic()
+        self.min_limit = settings["min_concurrency"]
+        self.max_limit = settings["max_concurrency"]
+        self.limit = float(settings["initial_concurrency"])
+        self.latency_target = settings["latency_target"]
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.counters = {"granted": 0, "rate_limited": 0, "slow": 0}
+
+    def refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def ready_at(self, now: float) -> Optional[float]:
+        """When a request could next be admitted on time grounds; None if only a release can help"""
+        if self.in_flight >= int(self.limit):
+            return None
+        ready = max(now, self.blocked_until)
+        if self.rate > 0 and self.tokens < 1:
+            ready = max(ready, now + (1 - self.tokens) / self.rate)
+        return ready
+
+
+class _Waiter:
+    __slots__ = ("model", "grant", "abandoned")
+
+    def __init__(self, model: str, grant: Callable[[Lease], None]):
+        self.model = model
+        self.grant = grant
+        self.abandoned = False
+
+
+class Scheduler:
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings = settings
+        self.max_in_flight = settings["max_in_flight"]
+        self._cond = threading.Condition()
+        self._models: Dict[str, _ModelState] = {}
+        self._waiting: List[tuple] = []  # sorted (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._dispatcher: Optional[threading.Thread] = None
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            overrides = (self.settings.get("models") or {}).get(model) or {}
+            state = self._models[model] = _ModelState({**self.settings, **overrides})
+        return state
+
+    # ----- admission -----
+
+    def _enqueue(self, model: str, phase: str, grant: Callable[[Lease], None]) -> _Waiter:
+        waiter = _Waiter(model, grant)
+        with self._cond:
+            self._state(model)
+            bisect.insort(self._waiting, (PRIORITIES.get(phase, DEFAULT_PRIORITY), next(self._seq), waiter))
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="llm-scheduler", daemon=True)
+                self._dispatcher.start()
+            self._cond.notify()
+        return waiter
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """Grant every admissible waiter in priority order; return when to look again"""
+        wake_at = None
+        remaining = []
+        for entry in self._waiting:
+            waiter = entry[2]
+            if waiter.abandoned:
+                continue
+            state = self._models[waiter.model]
+            state.refill(now)
+            ready = state.ready_at(now)
+            if self._in_flight < self.max_in_flight and ready is not None and ready <= now:
+                try:
+                    waiter.grant(Lease(self, waiter.model))
+                except RuntimeError:
+                    # The waiter's event loop has been closed
+                    continue
+                if state.rate > 0:
+                    state.tokens -= 1
+                state.in_flight += 1
+                state.counters["granted"] += 1
+                self._in_flight += 1
+                continue
+            if ready is not None and ready > now:
+                wake_at = ready if wake_at is None else min(wake_at, ready)
+            remaining.append(entry)
+        self._waiting = remaining
+        return wake_at
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wake_at = self._dispatch(now)
+                self._cond.wait(timeout=None if wake_at is None else max(0.0, wake_at - now))
+
+    def acquire(self, model: str, phase: str = "agent", timeout: Optional[float] = None) -> Lease:
+        """Block until a slot for `model` is granted"""
+        granted = []
+        event = threading.Event()
+
+        def grant(lease):
+            granted.append(lease)
+            event.set()
+
+        waiter = self._enqueue(model, phase, grant)
+        if not event.wait(timeout):
+            with self._cond:
+                waiter.abandoned = True
+            if not granted:
+                raise TimeoutError(f"no request slot for {model} within {timeout}s")
+        return granted[0]
+
+    async def acquire_async(self, model: str, phase: str = "agent") -> Lease:
+        """Await a slot for `model` without blocking the event loop"""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def deliver(lease):
+            if future.cancelled():
+                lease.release(feedback=False)
+            else:
+                future.set_result(lease)
+
+        waiter = self._enqueue(model, phase, lambda lease: loop.call_soon_threadsafe(deliver, lease))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            with self._cond:
+                waiter.abandoned = True
+            if future.done() and not future.cancelled():
+                # Granted just before the cancellation landed
+                future.result().release(feedback=False)
+            raise
+
+    # ----- feedback -----
+
+    def release(self, lease: Lease, latency: Optional[float] = None, error: Optional[BaseException] = None,
+                feedback: bool = True):
+        """
+        Return a slot. latency (successful calls only) and error drive the model's AIMD limit;
+        a 429 also pauses the model for its Retry-After. feedback=False (cancelled or abandoned
+        calls) frees the slot without touching the limit.
+        """
+        now = time.monotonic()
+        with self._cond:
+            state = self._models[lease.model]
+            state.in_flight -= 1
+            self._in_flight -= 1
+            if not feedback:
+                pass
+            elif error is not None and is_rate_limit(error):
+                state.counters["rate_limited"] += 1
+                state.limit = max(state.min_limit, state.limit / 2)
+                state.tokens = min(state.tokens, 0.0)
+                wait = min(retry_after(error, self.settings["default_retry_after"]), self.settings["max_retry_after"])
+                state.blocked_until = max(state.blocked_until, now + wait)
+            elif latency is not None and state.latency_target and latency > state.latency_target:
+                state.counters["slow"] += 1
+                state.limit = max(state.min_limit, state.limit * 0.9)
+            elif error is None:
+                state.limit = min(state.max_limit, state.limit + 1 / state.limit)
+            self._cond.notify()
+
+    def blocked_for(self, model: str) -> float:
+        """Seconds until a Retry-After pause on `model` ends"""
+        with self._cond:
+            state = self._models.get(model)
+            return max(0.0, state.blocked_until - time.monotonic()) if state else 0.0
+
+    def set_max_in_flight(self, max_in_flight: int):
+        """Change the global cap on concurrent requests (e.g. for a batch run)"""
+        with self._cond:
+            self.max_in_flight = max(1, int(max_in_flight))
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "in_flight": self._in_flight,
+                "waiting": sum(1 for entry in self._waiting if not entry[2].abandoned),
+                "models": {
+                    model: {
+                        "limit": round(state.limit, 2),
+                        "in_flight": state.in_flight,
+                        "blocked_for": round(max(0.0, state.blocked_until - now), 2),
+                        **state.counters,
+                    }
+                    for model, state in self._models.items()
+                },
+            }
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    return _status_code(error) == 429
+
+
+def retry_after(error: BaseException, default: float) -> float:
+    """Seconds from the error response's Retry-After header (delta-seconds or HTTP date)"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+def scheduler_settings(config: dict) -> Dict[str, Any]:
+    scheduler_config = config.get('scheduler') or {}
+    return {
+        "enabled": bool(scheduler_config.get('enabled', True)),
+        "max_in_flight": int(scheduler_config.get('max_in_flight', 64)),
+        "initial_concurrency": int(scheduler_config.get('initial_concurrency', 8)),
+        "min_concurrency": int(scheduler_config.get('min_concurrency', 1)),
+        "max_concurrency": int(scheduler_config.get('max_concurrency', 32)),
+        "requests_per_minute": float(scheduler_config.get('requests_per_minute', 0)),
+        "burst": float(scheduler_config.get('burst', 10)),
+        "latency_target": float(scheduler_config.get('latency_target', 60)),
+        "default_retry_after": float(scheduler_config.get('default_retry_after', 2)),
+        "max_retry_after": float(scheduler_config.get('max_retry_after', 30)),
+        "models": scheduler_config.get('models') or {},
+    }
+
+
+def split_settings(config: dict, parts: int) -> Dict[str, Any]:
+    """
+    Dotted-key overrides giving one of `parts` processes its share of the scheduler's rate and
+    concurrency limits (schedulers are per process, so N processes would otherwise get N times them)
+    """
+    if parts <= 1:
+        return {}
+    scheduler_config = config.get('scheduler') or {}
+    settings = scheduler_settings(config)
+
+    def share(section: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+        shared = dict(section)
+        for key in ("requests_per_minute", "burst"):
+            if key in section or key in defaults:
+                shared[key] = float(section.get(key, defaults.get(key))) / parts
+        if "burst" in shared:
+            shared["burst"] = max(1.0, shared["burst"])
+        for key in ("max_in_flight", "initial_concurrency", "max_concurrency"):
+            if key in section or key in defaults:
+                shared[key] = max(1, int(section.get(key, defaults.get(key))) // parts)
+        return shared
+
+    overrides = {f"scheduler.{key}": value for key, value in share({}, settings).items()}
+    overrides["scheduler.models"] = {model: share(model_config or {}, {})
+                                     for model, model_config in (scheduler_config.get('models') or {}).items()}
+    return overrides
+
+
+_schedulers: Dict[str, Scheduler] = {}
+_schedulers_lock = threading.Lock()
+# Set by force_enable(): schedule even when scheduler.enabled is false
+_forced = False
+
+
+def force_enable():
+    """Admit every LLM request of this process through a scheduler, whatever scheduler.enabled says"""
+    global _forced
+    _forced = True
+
+
+def get_scheduler(config: dict) -> Optional[Scheduler]:
+    """Process-wide scheduler for the scheduler config section, or None when disabled"""
+    settings = scheduler_settings(config)
+    if not settings["enabled"] and not _forced:
+        return None
+    key = json.dumps(settings, sort_keys=True)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = Scheduler(settings)
+        return scheduler
@@ -0,0 +1,49 @@
+"""
+Local token counting for context-budget decisions.
+
+Uses tiktoken when it is installed (o200k_base unless tiktoken knows the model);
+otherwise estimates ~4 characters per token. The estimate only has to be good enough
+to decide when synthesis inputs must be reduced before they overflow the window.
+"""
+import functools
+from typing import Optional
+
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=32)
+def _encoding(model: Optional[str]):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        # OpenRouter ids look like "openai/gpt-4o"; tiktoken only knows the bare name
+        return tiktoken.encoding_for_model((model or "").split("/")[-1])
+    except KeyError:
+        pass
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Encoding files could not be loaded (e.g. offline): fall back to the estimate
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens in text, exact with tiktoken and estimated otherwise"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut text down to at most max_tokens tokens, marking the cut"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    marker = "\n[...truncated]"
+    keep = max(0, max_tokens - count_tokens(marker, model))
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:keep * CHARS_PER_TOKEN] + marker
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + marker
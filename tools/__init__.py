@@ -1,39 +1,191 @@
 import os
+import ast
+import json
 import importlib
-from typing import Dict, List
-from .base_tool import BaseTool
+import threading
+from typing import Any, Dict, List, Optional
+from .base_tool import BaseTool, tool_cache_stats
+
+# Modules in this directory that hold no tools
+HELPER_MODULES = {'__init__', 'base_tool', 'search_cache', 'html_extract'}
+
+_TOOLS_DIR = os.path.dirname(__file__)
+_MANIFEST_PATH = os.path.join(_TOOLS_DIR, '__pycache__', 'tool_manifest.json')
+_SCHEMA_PROPERTIES = ('name', 'description', 'parameters')
+_CACHE_ATTRIBUTES = {'cache_policy': 'side_effect', 'cache_ttl': 0.0}
+# Bump when the manifest entries change shape
+_MANIFEST_VERSION = 2
+# The scanner and the attribute defaults it records live here, so editing them invalidates the manifest too
+_SCANNER_MODULES = ('__init__', 'base_tool')
+
+_manifest: Optional[List[Dict[str, Any]]] = None
+_manifest_lock = threading.Lock()
+
+
+def _tool_modules() -> Dict[str, List[int]]:
+    """{module name: [mtime_ns, size]} of every tool module"""
+    modules = {}
+    for filename in sorted(os.listdir(_TOOLS_DIR)):
+        if filename.endswith('.py') and filename[:-3] not in HELPER_MODULES:
+            stat = os.stat(os.path.join(_TOOLS_DIR, filename))
+            modules[filename[:-3]] = [stat.st_mtime_ns, stat.st_size]
+    return modules
+
+
+def _manifest_key(modules: Dict[str, List[int]]) -> Dict[str, Any]:
+    """The manifest's cache key: format version, scanner sources and tool modules"""
+    scanner = {}
+    for module_name in _SCANNER_MODULES:
+        stat = os.stat(os.path.join(_TOOLS_DIR, f'{module_name}.py'))
+        scanner[module_name] = [stat.st_mtime_ns, stat.st_size]
+    return {'version': _MANIFEST_VERSION, 'scanner': scanner, 'modules': modules}
+
+
+def _literal_return(func: ast.FunctionDef) -> Any:
+    """Value of a property whose body is a single `return <literal>`"""
+    body = [node for node in func.body if not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))]
+    if len(body) != 1 or not isinstance(body[0], ast.Return) or body[0].value is None:
+        raise ValueError(f"{func.name} is not a literal")
+    return ast.literal_eval(body[0].value)
+
+
+def _scan_module(module_name: str) -> List[Dict[str, Any]]:
+    """
+    Tool classes of a module read from its source, without importing it. Classes whose
+    name/description/parameters are not plain literals are marked static=False and get
+    imported at discovery time instead.
+    """
+    with open(os.path.join(_TOOLS_DIR, f'{module_name}.py'), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    entries = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        if not any(isinstance(base, ast.Name) and base.id == 'BaseTool' for base in node.bases):
+            continue
+        entry = {'module': module_name, 'class': node.name, 'static': True, **_CACHE_ATTRIBUTES}
+        methods = {item.name: item for item in node.body if isinstance(item, ast.FunctionDef)}
+        try:
+            for prop in _SCHEMA_PROPERTIES:
+                entry[prop] = _literal_return(methods[prop])
+            for item in node.body:
+                if isinstance(item, ast.Assign) and len(item.targets) == 1 and \
+                        isinstance(item.targets[0], ast.Name) and item.targets[0].id in _CACHE_ATTRIBUTES:
+                    entry[item.targets[0].id] = ast.literal_eval(item.value)
+        except (KeyError, ValueError, SyntaxError):
+            entry = {'module': module_name, 'class': node.name, 'static': False}
+        entries.append(entry)
+    return entries
+
+
+def _build_manifest(modules: Dict[str, List[int]], silent: bool) -> List[Dict[str, Any]]:
+    entries = []
+    for module_name in modules:
+        try:
+            entries.extend(_scan_module(module_name))
+        except Exception as e:
+            if not silent:
+                print(f"Warning: Could not read tools from {module_name}.py: {e}")
+    return entries
+
+
+def tool_manifest(silent: bool = False) -> List[Dict[str, Any]]:
+    """
+    Schema metadata of every tool, built once per process from the module sources and
+    cached in tools/__pycache__ until a tool module's mtime or size changes
+    """
+    global _manifest
+    with _manifest_lock:
+        if _manifest is not None:
+            return _manifest
+        modules = _tool_modules()
+        key = _manifest_key(modules)
+        try:
+            with open(_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('key') == key:
+                _manifest = cached['tools']
+                return _manifest
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        _manifest = _build_manifest(modules, silent)
+        try:
+            os.makedirs(os.path.dirname(_MANIFEST_PATH), exist_ok=True)
+            tmp_path = f'{_MANIFEST_PATH}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'tools': _manifest}, f)
+            os.replace(tmp_path, _MANIFEST_PATH)
+        except OSError:
+            # Read-only install; the manifest is simply rebuilt by the next process
+            pass
+        return _manifest
+
+
+class LazyTool(BaseTool):
+    """
+    A tool known from the manifest. The schema is served from the manifest; the module
+    (and its dependencies, e.g. ddgs/requests for search_web) is imported on first execute.
+    """
+
+    def __init__(self, spec: Dict[str, Any], config: dict):
+        self.spec = spec
+        self.config = config
+        self.cache_policy = spec.get('cache_policy', 'side_effect')
+        self.cache_ttl = spec.get('cache_ttl', 0.0)
+        self._tool: Optional[BaseTool] = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.spec['name']
+
+    @property
+    def description(self) -> str:
+        return self.spec['description']
+
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return self.spec['parameters']
+
+    @property
+    def loaded(self) -> bool:
+        return self._tool is not None
+
+    def load(self) -> BaseTool:
+        """The real tool instance, importing its module on first use"""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    module = importlib.import_module(f".{self.spec['module']}", package='tools')
+                    self._tool = getattr(module, self.spec['class'])(self.config)
+        return self._tool
+
+    def cache_validator(self, **kwargs) -> Any:
+        return self.load().cache_validator(**kwargs)
+
+    def cacheable(self, result: Any) -> bool:
+        return self.load().cacheable(result)
+
+    def execute(self, **kwargs) -> Any:
+        return self.load().execute(**kwargs)
+
 
 def discover_tools(config: dict = None, silent: bool = False) -> Dict[str, BaseTool]:
-    """Automatically discover and load all tools from the tools directory"""
+    """Load all tools from the tools directory; tool modules are imported on first execute"""
     tools = {}
-    
-    # Get the tools directory path
-    tools_dir = os.path.dirname(__file__)
-    
-    # Scan for Python files (excluding __init__.py and base_tool.py)
-    for filename in os.listdir(tools_dir):
-        if filename.endswith('.py') and filename not in ['__init__.py', 'base_tool.py']:
-            module_name = filename[:-3]  # Remove .py extension
-            
-            try:
-                # Import the module
-                module = importlib.import_module(f'.{module_name}', package='tools')
-                
-                # Find tool classes that inherit from BaseTool
-                for item_name in dir(module):
-                    item = getattr(module, item_name)
-                    if (isinstance(item, type) and 
-                        issubclass(item, BaseTool) and 
-                        item != BaseTool):
-                        
-                        # Instantiate the tool
-                        tool_instance = item(config or {})
-                        tools[tool_instance.name] = tool_instance
-                        if not silent:
-                            print(f"Loaded tool: {tool_instance.name}")
-                        
-            except Exception as e:
-                if not silent:
-                    print(f"Warning: Could not load tool from {filename}: {e}")
-    
-    return tools
\ No newline at end of file
+    for spec in tool_manifest(silent=silent):
+        try:
+            if spec['static']:
+                tool_instance = LazyTool(spec, config or {})
+            else:
+                # Schema computed at runtime, so the module has to be imported now
+                module = importlib.import_module(f".{spec['module']}", package='tools')
+                tool_instance = getattr(module, spec['class'])(config or {})
+            tools[tool_instance.name] = tool_instance
+            if not silent:
+                print(f"Loaded tool: {tool_instance.name}")
+        except Exception as e:
+            if not silent:
+                print(f"Warning: Could not load tool from {spec['module']}.py: {e}")
+
+    return tools
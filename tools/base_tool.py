@@ -1,32 +1,147 @@
+import copy
+import json
+import time
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
 from typing import Dict, Any, List
 
+# "pure": same arguments, same result; "ttl": reusable for cache_ttl seconds;
+# "side_effect": never served from the cache
+CACHE_POLICIES = ("pure", "ttl", "side_effect")
+
+
+class ToolResultCache:
+    """Process-wide LRU of tool results, with hit/miss counters per tool"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (expires_at or None, result)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0, "bypassed": 0, "expired": 0})
+
+    def get(self, tool: str, key: str):
+        """(True, result) on a hit, (False, None) on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= now:
+                del self._entries[key]
+                self._counters[tool]["expired"] += 1
+                entry = None
+            if entry is None:
+                self._counters[tool]["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._counters[tool]["hits"] += 1
+            return True, copy.deepcopy(entry[1])
+
+    def set(self, key: str, result: Any, ttl: float = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bypass(self, tool: str):
+        with self._lock:
+            self._counters[tool]["bypassed"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tool counters and hit rate over cacheable calls"""
+        with self._lock:
+            stats = {}
+            for tool, counters in sorted(self._counters.items()):
+                lookups = counters["hits"] + counters["misses"]
+                stats[tool] = {**counters, "hit_rate": counters["hits"] / lookups if lookups else 0.0}
+            return stats
+
+
+_result_cache = ToolResultCache()
+
+
+def tool_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return _result_cache.stats()
+
+
+def _failed(result: Any) -> bool:
+    """Error results may be transient (network, permissions) and are never cached"""
+    if isinstance(result, list):
+        # e.g. search_web's [{"error": "Search failed: ..."}]
+        return any(_failed(item) for item in result)
+    return isinstance(result, dict) and ("error" in result or result.get("success") is False)
+
+
 class BaseTool(ABC):
     """Base class for all tools"""
-    
+
+    # Memoization is opt-in: tools declare a policy from CACHE_POLICIES (and a TTL for "ttl")
+    cache_policy = "side_effect"
+    cache_ttl = 0.0
+
     @property
     @abstractmethod
     def name(self) -> str:
         """Tool name for OpenRouter function calling"""
         pass
-    
+
     @property
     @abstractmethod
     def description(self) -> str:
         """Tool description for OpenRouter"""
         pass
-    
+
     @property
     @abstractmethod
     def parameters(self) -> Dict[str, Any]:
         """OpenRouter function parameters schema"""
         pass
-    
+
     @abstractmethod
     def execute(self, **kwargs) -> Any:
         """Execute the tool with given parameters"""
         pass
-    
+
+    def cache_validator(self, **kwargs) -> Any:
+        """Extra cache key material that changes whenever the result would (e.g. a file's mtime and size)"""
+        return None
+
+    def cacheable(self, result: Any) -> bool:
+        """Whether a result that is not an error may be memoized (e.g. not when parts of it failed)"""
+        return True
+
+    def cache_key(self, **kwargs) -> str:
+        """Canonical JSON of the tool name, its arguments (unset ones dropped) and the validator"""
+        args = {key: value for key, value in kwargs.items() if value is not None}
+        return json.dumps({"tool": self.name, "args": args, "valid": self.cache_validator(**kwargs)},
+                          sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    def call(self, **kwargs) -> Any:
+        """execute() through the process-wide tool-result cache, according to cache_policy"""
+        settings = ((getattr(self, "config", None) or {}).get("agent") or {}).get("tool_cache") or {}
+        policy = (settings.get("policies") or {}).get(self.name, self.cache_policy)
+        ttl = float((settings.get("ttl") or {}).get(self.name, self.cache_ttl)) if policy == "ttl" else None
+        if policy not in ("pure", "ttl") or (ttl is not None and ttl <= 0) or not settings.get("enabled", True):
+            _result_cache.bypass(self.name)
+            return self.execute(**kwargs)
+        _result_cache.max_entries = int(settings.get("max_entries", _result_cache.max_entries))
+
+        key = self.cache_key(**kwargs)
+        hit, result = _result_cache.get(self.name, key)
+        if hit:
+            return result
+        result = self.execute(**kwargs)
+        if not _failed(result) and self.cacheable(result):
+            _result_cache.set(key, result, ttl)
+        return result
+
     def to_openrouter_schema(self) -> Dict[str, Any]:
         """Convert tool to OpenRouter function schema"""
         return {
@@ -36,4 +151,4 @@ class BaseTool(ABC):
                 "description": self.description,
                 "parameters": self.parameters
             }
-        }
\ No newline at end of file
+        }
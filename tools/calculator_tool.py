@@ -4,6 +4,8 @@ import ast
 import operator
 
 class CalculatorTool(BaseTool):
+    cache_policy = "pure"
+    
     def __init__(self, config: dict):
         self.config = config
         # Safe operators for evaluation
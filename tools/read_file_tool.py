@@ -1,18 +1,163 @@
 from .base_tool import BaseTool
+from collections import OrderedDict
 import os
+import mmap
+import threading
+
+CHUNK_SIZE = 1024 * 1024
+
+# Sparse line indexes: abspath -> (mtime_ns, size, stride, byte offsets of lines 1, 1+stride, 1+2*stride, ...)
+_line_indexes = OrderedDict()
+_line_indexes_lock = threading.Lock()
+
+
+def _decode(data: bytes) -> str:
+    """UTF-8 with universal newlines, as text-mode open() reads"""
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _char_start(f, offset: int) -> int:
+    """First byte at or after offset that starts a UTF-8 character"""
+    f.seek(offset)
+    lead = f.read(4)
+    skip = 0
+    while skip < len(lead) and lead[skip] & 0xC0 == 0x80:
+        skip += 1
+    return offset + skip
+
+
+def _whole_chars(data: bytes) -> bytes:
+    """data without a UTF-8 sequence (or the \r of a \r\n) cut off at its end"""
+    if data.endswith(b'\r'):
+        return data[:-1]
+    i = len(data) - 1
+    while i >= max(0, len(data) - 4) and data[i] & 0xC0 == 0x80:
+        i -= 1
+    if i < 0 or data[i] < 0xC0:
+        return data
+    needed = 2 if data[i] < 0xE0 else 3 if data[i] < 0xF0 else 4
+    return data if len(data) - i >= needed else data[:i]
+
+
+def _cut(data: bytes, limit: int, at_line: bool = True) -> bytes:
+    """At most limit bytes of data, ending after a newline if there is one, else on a character boundary"""
+    if len(data) <= limit:
+        return data
+    data = data[:limit]
+    newline = data.rfind(b'\n')
+    if at_line and newline >= 0:
+        return data[:newline + 1]
+    return _whole_chars(data)
+
+
+def _tail_start(f, size: int, lines: int) -> int:
+    """
+    Byte offset where the last `lines` lines start, found by scanning backwards from the end.
+    Like the other line scans here, only \n ends a line (so \r\n works, bare \r does not).
+    """
+    if lines <= 0:
+        return size
+    try:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = size - 1 if mm[size - 1:size] == b'\n' else size
+            for _ in range(lines):
+                end = mm.rfind(b'\n', 0, end)
+                if end < 0:
+                    return 0
+            return end + 1
+    except (ValueError, OSError):
+        pass
+    # No mmap (e.g. some network filesystems): seek backwards block by block
+    f.seek(size - 1)
+    end = size - 1 if f.read(1) == b'\n' else size
+    remaining = lines
+    while end > 0:
+        start = max(0, end - CHUNK_SIZE)
+        f.seek(start)
+        block = f.read(end - start)
+        pos = len(block)
+        while remaining:
+            pos = block.rfind(b'\n', 0, pos)
+            if pos < 0:
+                break
+            remaining -= 1
+        if not remaining:
+            return start + pos + 1
+        end = start
+    return 0
+
+
+def _build_line_index(f, stride: int) -> list:
+    offsets = [0]
+    line = 1
+    next_mark = 1 + stride
+    position = 0
+    f.seek(0)
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            return offsets
+        newlines = chunk.count(b'\n')
+        if line + newlines < next_mark:
+            line += newlines
+        else:
+            pos = -1
+            for _ in range(newlines):
+                pos = chunk.find(b'\n', pos + 1)
+                line += 1
+                if line == next_mark:
+                    offsets.append(position + pos + 1)
+                    next_mark += stride
+        position += len(chunk)
+
+
+def _line_offset(f, path: str, stat: os.stat_result, line: int, settings: dict) -> int:
+    """Byte offset of 1-based `line` (the file size past the last line)"""
+    stride = int(settings.get('line_index_stride', 1000))
+    offset, skip = 0, line - 1
+    if stat.st_size >= int(settings.get('line_index_min_bytes', 1024 * 1024)) and line > stride:
+        key = os.path.abspath(path)
+        with _line_indexes_lock:
+            cached = _line_indexes.get(key)
+            if cached is not None and cached[:3] != (stat.st_mtime_ns, stat.st_size, stride):
+                cached = None
+            if cached is not None:
+                _line_indexes.move_to_end(key)
+        if cached is None:
+            cached = (stat.st_mtime_ns, stat.st_size, stride, _build_line_index(f, stride))
+            with _line_indexes_lock:
+                _line_indexes[key] = cached
+                while len(_line_indexes) > int(settings.get('max_indexed_files', 32)):
+                    _line_indexes.popitem(last=False)
+        offsets = cached[3]
+        block = min(skip // stride, len(offsets) - 1)
+        offset, skip = offsets[block], skip - block * stride
+    f.seek(offset)
+    for _ in range(skip):
+        line_bytes = f.readline()
+        if not line_bytes:
+            break
+        offset += len(line_bytes)
+    return offset
+
 
 class ReadFileTool(BaseTool):
+    # Pure given the file's state, which cache_validator adds to the key
+    cache_policy = "pure"
+
     def __init__(self, config: dict):
         self.config = config
-    
+        self.settings = config.get('read_file', {})
+        self.max_bytes = int(self.settings.get('max_bytes', 256 * 1024))
+
     @property
     def name(self) -> str:
         return "read_file"
-    
+
     @property
     def description(self) -> str:
-        return "Read the complete contents of a file from the file system. Handles various text encodings and provides detailed error messages if the file cannot be read."
-    
+        return "Read a file from the file system: the whole file, its first or last N lines, a line range or a byte range. Large results are cut at max_bytes and include a next_offset (or next_line) to continue from; a cut tail result instead gives the offset its content starts at, and the lines before it can be read with offset/length. Lines end at \n or \r\n; a file with bare \r (classic Mac) line endings counts as one line for head, tail and line ranges. Handles various text encodings and provides detailed error messages if the file cannot be read."
+
     @property
     def parameters(self) -> dict:
         return {
@@ -29,55 +174,165 @@ class ReadFileTool(BaseTool):
                 "tail": {
                     "type": "integer",
                     "description": "If provided, returns only the last N lines of the file"
+                },
+                "start_line": {
+                    "type": "integer",
+                    "description": "First line to return (1-based); use with end_line for a line range, or pass a previous next_line to continue"
+                },
+                "end_line": {
+                    "type": "integer",
+                    "description": "Last line to return (inclusive)"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Byte offset to start reading at; pass a previous next_offset to continue"
+                },
+                "length": {
+                    "type": "integer",
+                    "description": "Number of bytes to read from offset"
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": "Cap on the bytes returned (default 262144, at least 4)"
                 }
             },
             "required": ["path"]
         }
-    
-    def execute(self, path: str, head: int = None, tail: int = None) -> dict:
+
+    def cache_validator(self, path: str, **kwargs):
+        """Cached reads are invalidated when the file's mtime or size changes"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+    def execute(self, path: str, head: int = None, tail: int = None, start_line: int = None, end_line: int = None,
+                offset: int = None, length: int = None, max_bytes: int = None) -> dict:
         try:
             # Validate parameters
             if head is not None and tail is not None:
                 return {"error": "Cannot specify both head and tail parameters"}
-            
+            modes = [head is not None or tail is not None, start_line is not None or end_line is not None,
+                     offset is not None or length is not None]
+            if sum(modes) > 1:
+                return {"error": "Use only one of head/tail, start_line/end_line or offset/length"}
+            # At least one UTF-8 character (4 bytes), so every page returns something and cursors move
+            limit = max(4, min(max_bytes or self.max_bytes, self.max_bytes))
+
             # Check if file exists
             if not os.path.exists(path):
                 return {"error": f"File not found: {path}"}
-            
+
             # Check if it's actually a file (not a directory)
             if not os.path.isfile(path):
                 return {"error": f"Path is not a file: {path}"}
-            
-            # Read file with appropriate method
-            if head is not None:
-                # Read first N lines
-                with open(path, 'r', encoding='utf-8') as f:
+
+            stat = os.stat(path)
+            size = stat.st_size
+            with open(path, 'rb') as f:
+                if head is not None:
+                    # Read first N lines
                     lines = []
+                    read = 0
                     for i in range(head):
-                        line = f.readline()
+                        line = f.readline(limit - read + 1)
                         if not line:  # EOF reached
                             break
                         lines.append(line)
-                    content = ''.join(lines).rstrip('\n')
-            elif tail is not None:
-                # Read last N lines
-                with open(path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    content = ''.join(lines[-tail:]).rstrip('\n') if lines else ""
-            else:
-                # Read entire file
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            
-            return {
-                "path": path,
-                "content": content,
-                "success": True
-            }
-        
+                        read += len(line)
+                        if read > limit:
+                            break
+                    result = self._page(path, b''.join(lines), 0, limit, size)
+                    result["content"] = result["content"].rstrip('\n')
+                    return result
+
+                if tail is not None:
+                    # Read last N lines, scanning backwards from the end instead of reading the whole file
+                    if size == 0:
+                        return {"path": path, "content": "", "success": True}
+                    start = _tail_start(f, size, tail)
+                    if size - start > limit:
+                        # Keep the end of the file. "offset" is where the returned content starts, so it
+                        # points backwards: the skipped lines are read with offset=0, length=offset
+                        start = _char_start(f, size - limit)
+                        f.seek(start)
+                        data = f.read(size - start)
+                        newline = data.find(b'\n')
+                        if 0 <= newline < len(data) - 1:
+                            start += newline + 1
+                            data = data[newline + 1:]
+                        return {"path": path, "content": _decode(data).rstrip('\n'), "success": True,
+                                "truncated": True, "offset": start, "size": size}
+                    f.seek(start)
+                    return {"path": path, "content": _decode(f.read()).rstrip('\n'), "success": True}
+
+                if start_line is not None or end_line is not None:
+                    first = max(1, start_line or 1)
+                    start = _line_offset(f, path, stat, first, self.settings)
+                    f.seek(start)
+                    lines = []
+                    read = 0
+                    line_no = first
+                    while end_line is None or line_no <= end_line:
+                        line = f.readline(limit - read + 1)
+                        if not line or (lines and read + len(line) > limit):
+                            break
+                        lines.append(line)
+                        read += len(line)
+                        line_no += 1
+                        if read >= limit:
+                            break
+                    data = _cut(b''.join(lines), limit, at_line=False)
+                    result = {"path": path, "content": _decode(data), "success": True,
+                              "start_line": first, "end_line": line_no - 1, "offset": start, "size": size}
+                    # The last line returned is incomplete when a single line is longer than the cap
+                    partial = len(data) < read or (bool(lines) and not lines[-1].endswith(b'\n') and start + read < size)
+                    more = start + len(data) < size and (partial or end_line is None or line_no <= end_line)
+                    if more:
+                        result["truncated"] = True
+                        if not partial:
+                            result["next_line"] = line_no
+                        result["next_offset"] = start + len(data)
+                    return result
+
+                if offset is not None or length is not None:
+                    start = _char_start(f, min(max(0, offset or 0), size))
+                    f.seek(start)
+                    # Ranges under 4 bytes are widened so a whole character (and a moving cursor) comes back
+                    want = size - start if length is None else max(0, length) and max(length, 4)
+                    data = f.read(min(want, limit + 1))
+                    if len(data) <= limit and start + len(data) < size:
+                        # The range may end inside a character; it is left for the next read
+                        data = _whole_chars(data)
+                    result = self._page(path, data, start, limit, size, at_line=False, cursor=True)
+                    result.update(offset=start, size=size)
+                    return result
+
+                # Read entire file (up to max_bytes)
+                data = f.read(limit + 1)
+                if size == 0 and data:
+                    # Pseudo-files (e.g. /proc) report size 0
+                    size = len(data) + len(f.read())
+                return self._page(path, data, 0, limit, size)
+
         except UnicodeDecodeError as e:
             return {"error": f"Failed to decode file as UTF-8: {str(e)}"}
         except PermissionError:
             return {"error": f"Permission denied reading file: {path}"}
         except Exception as e:
-            return {"error": f"Failed to read file: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Failed to read file: {str(e)}"}
+
+    def _page(self, path: str, data: bytes, start: int, limit: int, size: int, at_line: bool = True,
+              cursor: bool = False) -> dict:
+        """
+        Result for data read from byte `start`, cut to limit bytes with a cursor to the rest
+        (with cursor=True, whenever the file goes on past the page)
+        """
+        page = _cut(data, limit, at_line)
+        result = {"path": path, "content": _decode(page), "success": True}
+        if len(page) < len(data):
+            result.update(truncated=True, next_offset=start + len(page), size=size)
+        elif cursor and start + len(page) < size:
+            result["next_offset"] = start + len(page)
+        return result
@@ -0,0 +1,179 @@
+"""
+Persistent cache for search_web.
+
+Parallel agents researching the same topic issue overlapping DuckDuckGo queries and
+download the same pages. This module keeps DDGS query results (short TTL) and
+extracted page text (revalidated with ETag/Last-Modified once stale) in one
+zlib-compressed SQLite file, shared by all threads and processes, with a size cap
+and least-recently-used eviction. SingleFlight collapses concurrent identical
+fetches in a process into one download.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.collapsed = 0
+    
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.collapsed += 1
+        if not leader:
+            return future.result(timeout=timeout)
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+class SearchCache:
+    """Compressed on-disk cache of search results and page text with TTLs and a size cap."""
+    
+    def __init__(self, path: str, query_ttl: float = 600.0, page_ttl: float = 3600.0,
+                 max_bytes: int = 128 * 1024 * 1024):
+        self.path = path
+        self.query_ttl = query_ttl
+        self.page_ttl = page_ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {
+            "query_hits": 0, "query_misses": 0,
+            "page_hits": 0, "page_misses": 0, "page_revalidated": 0,
+            "evictions": 0,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " etag TEXT, last_modified TEXT, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+        conn.commit()
+    
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+    
+    def _get(self, key: str) -> Optional[tuple]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, etag, last_modified, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        return row
+    
+    def _put(self, key: str, value: Any, ttl: float, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        now = time.time()
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, etag, last_modified, expires_at, last_access)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, blob, len(blob), etag, last_modified, now + ttl, now),
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 32").fetchall()
+            if not rows:
+                break
+            for row_key, size in rows:
+                conn.execute("DELETE FROM entries WHERE key = ?", (row_key,))
+                total -= size
+                self._count("evictions")
+                if total <= self.max_bytes:
+                    break
+        conn.commit()
+    
+    # ----- DDGS query results -----
+    
+    def get_results(self, query: str, max_results: int) -> Optional[list]:
+        row = self._get(f"q:{max_results}:{query}")
+        if row is None or row[3] <= time.time():
+            self._count("query_misses")
+            return None
+        self._count("query_hits")
+        return json.loads(zlib.decompress(row[0]))
+    
+    def put_results(self, query: str, max_results: int, results: list):
+        self._put(f"q:{max_results}:{query}", results, self.query_ttl)
+    
+    # ----- page text -----
+    
+    def get_page(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached page text plus its validators; 'fresh' is False once the entry needs revalidation"""
+        row = self._get(f"p:{url}")
+        if row is None:
+            self._count("page_misses")
+            return None
+        fresh = row[3] > time.time()
+        self._count("page_hits" if fresh else "page_revalidated")
+        return {"text": json.loads(zlib.decompress(row[0])), "etag": row[1], "last_modified": row[2], "fresh": fresh}
+    
+    def put_page(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self._put(f"p:{url}", text, self.page_ttl, etag, last_modified)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        stats.update({"entries": entries, "bytes": size})
+        return stats
+
+
+_caches: Dict[tuple, SearchCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_search_cache(config: dict) -> Optional[SearchCache]:
+    """Process-wide cache for the search.cache config section, or None when disabled"""
+    cache_config = config.get('search', {}).get('cache') or {}
+    if not cache_config.get('enabled', True):
+        return None
+    settings = (
+        cache_config.get('path', '.cache/search.sqlite'),
+        float(cache_config.get('query_ttl', 600)),
+        float(cache_config.get('page_ttl', 3600)),
+        int(cache_config.get('max_mb', 128)) * 1024 * 1024,
+    )
+    with _caches_lock:
+        cache = _caches.get(settings)
+        if cache is None:
+            cache = SearchCache(*settings)
+            _caches[settings] = cache
+        return cache
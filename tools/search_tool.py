@@ -1,12 +1,73 @@
 from .base_tool import BaseTool
+from .search_cache import SingleFlight, get_search_cache
+from .html_extract import extract_text
 from ddgs import DDGS
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import threading
+import time
+
+# Shared across all SearchTool calls (and therefore all agent threads) in the process
+_session = None
+_executor = None
+_host_semaphores = {}
+_shared_lock = threading.Lock()
+# Identical concurrent queries/page fetches from parallel agents collapse into one request
+_query_flights = SingleFlight()
+_page_flights = SingleFlight()
+
+# Prefix of a result's content when its page could not be fetched
+FETCH_FAILED = "Could not fetch content"
+
+
+def _shared_session(pool_size: int) -> requests.Session:
+    """Keep-alive session whose connection pool is reused by every page fetch"""
+    global _session
+    with _shared_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _shared_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Bounded pool for page fetches, shared so concurrent agents cannot open unbounded threads"""
+    global _executor
+    with _shared_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search-fetch")
+        return _executor
+
+
+def _host_semaphore(host: str, limit: int) -> threading.BoundedSemaphore:
+    with _shared_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(limit)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
 
 class SearchTool(BaseTool):
+    # Results go stale; agent.tool_cache.ttl.search_web overrides
+    cache_policy = "ttl"
+    cache_ttl = 300
+    
     def __init__(self, config: dict):
         self.config = config
+        search_config = config.get('search', {})
+        self.fetch_workers = search_config.get('fetch_workers', 8)
+        self.per_host_limit = search_config.get('per_host_limit', 2)
+        self.fetch_timeout = search_config.get('fetch_timeout', 10)
+        self.fetch_deadline = search_config.get('fetch_deadline', 15)
+        self.extractor = search_config.get('extractor', 'auto')
+        self.content_limit = search_config.get('content_limit', 1000)
+        self.max_download_bytes = search_config.get('max_download_kb', 512) * 1024
     
     @property
     def name(self) -> str:
@@ -34,57 +95,140 @@ class SearchTool(BaseTool):
             "required": ["query"]
         }
     
-    def execute(self, query: str, max_results: int = 5) -> list:
-        """Search the web using DuckDuckGo and fetch page content"""
+    def _download(self, url: str, deadline: float, headers: dict) -> tuple:
+        """
+        GET a page over the shared keep-alive session, respecting per-host limits and the call deadline.
+        The body is streamed into the extractor, which stops reading once the snippet is full.
+        Returns (status_code, response_headers, text, complete); text is None for 304 responses and
+        complete is False when the deadline cut the body off before the extractor had enough.
+        """
+        semaphore = _host_semaphore(urlparse(url).netloc, self.per_host_limit)
+        if not semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise TimeoutError("deadline exceeded waiting for host slot")
         try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("deadline exceeded")
+            response = _shared_session(self.fetch_workers).get(
+                url,
+                headers=headers,
+                timeout=min(self.fetch_timeout, remaining),
+                stream=True
+            )
+            try:
+                if response.status_code == 304:
+                    return response.status_code, response.headers, None, True
+                response.raise_for_status()
+                body = {"cut": False}
+                text = extract_text(
+                    self._body_until(response, deadline, body),
+                    limit=self.content_limit,
+                    max_bytes=self.max_download_bytes,
+                    backend=self.extractor,
+                    encoding=response.encoding
+                )
+                return response.status_code, response.headers, text, not body["cut"]
+            finally:
+                # Drops the connection if the body was not fully read
+                response.close()
+        finally:
+            semaphore.release()
+    
+    @staticmethod
+    def _body_until(response: requests.Response, deadline: float, body: dict):
+        """Body chunks, ending early (with partial text, and body["cut"] set) when the call deadline passes"""
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            yield chunk
+            if time.monotonic() >= deadline:
+                body["cut"] = True
+                return
+    
+    def _fetch_page(self, url: str, deadline: float) -> str:
+        """Fetch page text, serving fresh cache entries and revalidating stale ones with ETag/Last-Modified"""
+        cache = get_search_cache(self.config)
+        cached = cache.get_page(url) if cache is not None else None
+        if cached is not None and cached["fresh"]:
+            return cached["text"]
+        
+        headers = {'User-Agent': self.config.get('search', {}).get('user_agent', 'Mozilla/5.0')}
+        if cached is not None:
+            if cached["etag"]:
+                headers['If-None-Match'] = cached["etag"]
+            if cached["last_modified"]:
+                headers['If-Modified-Since'] = cached["last_modified"]
+        
+        status_code, response_headers, text, complete = self._download(url, deadline, headers)
+        if status_code == 304:
+            if cached is None:
+                raise ValueError("Unexpected 304 response without a cached copy")
+            # Unchanged upstream: renew the cached copy
+            cache.put_page(url, cached["text"], cached["etag"], cached["last_modified"])
+            return cached["text"]
+        
+        # A page cut off by the deadline is returned but not cached: with its validators,
+        # later 304s would keep serving the truncated text
+        if cache is not None and complete:
+            cache.put_page(url, text, response_headers.get('ETag'), response_headers.get('Last-Modified'))
+        return text
+    
+    def _fetch_content(self, url: str, deadline: float) -> str:
+        """Fetch page text; agents asking for the same URL concurrently share one download"""
+        return _page_flights.do(url, lambda: self._fetch_page(url, deadline),
+                                timeout=max(0.0, deadline - time.monotonic()))
+    
+    def _search(self, query: str, max_results: int) -> list:
+        """DuckDuckGo results for a query, served from the short-lived query cache when possible"""
+        cache = get_search_cache(self.config)
+        if cache is not None:
+            results = cache.get_results(query, max_results)
+            if results is not None:
+                return results
+        
+        def run_query():
             # Use ddgs library
             ddgs = DDGS()
-            results = ddgs.text(query, max_results=max_results)
+            fresh = list(ddgs.text(query, max_results=max_results))
+            if cache is not None:
+                cache.put_results(query, max_results, fresh)
+            return fresh
+        
+        return _query_flights.do(f"{max_results}:{query}", run_query)
+    
+    def cacheable(self, result: list) -> bool:
+        """Results with a page that failed or missed the deadline are not memoized; the next call retries it"""
+        return not any(str(item.get("content", "")).startswith(FETCH_FAILED) for item in result)
+
+    def execute(self, query: str, max_results: int = 5) -> list:
+        """Search the web using DuckDuckGo and fetch page content concurrently"""
+        try:
+            results = self._search(query, max_results)
             
-            simplified_results = []
+            # Fetch all result pages concurrently under one deadline for the whole call
+            deadline = time.monotonic() + self.fetch_deadline
+            executor = _shared_executor(self.fetch_workers)
+            futures = [executor.submit(self._fetch_content, result['href'], deadline) for result in results]
+            wait(futures, timeout=max(0.0, deadline - time.monotonic()))
             
-            for result in results:
-                try:
-                    # Fetch content with requests
-                    response = requests.get(
-                        result['href'], 
-                        headers={'User-Agent': self.config.get('search', {}).get('user_agent', 'Mozilla/5.0')},
-                        timeout=10
-                    )
-                    response.raise_for_status()
-                    
-                    # Parse HTML with BeautifulSoup
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Remove script and style elements
-                    for script in soup(["script", "style"]):
-                        script.decompose()
-                    
-                    # Get text content
-                    text = soup.get_text()
-                    # Clean up whitespace
-                    text = ' '.join(text.split())
-                    
-                    # Limit content length
-                    content_snippet = text[:1000] + "..." if len(text) > 1000 else text
-                    
-                    simplified_results.append({
-                        "title": result['title'],
-                        "url": result['href'],
-                        "snippet": result['body'],
-                        "content": content_snippet
-                    })
-                
-                except Exception as e:
-                    # If we can't fetch the page, still include the search result
-                    simplified_results.append({
-                        "title": result['title'],
-                        "url": result['href'],
-                        "snippet": result['body'],
-                        "content": f"Could not fetch content: {str(e)}"
-                    })
+            simplified_results = []
+            for result, future in zip(results, futures):
+                if future.done():
+                    try:
+                        content = future.result()
+                    except Exception as e:
+                        # If we can't fetch the page, still include the search result
+                        content = f"{FETCH_FAILED}: {str(e)}"
+                else:
+                    # Deadline hit: return what we have, the fetch finishes in the background
+                    future.cancel()
+                    content = f"{FETCH_FAILED}: deadline exceeded"
+                simplified_results.append({
+                    "title": result['title'],
+                    "url": result['href'],
+                    "snippet": result['body'],
+                    "content": content
+                })
             
             return simplified_results
         
         except Exception as e:
-            return [{"error": f"Search failed: {str(e)}"}]
\ No newline at end of file
+            return [{"error": f"Search failed: {str(e)}"}]
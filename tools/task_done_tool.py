@@ -1,6 +1,8 @@
 from .base_tool import BaseTool
 
 class TaskDoneTool(BaseTool):
+    cache_policy = "side_effect"
+    
     def __init__(self, config: dict):
         self.config = config
     
@@ -3,6 +3,8 @@ import os
 import tempfile
 
 class WriteFileTool(BaseTool):
+    cache_policy = "side_effect"
+    
     def __init__(self, config: dict):
         self.config = config
     